@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from recipe import feed  # noqa: E402 (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # Strim promena ne sme da blokira event loop (vidi recipe.feed)
+    if scope['type'] == 'http' and scope['path'] == feed.FEED_PATH:
+        return await feed.asgi_app(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -1,6 +1,43 @@
 """
 Simple module for arithmetic operations.
+
+The batch_* variants apply the same operations to whole sequences, NumPy
+arrays or array.array buffers at once, broadcasting like NumPy. Without
+places they compute in floating point (integers stay integers for add,
+sub, mul and div). With places they compute in exact fixed point and
+return Decimals with that many decimal places, rounded half to even like
+Decimal.quantize, which is what prices need.
+
+Division by zero raises ZeroDivisionError like the scalar functions
+unless on_zero asks for NaN (ON_ZERO_NAN) or zero (ON_ZERO_ZERO) in
+those positions instead.
 """
+from decimal import (
+    MAX_EMAX,
+    MAX_PREC,
+    MIN_EMIN,
+    Context,
+    Decimal,
+    localcontext,
+)
+
+import numpy as np
+
+
+ON_ZERO_RAISE = 'raise'
+ON_ZERO_NAN = 'nan'
+ON_ZERO_ZERO = 'zero'
+ON_ZERO_POLICIES = (ON_ZERO_RAISE, ON_ZERO_NAN, ON_ZERO_ZERO)
+
+# Float operands are read as the shortest decimal with at most this many
+# places that gives the same float back (1.075, not 1.07499999...)
+FLOAT_PLACES = 9
+
+# Int64 math while intermediate values stay below this, Python ints above
+_INT64_BOUND = 2 ** 62
+
+# Decimal math that never rounds, for converting to and from fixed point
+_EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
 
 
 def add(x, y):
@@ -26,3 +63,247 @@ def div(x, y):
 def truediv(x, y):
     """Divides two numbers."""
     return x / y
+
+
+def batch_add(x, y, places=None):
+    """Adds two batches of numbers."""
+    return _batch(add, x, y, places)
+
+
+def batch_sub(x, y, places=None):
+    """Subtracts two batches of numbers."""
+    return _batch(sub, x, y, places)
+
+
+def batch_mul(x, y, places=None):
+    """Multiplies two batches of numbers."""
+    return _batch(mul, x, y, places)
+
+
+def batch_div(x, y, places=None, on_zero=ON_ZERO_RAISE):
+    """Divides two batches of numbers and returns integers."""
+    return _batch(div, x, y, places, on_zero)
+
+
+def batch_truediv(x, y, places=None, on_zero=ON_ZERO_RAISE):
+    """Divides two batches of numbers."""
+    return _batch(truediv, x, y, places, on_zero)
+
+
+def _batch(op, x, y, places, on_zero=ON_ZERO_RAISE):
+    if on_zero not in ON_ZERO_POLICIES:
+        raise ValueError(f'on_zero must be one of {ON_ZERO_POLICIES}')
+    if places is not None and places < 0:
+        raise ValueError('places must not be negative')
+
+    if places is None:
+        x, y = _as_numbers(x), _as_numbers(y)
+    else:
+        (x, x_scale), (y, y_scale) = _to_fixed(x), _to_fixed(y)
+    zero = None
+    if op in (div, truediv):
+        zero = np.broadcast_to(y == 0, np.broadcast(x, y).shape)
+        if not zero.any():
+            zero = None
+        elif on_zero == ON_ZERO_RAISE:
+            raise ZeroDivisionError('division by zero')
+        else:
+            # Nule se menjaju jedinicom, rezultat se posle prepisuje
+            y = np.where(y == 0, 1, y)
+
+    if places is None:
+        result = op(x, y)
+        fill = np.nan if on_zero == ON_ZERO_NAN else 0
+    else:
+        units = _fixed_op(op, x, x_scale, y, y_scale, places)
+        result = _from_fixed(units, places)
+        fill = Decimal('NaN') if on_zero == ON_ZERO_NAN else _from_fixed(
+            np.asarray(0),
+            places,
+        )
+    if zero is not None:
+        result = np.where(zero, fill, result)
+        if not result.ndim:
+            result = result[()]
+
+    return result
+
+
+def _as_array(values):
+    # np.asarray ispituje svaki Decimal kao moguci niz, fromiter ne
+    if isinstance(values, (list, tuple)) and values \
+            and isinstance(values[0], Decimal):
+        return np.fromiter(values, dtype=object, count=len(values))
+
+    return np.asarray(values)
+
+
+def _as_numbers(values):
+    values = _as_array(values)
+    if values.dtype == object:
+        # Decimali i mesani tipovi, bez places se racuna u float
+        values = values.astype(float)
+
+    return values
+
+
+def _to_fixed(values):
+    """Return (units, scale) with values == units / 10 ** scale exactly."""
+    values = _as_array(values)
+    if values.dtype.kind in 'iub':
+        return values.astype(np.int64), 0
+    if values.dtype.kind == 'f':
+        return _float_to_fixed(values)
+
+    # Brzi put: skala iz float vrednosti, pa tacna provera nad Decimalima
+    try:
+        floats = values.astype(float)
+        units, scale = _float_units(floats)
+        with localcontext(_EXACT):
+            exact = (values * Decimal(10) ** scale == units).all()
+    except (TypeError, ValueError, OverflowError):
+        exact = False
+    if exact:
+        return units, scale
+
+    return _decimals_to_fixed(_to_decimal(values))
+
+
+def _float_units(values):
+    """Return int64 units and scale of finite floats that fit in int64."""
+    if not np.isfinite(values).all():
+        raise ValueError('Cannot use NaN or infinity in fixed point')
+    for scale in range(FLOAT_PLACES + 1):
+        units = np.round(values * 10 ** scale)
+        if (units / 10 ** scale == values).all():
+            break
+    if np.max(np.abs(units), initial=0) >= _INT64_BOUND:
+        raise OverflowError('Too large for int64 fixed point')
+
+    return units.astype(np.int64), scale
+
+
+def _float_to_fixed(values):
+    try:
+        return _float_units(values)
+    except OverflowError:
+        decimals = np.frompyfunc(_float_to_decimal, 1, 1)(values)
+        return _decimals_to_fixed(np.asarray(decimals, dtype=object))
+
+
+def _decimals_to_fixed(decimals):
+    exponents = np.frompyfunc(_exponent, 1, 1)(decimals)
+    scale = max(0, -int(np.min(exponents))) if decimals.size else 0
+    units = np.frompyfunc(lambda value: _units(value, scale), 1, 1)(decimals)
+
+    return _narrow(np.asarray(units, dtype=object)), scale
+
+
+def _float_to_decimal(value):
+    return Decimal(repr(float(value)))
+
+
+def _to_decimal(values):
+    def convert(value):
+        if isinstance(value, (float, np.floating)):
+            value = _float_to_decimal(value)
+        value = Decimal(value)
+        if not value.is_finite():
+            raise ValueError('Cannot use NaN or infinity in fixed point')
+        return value
+
+    return np.asarray(np.frompyfunc(convert, 1, 1)(values), dtype=object)
+
+
+def _exponent(value):
+    return value.as_tuple().exponent
+
+
+def _units(value, scale):
+    # Bez scaleb i mnozenja, oni zaokruzuju na preciznost konteksta
+    sign, digits, exponent = value.as_tuple()
+    units = int(Decimal((sign, digits, 0))) * 10 ** (exponent + scale)
+
+    return units
+
+
+def _narrow(units):
+    """Return object units as int64 when they all fit."""
+    if not units.size or np.max(np.abs(units)) < _INT64_BOUND:
+        return units.astype(np.int64)
+
+    return units
+
+
+def _widen(units, bound):
+    """Return units as Python ints when bound would overflow int64."""
+    if bound >= _INT64_BOUND and units.dtype != object:
+        return units.astype(object)
+
+    return units
+
+
+def _max(units):
+    return int(np.max(np.abs(units), initial=0))
+
+
+def _fixed_op(op, xu, xs, yu, ys, places):
+    """Return op of xu / 10 ** xs and yu / 10 ** ys in 10 ** -places."""
+    shape = np.broadcast(xu, yu).shape
+    # 0-d nizovi bi se u racunu pretvorili u skalare i izgubili dtype
+    xu, yu = np.atleast_1d(xu), np.atleast_1d(yu)
+    return _fixed_units(op, xu, xs, yu, ys, places).reshape(shape)
+
+
+def _fixed_units(op, xu, xs, yu, ys, places):
+    big_x, big_y = _max(xu), _max(yu)
+    if op in (add, sub):
+        scale = max(xs, ys)
+        bound = (big_x * 10 ** (scale - xs) + big_y * 10 ** (scale - ys)) \
+            * 10 ** max(0, places - scale)
+        xu, yu = _widen(xu, bound), _widen(yu, bound)
+        units = op(xu * 10 ** (scale - xs), yu * 10 ** (scale - ys))
+        return _rescale(units, scale, places)
+
+    if op is mul:
+        bound = big_x * big_y * 10 ** max(0, places - xs - ys)
+        xu, yu = _widen(xu, bound), _widen(yu, bound)
+        return _rescale(xu * yu, xs + ys, places)
+
+    # x / y = xu * 10 ** ys / (yu * 10 ** xs)
+    numerator_scale = ys + (places if op is truediv else 0)
+    bound = max(big_x * 10 ** numerator_scale, big_y * 10 ** xs) \
+        * 10 ** places
+    xu, yu = _widen(xu, bound), _widen(yu, bound)
+    numerator = xu * 10 ** numerator_scale
+    denominator = yu * 10 ** xs
+    if op is div:
+        return (numerator // denominator) * 10 ** places
+
+    return _round_div(numerator, denominator)
+
+
+def _rescale(units, scale, places):
+    if places >= scale:
+        return units * 10 ** (places - scale)
+
+    return _round_div(units, 10 ** (scale - places))
+
+
+def _round_div(numerator, denominator):
+    """Return numerator / denominator rounded half to even."""
+    if isinstance(denominator, np.ndarray):
+        sign = np.where(denominator < 0, -1, 1)
+        numerator, denominator = numerator * sign, denominator * sign
+    elif denominator >= _INT64_BOUND:
+        numerator = numerator.astype(object)
+    quotient = numerator // denominator
+    twice = 2 * (numerator - quotient * denominator)
+    up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+
+    return np.where(up, quotient + 1, quotient)
+
+
+def _from_fixed(units, places):
+    with localcontext(_EXACT):
+        return np.asarray(units).astype(object) * Decimal(f'1e-{places}')
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,18 +48,62 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'user',
     'recipe',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ApiSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ApiCsrfViewMiddleware',
+    'core.middleware.ApiAuthenticationMiddleware',
+    'core.middleware.ApiMessageMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Share of requests timed by core.middleware.PerformanceMiddleware
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0))
+
+# Queries at least this slow are logged and stored (0 turns it off); a
+# share of them is EXPLAINed
+SLOW_QUERY_THRESHOLD_MS = float(
+    os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200)
+)
+SLOW_QUERY_EXPLAIN_RATE = float(
+    os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.2)
+)
+SLOW_QUERY_LOG_FILE = os.environ.get(
+    'SLOW_QUERY_LOG_FILE',
+    os.path.join(tempfile.gettempdir(), 'slow_queries.log'),
+)
+
+# Request profiling (core.profiling): share of requests sampled, emails
+# of users whose every request is profiled, default mode and where the
+# profiles are written
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_USERS = [
+    email.strip().lower()
+    for email in os.environ.get('PROFILE_USERS', '').split(',')
+    if email.strip()
+]
+PROFILE_MODE = os.environ.get('PROFILE_MODE', 'sample')
+PROFILE_SAMPLE_INTERVAL = float(
+    os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005)
+)
+PROFILE_ROOT = os.environ.get(
+    'PROFILE_ROOT',
+    os.path.join(tempfile.gettempdir(), 'profiles'),
+)
+
+# Token authenticated routes that skip the session, CSRF, auth and
+# message middleware (see core.middleware.SkipForApiMixin)
+SLIM_MIDDLEWARE_PATHS = ('/api/recipe/', '/api/user/', '/api/job/')
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -78,22 +123,147 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'app.wsgi.application'
+ASGI_APPLICATION = 'app.asgi.application'
+
+# 'wsgi' (uwsgi) or 'asgi' (uvicorn), see scripts/run.sh
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+# Serve the recipe list, detail and upload views through async wrappers
+ASYNC_VIEWS = bool(int(os.environ.get(
+    'ASYNC_VIEWS',
+    SERVER_MODE == 'asgi',
+)))
+# Threads per process that run sync views under ASGI
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 8))
 
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps connections open across requests (seconds, 0 closes
+# them after every request), DB_CONN_HEALTH_CHECKS checks a kept connection
+# before reusing it. Set DB_POOLED=1 when DB_HOST points at a transaction
+# pooler such as PgBouncer (see the 'pooling' docker-compose profile).
+
+DB_POOLED = bool(int(os.environ.get('DB_POOLED', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))
+        ),
+        # Transaction pooling can't keep named cursors across statements
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLED,
+    }
+}
+
+# Read replicas: DB_REPLICA_HOSTS=host[:port],... adds 'replica_1', ...
+# aliases with the primary's credentials. Reads of safe requests go to a
+# healthy replica (see core.db_router); a client that just wrote is pinned
+# to the primary for DB_REPLICA_PIN_SECONDS.
+
+for index, replica in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+    start=1,
+):
+    replica_host, _, replica_port = replica.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        # Replika koja ne odgovara ne sme dugo da blokira zahtev
+        'OPTIONS': {'connect_timeout': 2},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Shared between workers in docker-compose (memcached); local memory when
+# CACHE_BACKEND is not set.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'core.cache.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
 
+# /metrics: optional bearer token, and how long the queued job counts
+# are reused between scrapes
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_QUEUE_CACHE_SECONDS = float(
+    os.environ.get('METRICS_QUEUE_CACHE_SECONDS', 5)
+)
+
+# Readiness probe (/readyz) results are reused for this many seconds
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 1))
+
+
+# Responses to requests with an Idempotency-Key header are replayed to
+# retries for this many seconds (see core.idempotency)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+# Most changes returned by one /api/recipe/sync/ page
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
+
+# /api/recipe/stats/ results are cached per user version for this many
+# seconds, a change to the user's data gives a new key anyway
+STATS_CACHE_SECONDS = int(os.environ.get('STATS_CACHE_SECONDS', 3600))
+
+# /api/recipe/shopping-list/: most recipes in one list, most servings
+# to scale to, and how long a list is cached (keyed by the user version
+# like the stats)
+SHOPPING_LIST_MAX_RECIPES = int(
+    os.environ.get('SHOPPING_LIST_MAX_RECIPES', 100)
+)
+SHOPPING_LIST_MAX_SERVINGS = int(
+    os.environ.get('SHOPPING_LIST_MAX_SERVINGS', 32767)
+)
+SHOPPING_LIST_CACHE_SECONDS = int(
+    os.environ.get('SHOPPING_LIST_CACHE_SECONDS', 3600)
+)
+
+# /api/recipe/changes/ event stream (see recipe.feed). The LISTEN
+# connection needs the database server itself, set EVENTS_DB_HOST and
+# EVENTS_DB_PORT when DB_HOST is a transaction pooler.
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 300))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+# Streams a process may hold under WSGI, where each one takes a worker
+# for up to SSE_MAX_SECONDS; the rest get 503, serve them with ASGI
+SSE_WSGI_STREAMS = int(os.environ.get('SSE_WSGI_STREAMS', 0))
+EVENTS_DB_HOST = os.environ.get('EVENTS_DB_HOST', '')
+EVENTS_DB_PORT = os.environ.get('EVENTS_DB_PORT', '')
+
+
+# Password hashes running at once in all workers sharing the cache, how
+# long a request waits for a free slot before it gets 429 and when the
+# slot of a worker killed mid-hash expires (see user.hashing)
+PASSWORD_HASHING_CONCURRENCY = int(
+    os.environ.get('PASSWORD_HASHING_CONCURRENCY', 2)
+)
+PASSWORD_HASHING_WAIT = float(os.environ.get('PASSWORD_HASHING_WAIT', 0.5))
+PASSWORD_HASHING_SLOT_SECONDS = int(
+    os.environ.get('PASSWORD_HASHING_SLOT_SECONDS', 10)
+)
+PASSWORD_HASHING_RETRY_AFTER = 1
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -145,8 +315,73 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+        'core.renderers.CBORRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'core.parsers.MessagePackParser',
+        'core.parsers.CBORParser',
+    ],
+    # Login and signup, see user.throttles
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('THROTTLE_LOGIN_IP', '30/min'),
+        'login_email': os.environ.get('THROTTLE_LOGIN_EMAIL', '10/min'),
+        'signup_ip': os.environ.get('THROTTLE_SIGNUP_IP', '20/hour'),
+        'signup_email': os.environ.get('THROTTLE_SIGNUP_EMAIL', '5/hour'),
+    },
+    # REMOTE_ADDR is set by the proxy, X-Forwarded-For is client supplied
+    'NUM_PROXIES': 0,
+    'TEST_REQUEST_RENDERER_CLASSES': [
+        'rest_framework.renderers.MultiPartRenderer',
+        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'core.renderers.CBORRenderer',
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+        'timestamped': {'format': '%(asctime)s %(message)s'},
+    },
+    'handlers': {
+        'perf': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'timestamped',
+        },
+    },
+    'loggers': {
+        # Jedna JSON linija po uzorkovanom zahtevu
+        'core.perf': {
+            'handlers': ['perf'],
+            'level': os.environ.get('PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
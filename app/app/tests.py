@@ -1,4 +1,9 @@
+import array
+from decimal import Decimal
+
+import numpy as np
 from django.test import SimpleTestCase
+
 from app import calc
 
 
@@ -22,3 +27,52 @@ class CalcTests(SimpleTestCase):
     def test_truediv(self):
         res = calc.truediv(9, 2)
         self.assertEqual(res, 4.5)
+
+    def test_batch_broadcasts(self):
+        res = calc.batch_add(array.array('d', [1.5, 2.5]), [[1], [2]])
+        np.testing.assert_array_equal(res, [[2.5, 3.5], [3.5, 4.5]])
+
+    def test_batch_keeps_integers(self):
+        res = calc.batch_div(np.arange(5), 2)
+        self.assertEqual(res.tolist(), [0, 0, 1, 1, 2])
+
+    def test_batch_fixed_point(self):
+        prices = [Decimal('5.25'), Decimal('10.00'), Decimal('0.05')]
+
+        res = calc.batch_mul(prices, Decimal('1.075'), places=2)
+
+        expected = [
+            (price * Decimal('1.075')).quantize(Decimal('0.01'))
+            for price in prices
+        ]
+        self.assertEqual(list(res), expected)
+        self.assertEqual(res[0].as_tuple().exponent, -2)
+
+    def test_batch_fixed_point_from_floats(self):
+        res = calc.batch_add([0.1, 0.2], 0.2, places=2)
+        self.assertEqual(list(res), [Decimal('0.30'), Decimal('0.40')])
+
+    def test_batch_fixed_point_rounds_half_to_even(self):
+        res = calc.batch_truediv([1, 3, -1], 8, places=2)
+        self.assertEqual(
+            list(res),
+            [Decimal('0.12'), Decimal('0.38'), Decimal('-0.12')],
+        )
+
+    def test_batch_fixed_point_large_values(self):
+        res = calc.batch_mul(Decimal('123456789.12'), 98765432.1, places=2)
+        self.assertEqual(res, Decimal('12193263123115378.75'))
+
+    def test_batch_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            calc.batch_truediv([1, 2], [1, 0])
+
+        res = calc.batch_truediv([1, 2], [2, 0], on_zero=calc.ON_ZERO_NAN)
+        np.testing.assert_array_equal(res, [0.5, np.nan])
+        res = calc.batch_div(
+            [Decimal('7'), Decimal('1')],
+            [2, 0],
+            places=2,
+            on_zero=calc.ON_ZERO_ZERO,
+        )
+        self.assertEqual(list(res), [Decimal('3.00'), Decimal('0.00')])
@@ -0,0 +1,33 @@
+"""
+Benchmarks for the recipe API.
+
+Run from the app directory, e.g. `python -m benchmarks.bench_renderers`.
+"""
+import os
+import statistics
+import timeit
+
+
+def setup_django():
+    """Configure Django for a standalone benchmark script."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+    import django
+    django.setup()
+
+
+def measure(func, repeat=5, number=10):
+    """Return the median seconds per call of `func`."""
+    timings = timeit.repeat(func, repeat=repeat, number=number)
+    return statistics.median(timings) / number
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Return {'p50': ..., ...} in milliseconds for samples in seconds."""
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, round(point / 100 * (len(ordered) - 1)))
+        result[f'p{point}'] = round(ordered[index] * 1000, 3)
+
+    return result
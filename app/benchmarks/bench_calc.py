@@ -0,0 +1,106 @@
+"""
+Compare scaling recipe prices with a loop over app.calc's scalar
+functions against one batch_* call, in float and in Decimal fixed point.
+
+decimal_batch takes and returns Decimal objects, and boxing them costs
+more than the loop's own arithmetic; fixed_batch reads the prices from a float
+buffer (as values_list(Cast('price', FloatField())) gives them) and only
+boxes the results.
+
+Usage: python -m benchmarks.bench_calc [--rows 1000 10000 100000]
+"""
+import argparse
+import array
+import json
+import random
+from decimal import Decimal
+
+from benchmarks import measure
+
+from app import calc
+
+
+CENT = Decimal('0.01')
+FACTOR = Decimal('1.075')
+
+
+def prices(count):
+    """Return count prices like Recipe.price, as Decimals."""
+    rng = random.Random(count)
+    return [Decimal(rng.randrange(1, 100000)) / 100 for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[1000, 10000, 100000],
+    )
+    args = parser.parse_args()
+
+    results = []
+    for count in args.rows:
+        decimals = prices(count)
+        floats = array.array('d', map(float, decimals))
+        factor = float(FACTOR)
+
+        def decimal_loop():
+            return [
+                calc.mul(price, FACTOR).quantize(CENT)
+                for price in decimals
+            ]
+
+        def decimal_batch():
+            return calc.batch_mul(decimals, FACTOR, places=2)
+
+        def fixed_batch():
+            return calc.batch_mul(floats, FACTOR, places=2)
+
+        def float_loop():
+            return [calc.mul(price, factor) for price in floats]
+
+        def float_batch():
+            return calc.batch_mul(floats, factor)
+
+        expected = decimal_loop()
+        assert list(decimal_batch()) == expected, 'Decimal results differ'
+        assert list(fixed_batch()) == expected, 'Fixed results differ'
+        assert list(float_batch()) == float_loop(), 'Float results differ'
+
+        timings = {
+            name: measure(func, repeat=5, number=3)
+            for name, func in [
+                ('decimal_loop', decimal_loop),
+                ('decimal_batch', decimal_batch),
+                ('fixed_batch', fixed_batch),
+                ('float_loop', float_loop),
+                ('float_batch', float_batch),
+            ]
+        }
+        results.append({
+            'rows': count,
+            **{
+                f'{name}_ms': round(seconds * 1000, 3)
+                for name, seconds in timings.items()
+            },
+            'decimal_speedup': round(
+                timings['decimal_loop'] / timings['decimal_batch'],
+                1,
+            ),
+            'fixed_speedup': round(
+                timings['decimal_loop'] / timings['fixed_batch'],
+                1,
+            ),
+            'float_speedup': round(
+                timings['float_loop'] / timings['float_batch'],
+                1,
+            ),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure per-request database latency with and without persistent
+connections. Needs a reachable database (DB_HOST, DB_PORT, ...); point
+DB_HOST/DB_PORT at PgBouncer to measure the pooled setup.
+
+Usage: python -m benchmarks.bench_connections [--requests 500]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import (
+    setup_django,
+    percentiles,
+)
+
+
+def simulate(connection, requests, persistent, health_checks):
+    """Time `requests` simulated requests that each run one query."""
+    connection.health_check_enabled = health_checks
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        # Isto sto rade request_started/request_finished signali
+        if persistent:
+            connection.close_if_unusable_or_obsolete()
+        else:
+            connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from core.backends.postgresql.base import stats
+
+    modes = [
+        ('connect_per_request', False, False),
+        ('persistent', True, False),
+        ('persistent_health_checks', True, True),
+    ]
+    results = []
+    for name, persistent, health_checks in modes:
+        samples = simulate(
+            connection,
+            args.requests,
+            persistent,
+            health_checks,
+        )
+        results.append({
+            'mode': name,
+            'host': connection.settings_dict['HOST'],
+            'requests': args.requests,
+            **percentiles(samples),
+        })
+
+    print(json.dumps(
+        {'results': results, 'stats': stats.as_dict()},
+        indent=2,
+    ))
+
+
+if __name__ == '__main__':
+    main()
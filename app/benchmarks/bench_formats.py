@@ -0,0 +1,55 @@
+"""
+Compare payload size and encode time of the response formats.
+
+Usage: python -m benchmarks.bench_formats [--rows 1000 10000]
+"""
+import argparse
+import gzip
+import json
+
+from benchmarks import (
+    setup_django,
+    measure,
+)
+from benchmarks.bench_renderers import recipe_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import (
+        ORJSONRenderer,
+        MessagePackRenderer,
+        CBORRenderer,
+    )
+
+    renderers = {
+        'json': JSONRenderer(),
+        'orjson': ORJSONRenderer(),
+        'msgpack': MessagePackRenderer(),
+        'cbor': CBORRenderer(),
+    }
+
+    results = []
+    for count in args.rows:
+        data = recipe_rows(count)
+        for name, renderer in renderers.items():
+            body = renderer.render(data)
+            seconds = measure(lambda: renderer.render(data))
+            results.append({
+                'rows': count,
+                'format': name,
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body)),
+                'encode_ms': round(seconds * 1000, 3),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
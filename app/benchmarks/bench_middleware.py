@@ -0,0 +1,90 @@
+"""
+Measure per-request middleware overhead of the full browser stack and
+the path aware one, for an API route and an admin route.
+
+Usage: python -m benchmarks.bench_middleware [--number 2000]
+"""
+import argparse
+import json
+from wsgiref.util import setup_testing_defaults
+
+from django.http import HttpResponse
+from django.urls import path
+
+from benchmarks import (
+    setup_django,
+    measure,
+)
+
+
+FULL_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+def ping(request):
+    return HttpResponse('ok')
+
+
+# Ovaj modul je ROOT_URLCONF tokom merenja
+urlpatterns = [
+    path('api/recipe/ping/', ping),
+    path('admin/ping/', ping),
+]
+
+
+def request_func(handler, url):
+    """Return a callable that sends one GET for url through handler."""
+    def start_response(status, headers):
+        pass
+
+    def send():
+        environ = {'PATH_INFO': url}
+        setup_testing_defaults(environ)
+        b''.join(handler(environ, start_response))
+
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import override_settings
+
+    stacks = [
+        ('full', FULL_MIDDLEWARE),
+        ('path_aware', settings.MIDDLEWARE),
+    ]
+    results = []
+    for url in ('/api/recipe/ping/', '/admin/ping/'):
+        for name, middleware in stacks:
+            with override_settings(
+                MIDDLEWARE=middleware,
+                ROOT_URLCONF=__name__,
+                ALLOWED_HOSTS=['*'],
+            ):
+                send = request_func(WSGIHandler(), url)
+                seconds = measure(send, number=args.number)
+            results.append({
+                'url': url,
+                'middleware': name,
+                'us_per_request': round(seconds * 1e6, 2),
+            })
+
+    print(json.dumps({'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
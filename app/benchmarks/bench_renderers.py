@@ -0,0 +1,80 @@
+"""
+Compare DRF's JSONRenderer with ORJSONRenderer on large recipe lists.
+
+Usage: python -m benchmarks.bench_renderers [--rows 100 1000 10000]
+"""
+import argparse
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from benchmarks import (
+    setup_django,
+    measure,
+)
+
+
+def recipe_rows(count):
+    """Build a list shaped like RecipeSerializer(many=True).data."""
+    from rest_framework.utils.serializer_helpers import ReturnList
+
+    def nested(prefix, recipe_id, size):
+        return [
+            OrderedDict([
+                ('id', recipe_id * 10 + i),
+                ('name', f'{prefix} {i}'),
+            ])
+            for i in range(size)
+        ]
+
+    rows = [
+        OrderedDict([
+            ('id', i),
+            ('title', f'Sample recipe title {i}'),
+            ('time_minutes', 5 + i % 120),
+            ('price', str(Decimal(i % 10000) / 100)),
+            ('link', f'https://www.example.com/recipe-{i}.pdf'),
+            ('tags', nested('Tag', i, 3)),
+            ('ingredients', nested('Ingredient', i, 8)),
+        ])
+        for i in range(count)
+    ]
+    return ReturnList(rows, serializer=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[100, 1000, 10000],
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import ORJSONRenderer
+
+    results = []
+    for count in args.rows:
+        data = recipe_rows(count)
+        stdlib_body = JSONRenderer().render(data)
+        orjson_body = ORJSONRenderer().render(data)
+        assert stdlib_body == orjson_body, 'Renderers disagree'
+
+        stdlib = measure(lambda: JSONRenderer().render(data))
+        fast = measure(lambda: ORJSONRenderer().render(data))
+        results.append({
+            'rows': count,
+            'bytes': len(stdlib_body),
+            'json_ms': round(stdlib * 1000, 3),
+            'orjson_ms': round(fast * 1000, 3),
+            'speedup': round(stdlib / fast, 1),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Compare API throughput while slow clients upload images.
+
+Start the app in the mode under test and point --url at it, e.g.
+
+    uwsgi --http :9000 --workers 4 --master --module app.wsgi
+    SERVER_MODE=asgi uvicorn app.asgi:application --port 9000 --workers 4
+
+Slow clients trickle a multipart image upload over --trickle seconds
+while fast clients fetch the recipe list. A benchmark user, token and
+recipe are created in the configured database.
+
+Usage: python -m benchmarks.bench_slow_clients [--url URL] [--duration 10]
+"""
+import argparse
+import http.client
+import io
+import json
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from benchmarks import (
+    setup_django,
+    percentiles,
+)
+
+
+def prepare():
+    """Return (token, recipe id) for the benchmark user."""
+    setup_django()
+    from decimal import Decimal
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+    from core.models import Recipe
+
+    user = get_user_model().objects.filter(email='bench@example.com').first()
+    if user is None:
+        user = get_user_model().objects.create_user(
+            email='bench@example.com',
+            password='bench-password',
+        )
+    token, _ = Token.objects.get_or_create(user=user)
+    recipe, _ = Recipe.objects.get_or_create(
+        user=user,
+        title='Benchmark recipe',
+        defaults={'time_minutes': 10, 'price': Decimal('5.00')},
+    )
+
+    return token.key, recipe.id
+
+
+def image_body():
+    """Return (content type, body) of a multipart upload with a JPEG."""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (200, 200)).save(buffer, format='JPEG')
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="image"; '
+        'filename="bench.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + buffer.getvalue() + f'\r\n--{boundary}--\r\n'.encode()
+
+    return f'multipart/form-data; boundary={boundary}', body
+
+
+def slow_client(url, token, recipe_id, trickle, stop, counters):
+    """Upload an image in small chunks spread over `trickle` seconds."""
+    content_type, body = image_body()
+    chunks = 20
+    size = len(body) // chunks + 1
+    while not stop.is_set():
+        try:
+            sock = socket.create_connection((url.hostname, url.port))
+            sock.sendall((
+                f'POST /api/recipe/recipes/{recipe_id}/upload_image/ '
+                'HTTP/1.1\r\n'
+                f'Host: {url.hostname}\r\n'
+                f'Authorization: Token {token}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n\r\n'
+            ).encode())
+            for start in range(0, len(body), size):
+                sock.sendall(body[start:start + size])
+                time.sleep(trickle / chunks)
+            status_line = sock.recv(65536).split(b'\r\n', 1)[0]
+            sock.close()
+            if b' 200 ' in status_line:
+                counters['uploads'] += 1
+            else:
+                counters['upload_errors'] += 1
+        except OSError:
+            counters['upload_errors'] += 1
+
+
+def fast_client(url, token, stop, samples, counters):
+    """Fetch the recipe list as fast as the server allows."""
+    while not stop.is_set():
+        connection = http.client.HTTPConnection(
+            url.hostname,
+            url.port,
+            timeout=30,
+        )
+        start = time.perf_counter()
+        try:
+            connection.request(
+                'GET',
+                '/api/recipe/recipes/',
+                headers={'Authorization': f'Token {token}'},
+            )
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                samples.append(time.perf_counter() - start)
+            else:
+                counters['errors'] += 1
+        except OSError:
+            counters['errors'] += 1
+        finally:
+            connection.close()
+
+
+def run(url, token, recipe_id, slow, fast, duration, trickle):
+    stop = threading.Event()
+    samples = []
+    counters = {'uploads': 0, 'upload_errors': 0, 'errors': 0}
+    threads = [
+        threading.Thread(
+            target=slow_client,
+            args=(url, token, recipe_id, trickle, stop, counters),
+        )
+        for _ in range(slow)
+    ]
+    threads += [
+        threading.Thread(
+            target=fast_client,
+            args=(url, token, stop, samples, counters),
+        )
+        for _ in range(fast)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'slow_clients': slow,
+        'fast_clients': fast,
+        'requests': len(samples),
+        'requests_per_second': round(len(samples) / duration, 1),
+        **(percentiles(samples) if samples else {}),
+        **counters,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:9000')
+    parser.add_argument('--slow-clients', type=int, default=16)
+    parser.add_argument('--fast-clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--trickle', type=float, default=5)
+    args = parser.parse_args()
+
+    token, recipe_id = prepare()
+    url = urlsplit(args.url)
+    results = [
+        run(url, token, recipe_id, 0, args.fast_clients, args.duration, 0),
+        run(
+            url,
+            token,
+            recipe_id,
+            args.slow_clients,
+            args.fast_clients,
+            args.duration,
+            args.trickle,
+        ),
+    ]
+
+    print(json.dumps({'url': args.url, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Scripted HTTP workloads against a running stack, e.g. the local
+docker-compose one after
+
+    docker-compose run --rm app sh -c "python manage.py seed_data"
+
+Every workload runs for --duration seconds with --concurrency clients
+using the seeded users. The report (JSON) has throughput, p50/p95/p99
+latency and query counts per workload; query counts are read from the
+Server-Timing header, so the app needs PERF_SAMPLE_RATE=1 for them (the
+dev compose file sets it). Pass --output to keep the report for later
+comparison.
+
+Usage: python -m benchmarks.loadtest [--url URL] [--workloads list detail]
+"""
+import argparse
+import datetime
+import http.client
+import json
+import random
+import re
+import statistics
+import subprocess
+import threading
+import time
+from urllib.parse import (
+    urlencode,
+    urlsplit,
+)
+
+from benchmarks import percentiles
+from benchmarks.bench_slow_clients import image_body
+
+
+RECIPES_PATH = '/api/recipe/recipes/'
+QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class Client:
+    """HTTP client for one seeded user."""
+
+    def __init__(self, url, token=None):
+        self.url = url
+        self.token = token
+        self.recipes = []
+        self.tags = []
+
+    def request(self, method, path, body=None, content_type=None):
+        """Return (status, seconds, query count or None, parsed body)."""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        connection = http.client.HTTPConnection(
+            self.url.hostname,
+            self.url.port or 80,
+            timeout=60,
+        )
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        finally:
+            connection.close()
+        seconds = time.perf_counter() - start
+
+        match = QUERIES_RE.search(response.getheader('Server-Timing') or '')
+        queries = int(match.group(1)) if match else None
+        data = None
+        if content and 'json' in (response.getheader('Content-Type') or ''):
+            data = json.loads(content)
+
+        return response.status, seconds, queries, data
+
+
+def login(url, email, password):
+    """Return a Client for the seeded user, with its recipes and tags."""
+    client = Client(url)
+    status, _, _, data = client.request(
+        'POST',
+        '/api/user/token/',
+        {'email': email, 'password': password},
+    )
+    if status != 200:
+        raise SystemExit(f'Login as {email} failed with {status}: {data}')
+
+    client.token = data['token']
+    _, _, _, client.recipes = client.request(
+        'GET',
+        f'{RECIPES_PATH}?fields=id,title',
+    )
+    _, _, _, client.tags = client.request('GET', '/api/recipe/tags/')
+
+    return client
+
+
+def recipe_path(recipe, suffix=''):
+    return f'{RECIPES_PATH}{recipe["id"]}/{suffix}'
+
+
+# Svaki workload vraca (method, path, body, content type)
+def workload_list(client, rng):
+    return 'GET', RECIPES_PATH, None, None
+
+
+def workload_filter(client, rng):
+    tags = rng.sample(client.tags, min(len(client.tags), 2))
+    query = urlencode({'tags': ','.join(str(tag['id']) for tag in tags)})
+    return 'GET', f'{RECIPES_PATH}?{query}', None, None
+
+
+def workload_detail(client, rng):
+    return 'GET', recipe_path(rng.choice(client.recipes)), None, None
+
+
+def workload_create(client, rng):
+    tags = rng.sample(client.tags, min(len(client.tags), 2))
+    body = {
+        'title': 'Load test recipe',
+        'time_minutes': rng.randint(5, 120),
+        'price': f'{rng.randint(100, 9999) / 100:.2f}',
+        'tags': [{'name': tag['name']} for tag in tags],
+        'ingredients': [{'name': 'Salt'}, {'name': 'Pepper'}],
+    }
+    return 'POST', RECIPES_PATH, body, None
+
+
+def workload_update(client, rng):
+    recipe = rng.choice(client.recipes)
+    # Isti naslov, pa ponovljena merenja rade nad istim podacima
+    return 'PATCH', recipe_path(recipe), {'title': recipe['title']}, None
+
+
+def workload_upload(client, rng):
+    content_type, body = image_body()
+    recipe = rng.choice(client.recipes)
+    return 'POST', recipe_path(recipe, 'upload_image/'), body, content_type
+
+
+WORKLOADS = {
+    'list': workload_list,
+    'filter': workload_filter,
+    'detail': workload_detail,
+    'create': workload_create,
+    'update': workload_update,
+    'upload': workload_upload,
+}
+
+
+def run_workload(name, clients, concurrency, duration, seed):
+    stop = threading.Event()
+    samples = []
+    queries = []
+    created = []
+    errors = []
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = clients[index % len(clients)]
+        while not stop.is_set():
+            method, path, body, content_type = WORKLOADS[name](client, rng)
+            try:
+                status, seconds, count, data = client.request(
+                    method,
+                    path,
+                    body,
+                    content_type,
+                )
+            except OSError:
+                errors.append(None)
+                continue
+            if status >= 400:
+                errors.append(status)
+                continue
+            samples.append(seconds)
+            if count is not None:
+                queries.append(count)
+            if name == 'create':
+                created.append((client, data))
+
+    threads = [
+        threading.Thread(target=worker, args=(index,))
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    # Brisemo recepte koje je create napravio, da podaci ostanu isti
+    for client, recipe in created:
+        client.request('DELETE', recipe_path(recipe))
+
+    result = {
+        'workload': name,
+        'requests': len(samples),
+        'errors': len(errors),
+        'throughput_rps': round(len(samples) / duration, 1),
+    }
+    if samples:
+        result.update(percentiles(samples))
+    if queries:
+        result['queries'] = {
+            'mean': round(statistics.mean(queries), 2),
+            'max': max(queries),
+        }
+
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument(
+        '--workloads',
+        nargs='+',
+        choices=list(WORKLOADS),
+        default=list(WORKLOADS),
+    )
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--users',
+        type=int,
+        default=4,
+        help='Seeded users to log in as (logins are throttled).',
+    )
+    parser.add_argument('--email-prefix', default='seed')
+    parser.add_argument('--password', default='seed-password')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Also write the report here.')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    clients = [
+        login(url, f'{args.email_prefix}{i}@example.com', args.password)
+        for i in range(args.users)
+    ]
+    report = {
+        'meta': {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'url': args.url,
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'users': args.users,
+            'seed': args.seed,
+        },
+        'results': [
+            run_workload(
+                name,
+                clients,
+                args.concurrency,
+                args.duration,
+                args.seed,
+            )
+            for name in args.workloads
+        ],
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Micro-benchmarks for the recipe API hot paths: serializers, query
+parameter parsing and queryset construction, nested tag writes and JSON
+rendering of large pages.
+
+Runs against a throwaway test database filled by seed_data. Each run is
+stored as .benchmarks/<commit>.json (or --output); --compare takes a
+commit or a file and exits with status 1 when a case got slower than
+--threshold (relative, on the fastest of the repeats).
+
+Usage: python -m benchmarks.micro [--cases serialize_list ...]
+       python -m benchmarks.micro --compare abc1234 [--threshold 0.2]
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+from benchmarks import setup_django
+
+
+RESULTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    '.benchmarks',
+)
+CASES = {}
+
+
+def case(func):
+    """Register func(context) returning the callable to measure."""
+    CASES[func.__name__] = func
+    return func
+
+
+class Context:
+    """Seeded data and a fake request shared by the cases."""
+
+    def __init__(self, recipes):
+        from io import StringIO
+
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.request import Request
+
+        from core.models import Recipe
+
+        call_command(
+            'seed_data',
+            users=1,
+            recipes_per_user=recipes,
+            tags=20,
+            ingredients=60,
+            stdout=StringIO(),
+        )
+        self.user = get_user_model().objects.get(email='seed0@example.com')
+        self.recipes = list(
+            Recipe.objects.filter(user=self.user)
+            .prefetch_related('tags', 'ingredients')
+            .order_by('-id')
+        )
+        self.request = Request(APIRequestFactory().get('/api/recipe/'))
+        self.request.user = self.user
+
+    def viewset(self, action, **params):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from recipe.views import RecipeViewSet
+
+        request = Request(
+            APIRequestFactory().get('/api/recipe/recipes/', params),
+        )
+        request.user = self.user
+        view = RecipeViewSet(action=action, request=request, format_kwarg=None)
+        return view
+
+    def payload(self):
+        return {
+            'title': 'Benchmark recipe',
+            'time_minutes': 30,
+            'price': '5.50',
+            'link': 'https://example.com/recipe.pdf',
+            'tags': [{'name': tag.name} for tag in self.recipes[0].tags.all()],
+            'ingredients': [
+                {'name': obj.name} for obj in self.recipes[0].ingredients.all()
+            ],
+        }
+
+
+@case
+def serialize_list(context):
+    from recipe.serializers import RecipeSerializer
+
+    return lambda: RecipeSerializer(context.recipes, many=True).data
+
+
+@case
+def serialize_detail(context):
+    from recipe.serializers import RecipeDetailSerializer
+
+    recipe = context.recipes[0]
+    return lambda: RecipeDetailSerializer(recipe).data
+
+
+@case
+def validate_detail(context):
+    from recipe.serializers import RecipeDetailSerializer
+
+    payload = context.payload()
+
+    def validate():
+        serializer = RecipeDetailSerializer(
+            data=payload,
+            context={'request': context.request},
+        )
+        assert serializer.is_valid(), serializer.errors
+
+    return validate
+
+
+@case
+def params_to_ints(context):
+    view = context.viewset('list')
+    params = ','.join(str(i) for i in range(100))
+    return lambda: view._params_to_ints(params)
+
+
+@case
+def build_queryset(context):
+    tags = ','.join(str(tag.id) for tag in context.recipes[0].tags.all())
+    view = context.viewset(
+        'list',
+        tags=tags or '1',
+        ingredients='1,2,3',
+        fields='id,title,tags',
+    )
+    # Samo gradimo i kompajliramo SQL, upit se ne izvrsava
+    return lambda: str(view.get_queryset().query)
+
+
+@case
+def get_or_create_tags(context):
+    from django.db import transaction
+
+    from recipe.serializers import RecipeSerializer
+
+    recipe = context.recipes[0]
+    existing = [{'name': tag.name} for tag in recipe.tags.all()]
+    tags = existing + [{'name': f'New tag {i}'} for i in range(3)]
+    serializer = RecipeSerializer(context={'request': context.request})
+
+    def write():
+        with transaction.atomic():
+            serializer._get_or_create_tags(tags, recipe)
+            transaction.set_rollback(True)
+
+    return write
+
+
+@case
+def render_json_page(context):
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    from benchmarks.bench_renderers import recipe_rows
+
+    renderer = import_string(
+        settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0],
+    )()
+    data = recipe_rows(1000)
+    return lambda: renderer.render(data)
+
+
+def run(names, recipes, repeat, number):
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+    )
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        context = Context(recipes)
+        results = {}
+        for name in names:
+            func = CASES[name](context)
+            func()
+            timings = [
+                total / number
+                for total in timeit.repeat(func, repeat=repeat, number=number)
+            ]
+            results[name] = {
+                'min_us': round(min(timings) * 1e6, 2),
+                'median_us': round(statistics.median(timings) * 1e6, 2),
+            }
+    finally:
+        teardown_databases(databases, verbosity=0)
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load(reference):
+    """Load a stored run by file path or commit."""
+    path = reference
+    if not os.path.exists(path):
+        path = os.path.join(RESULTS_DIR, f'{reference}.json')
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(baseline, results, threshold):
+    """Return (rows, regressed case names) for results vs baseline."""
+    rows = []
+    regressed = []
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        change = result['min_us'] / before['min_us'] - 1
+        rows.append({
+            'case': name,
+            'before_us': before['min_us'],
+            'after_us': result['min_us'],
+            'change': f'{change:+.1%}',
+        })
+        if change > threshold:
+            regressed.append(name)
+
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--cases',
+        nargs='+',
+        choices=list(CASES),
+        default=list(CASES),
+    )
+    parser.add_argument(
+        '--recipes',
+        type=int,
+        default=200,
+        help='Mean seeded recipes; serialize_list uses all of them.',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    parser.add_argument('--output', help='Defaults to .benchmarks/<commit>')
+    parser.add_argument('--compare', help='Commit or file to compare with.')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.2,
+        help='Allowed slowdown before failing, 0.2 is 20%%.',
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    commit = git_commit()
+    report = {
+        'meta': {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'commit': commit,
+            'python': sys.version.split()[0],
+            'recipes': args.recipes,
+            'repeat': args.repeat,
+            'number': args.number,
+        },
+        'results': run(args.cases, args.recipes, args.repeat, args.number),
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f'{commit or "latest"}.json')
+    with open(output, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+        results_file.write('\n')
+    print(json.dumps(report['results'], indent=2))
+
+    if args.compare:
+        rows, regressed = compare(
+            load(args.compare),
+            report['results'],
+            args.threshold,
+        )
+        print(json.dumps(rows, indent=2))
+        if regressed:
+            print(f'Regressed: {", ".join(regressed)}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
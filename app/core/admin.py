@@ -1,5 +1,14 @@
+import os
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import (
+    path,
+    reverse,
+)
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from core import models
@@ -39,7 +48,97 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class JobAdmin(admin.ModelAdmin):
+    ordering = ['-id']
+    list_display = ['id', 'name', 'status', 'attempts', 'run_at', 'user']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    ordering = ['-id']
+    list_display = ['created_at', 'duration_ms', 'view', 'path', 'user']
+    list_filter = ['view', 'database']
+    search_fields = ['sql', 'path']
+    readonly_fields = [
+        'created_at',
+        'duration_ms',
+        'database',
+        'sql',
+        'plan',
+        'method',
+        'path',
+        'view',
+        'user',
+    ]
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    ordering = ['-id']
+    list_display = [
+        'created_at',
+        'view',
+        'duration_ms',
+        'mode',
+        'trigger',
+        'user',
+        'download',
+    ]
+    list_filter = ['mode', 'trigger', 'view']
+    search_fields = ['path']
+    exclude = ['file']
+    readonly_fields = [
+        'created_at',
+        'method',
+        'path',
+        'view',
+        'status',
+        'mode',
+        'trigger',
+        'duration_ms',
+        'user',
+        'download',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:profile_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description='Profile')
+    def download(self, obj):
+        # Profili nisu pod MEDIA_URL, pa ih admin sam servira
+        url = reverse(
+            'admin:core_requestprofile_download',
+            args=(obj.id,),
+        )
+        return format_html(
+            '<a href="{}">{}</a>',
+            url,
+            os.path.basename(obj.file.name),
+        )
+
+    def download_view(self, request, profile_id):
+        profile = get_object_or_404(models.RequestProfile, id=profile_id)
+        return FileResponse(
+            profile.file.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(profile.file.name),
+        )
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Recipe)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
+admin.site.register(models.Job, JobAdmin)
+admin.site.register(models.SlowQuery, SlowQueryAdmin)
+admin.site.register(models.RequestProfile, RequestProfileAdmin)
@@ -0,0 +1,79 @@
+"""
+Async wrappers for synchronous (DRF) views, used when the app is served
+over ASGI.
+
+The ORM is synchronous, so the wrapped view still runs in a thread, but
+in a bounded pool of ASYNC_VIEW_THREADS workers instead of the single
+thread Django uses for sync views under ASGI. The event loop keeps
+reading request bodies and writing responses for slow clients while no
+worker thread is held, and each pool thread keeps at most one database
+connection per alias.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from core import (
+    perf,
+    profiling,
+)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process wide pool sync views are offloaded to."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_VIEW_THREADS,
+                    thread_name_prefix='sync-view',
+                )
+
+    return _executor
+
+
+async def run_sync(func, *args, **kwargs):
+    """Run func in the pool, with the caller's context variables."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def _call_view(view, request, *args, **kwargs):
+    # Pool niti ne dobijaju request_started/request_finished signale
+    close_old_connections()
+    profiler = profiling.pending()
+    if profiler is not None:
+        profiler.start()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            with perf.span('render'):
+                response.render()
+        return response
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        close_old_connections()
+
+
+def async_view(view):
+    """Return an async view that runs the sync `view` in the pool."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_sync(_call_view, view, request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,84 @@
+"""
+PostgreSQL backend with health checks for persistent connections.
+
+With CONN_MAX_AGE set, a connection kept from a previous request may have
+been dropped by the server, a pooler or the network in the meantime. When
+CONN_HEALTH_CHECKS is enabled the connection is checked once, before its
+first use in each request, and replaced if it no longer works (the same
+behaviour Django 4.1 ships natively).
+
+Every connection also carries core.perf.record_query as an execute
+wrapper, so sampled requests see their queries from any thread.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+
+from core import perf
+
+
+class ConnectionStats:
+    """Per-process counters describing how connections are (re)used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.health_check_failures = 0
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        return {
+            'opened': self.opened,
+            'reused': self.reused,
+            'health_check_failures': self.health_check_failures,
+        }
+
+
+stats = ConnectionStats()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS',
+            False,
+        )
+        self.health_check_done = False
+        self.execute_wrappers.append(perf.record_query)
+
+    def connect(self):
+        super().connect()
+        # Sveza konekcija ne mora ponovo da se proverava
+        self.health_check_done = True
+        stats.increment('opened')
+
+    def close_if_health_check_failed(self):
+        """Close the connection if it is no longer usable."""
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+        ):
+            return
+
+        if self.is_usable():
+            stats.increment('reused')
+        else:
+            stats.increment('health_check_failures')
+            self.close()
+
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Konekcija koja prezivi kraj zahteva proverava se pre sledece upotrebe
+        self.health_check_done = False
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
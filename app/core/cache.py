@@ -0,0 +1,33 @@
+"""
+Cache backends that count hits and misses in the Prometheus metrics.
+"""
+from django.core.cache.backends import (
+    locmem,
+    memcached,
+)
+
+from core import metrics
+
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """Count get() results as cache_gets_total{result="hit"|"miss"}."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            metrics.CACHE_GETS.labels('miss').inc()
+            return default
+
+        metrics.CACHE_GETS.labels('hit').inc()
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class PyMemcacheCache(InstrumentedCacheMixin, memcached.PyMemcacheCache):
+    pass
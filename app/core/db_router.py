@@ -0,0 +1,131 @@
+"""
+Route reads of safe (GET, HEAD, OPTIONS) requests to read replicas.
+
+ReplicaRoutingMiddleware decides per request whether replicas may be
+used; everything else (writes, reads inside transactions, management
+commands, jobs) goes to the primary. Replicas that are down or lag behind
+by more than DB_REPLICA_MAX_LAG seconds are skipped until their next
+health check.
+
+A request reads from one replica, picked on its first read, so a page
+and its prefetched relations never come from replicas with different
+lag. Reads allowed outside a request pick a replica per query.
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.db import (
+    connections,
+    DEFAULT_DB_ALIAS,
+)
+from django.db.utils import DatabaseError
+
+
+REPLICA_PREFIX = 'replica'
+HEALTH_CHECK_INTERVAL = 5
+
+_replicas_allowed = contextvars.ContextVar('replicas_allowed', default=False)
+_health = {}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()),
+            0
+        )
+    END
+"""
+
+
+class RequestReplica:
+    """The replica one request reads from, chosen on its first read."""
+
+    def __init__(self):
+        self.alias = None
+
+    def choose(self, replicas):
+        if self.alias not in replicas:
+            self.alias = random.choice(replicas)
+
+        return self.alias
+
+
+def allow_replicas(allowed):
+    """Allow or forbid replica reads in the current context."""
+    return _replicas_allowed.set(allowed)
+
+
+def allow_request_replicas(allowed):
+    """Allow or forbid replica reads for a request, from one replica."""
+    # Objekat se deli i sa kopijama konteksta u pool nitima
+    return _replicas_allowed.set(allowed and RequestReplica())
+
+
+def reset_replicas(token):
+    _replicas_allowed.reset(token)
+
+
+def replica_aliases():
+    return [
+        alias for alias in settings.DATABASES
+        if alias.startswith(REPLICA_PREFIX)
+    ]
+
+
+def check_replica(alias):
+    """Return True if the replica answers and is not lagging too far."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        connections[alias].close()
+        return False
+
+    return lag <= settings.DB_REPLICA_MAX_LAG
+
+
+def healthy_replicas():
+    """Return replica aliases that passed their latest health check."""
+    now = time.monotonic()
+    healthy = []
+    for alias in replica_aliases():
+        checked_at, is_healthy = _health.get(alias, (None, False))
+        if checked_at is None or now - checked_at >= HEALTH_CHECK_INTERVAL:
+            is_healthy = check_replica(alias)
+            _health[alias] = (now, is_healthy)
+
+        if is_healthy:
+            healthy.append(alias)
+
+    return healthy
+
+
+class ReplicaRouter:
+    """Send allowed reads to a healthy replica, everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        allowed = _replicas_allowed.get()
+        if not allowed or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        replicas = healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        if isinstance(allowed, RequestReplica):
+            return allowed.choose(replicas)
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Sve baze sadrze iste podatke (replike su kopije primarne)
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,172 @@
+"""
+Change notifications between processes, over Postgres LISTEN/NOTIFY.
+
+notify(user_id) sends the id on the CHANNEL channel, delivered when the
+surrounding transaction commits. Every process that has subscribers runs
+one listener thread with its own connection that wakes the subscriptions
+of that user. Notifications carry no data: subscribers read what
+changed themselves, so repeated or missed ones (the listener reconnects
+after errors and then wakes everybody) cost one extra read at most.
+
+LISTEN needs a session, so set EVENTS_DB_HOST / EVENTS_DB_PORT to the
+database server itself when DB_HOST points at a transaction pooler.
+"""
+import asyncio
+import logging
+import select
+import threading
+from collections import defaultdict
+
+import psycopg2
+from django.conf import settings
+from django.db import connections
+
+
+CHANNEL = 'core_changes'
+
+logger = logging.getLogger(__name__)
+
+
+def notify(user_id, using='default'):
+    """Tell subscribers of user_id that their data changed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, str(user_id)])
+
+
+class Subscription:
+    """Wake-up flag of one stream, waitable from threads or a loop."""
+
+    def __init__(self, loop=None):
+        self._event = threading.Event()
+        self._loop = loop
+        self._async_event = asyncio.Event() if loop is not None else None
+
+    def set(self):
+        self._event.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._async_event.set)
+
+    def wait(self, timeout):
+        """Return True if woken before timeout seconds passed."""
+        changed = self._event.wait(timeout)
+        self._event.clear()
+        return changed
+
+    async def wait_async(self, timeout):
+        """Like wait(), for subscriptions created with a loop."""
+        try:
+            await asyncio.wait_for(self._async_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._async_event.clear()
+        self._event.clear()
+        return True
+
+
+class ChangeListener:
+    """LISTEN on CHANNEL in a thread and wake matching subscriptions."""
+
+    def __init__(self, using='default', poll_interval=5):
+        self.using = using
+        self.poll_interval = poll_interval
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def subscribe(self, user_id, loop=None):
+        subscription = Subscription(loop)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='change-listener',
+                    daemon=True,
+                )
+                self._thread.start()
+
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(user_id, None)
+
+    def stop(self):
+        """Stop listening, within poll_interval seconds."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopped.set()
+            thread.join()
+
+    def wake(self, user_id=None):
+        """Wake the subscriptions of user_id, or all of them."""
+        with self._lock:
+            if user_id is None:
+                woken = [
+                    subscription
+                    for subscriptions in self._subscriptions.values()
+                    for subscription in subscriptions
+                ]
+            else:
+                woken = list(self._subscriptions.get(user_id, ()))
+        for subscription in woken:
+            subscription.set()
+
+    def connect(self):
+        """Return a new autocommit connection listening on CHANNEL."""
+        params = connections[self.using].get_connection_params()
+        if settings.EVENTS_DB_HOST:
+            params['host'] = settings.EVENTS_DB_HOST
+            params['port'] = settings.EVENTS_DB_PORT or params.get('port')
+        connection = psycopg2.connect(**params)
+        connection.set_session(autocommit=True)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+
+        return connection
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                connection = self.connect()
+            except psycopg2.Error:
+                logger.exception('Could not connect to listen for changes')
+                self._stopped.wait(self.poll_interval)
+                continue
+
+            # Sta se menjalo dok nismo slusali, pretplatnici citaju sami
+            self.wake()
+            try:
+                self._listen(connection)
+            except (psycopg2.Error, OSError):
+                logger.exception('Lost the change notification connection')
+            finally:
+                connection.close()
+
+    def _listen(self, connection):
+        while not self._stopped.is_set():
+            ready, _, _ = select.select(
+                [connection],
+                [],
+                [],
+                self.poll_interval,
+            )
+            if not ready:
+                continue
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                try:
+                    user_id = int(notification.payload)
+                except ValueError:
+                    continue
+                self.wake(user_id)
+
+
+listener = ChangeListener()
@@ -0,0 +1,47 @@
+"""
+Password hashing in a process pool, for bulk user provisioning.
+
+Functions here run in spawned pool processes, so this module must not
+import models.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+
+def hash_passwords(passwords):
+    """Return make_password() of every password, in order."""
+    return [make_password(password) for password in passwords]
+
+
+def pool_size(processes=None):
+    """Return processes, or the number of cores when it is not given."""
+    return processes or os.cpu_count() or 1
+
+
+def process_pool(processes=None):
+    """Return a pool with pool_size(processes) spawned processes."""
+    return ProcessPoolExecutor(
+        max_workers=pool_size(processes),
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+def submit_hashing(pool, passwords, chunks):
+    """Split passwords into `chunks` pool tasks, return their futures."""
+    size = max(1, -(-len(passwords) // chunks))
+    return [
+        pool.submit(hash_passwords, passwords[start:start + size])
+        for start in range(0, len(passwords), size)
+    ]
+
+
+def collect_hashes(futures):
+    """Return the hashes of submit_hashing() futures, in order."""
+    hashes = []
+    for future in futures:
+        hashes.extend(future.result())
+
+    return hashes
@@ -0,0 +1,84 @@
+import csv
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+
+class Command(BaseCommand):
+    """Django command to provision users from a CSV or JSON lines file."""
+
+    help = (
+        'Import users from a CSV file with a header row (email, password, '
+        'name, ...) or a JSON lines file with one object per user.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: guessed from the file extension).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Users hashed and written per batch.',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Hashing processes (default: one per core).',
+        )
+        parser.add_argument(
+            '--skip-existing',
+            action='store_true',
+            help='Leave users whose email already exists untouched.',
+        )
+
+    def handle(self, *args, **options):
+        """Command entrypoint."""
+        path = options['path']
+        fmt = options['format'] or (
+            'jsonl' if path.endswith(('.jsonl', '.json')) else 'csv'
+        )
+        start = time.monotonic()
+
+        def progress(done, created, updated, skipped):
+            rate = done / max(time.monotonic() - start, 1e-9)
+            self.stdout.write(
+                f'{done} users processed ({created} created, '
+                f'{updated} updated, {skipped} skipped), {rate:.0f} users/s'
+            )
+
+        try:
+            with open(path, newline='', encoding='utf-8') as source:
+                totals = get_user_model().objects.bulk_create_users(
+                    self._read(source, fmt),
+                    batch_size=options['batch_size'],
+                    processes=options['processes'],
+                    update_existing=not options['skip_existing'],
+                    progress=progress,
+                )
+        except (OSError, ValueError, TypeError) as exc:
+            raise CommandError(f'Import failed: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported users: {} created, {} updated, {} skipped'.format(
+                *totals,
+            )
+        ))
+
+    def _read(self, source, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(source)
+            return
+
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,453 @@
+import io
+import itertools
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import (
+    connection,
+    transaction,
+)
+
+from core import hashers
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+TAG_NAMES = [
+    'Vegan', 'Vegetarian', 'Dessert', 'Breakfast', 'Dinner', 'Lunch',
+    'Quick', 'Healthy', 'Spicy', 'Italian', 'Mexican', 'Asian', 'Baking',
+    'Soup', 'Salad', 'Grill', 'Gluten free', 'Comfort food',
+]
+INGREDIENT_NAMES = [
+    'Salt', 'Pepper', 'Olive oil', 'Garlic', 'Onion', 'Tomato', 'Flour',
+    'Sugar', 'Butter', 'Egg', 'Milk', 'Rice', 'Pasta', 'Chicken', 'Beef',
+    'Carrot', 'Potato', 'Lemon', 'Basil', 'Cheese', 'Chili', 'Ginger',
+    'Mushroom', 'Spinach', 'Yogurt', 'Honey', 'Cinnamon', 'Paprika',
+]
+TITLE_WORDS = [
+    'Roasted', 'Creamy', 'Spicy', 'Classic', 'Quick', 'Baked', 'Grilled',
+    'Stuffed', 'Lemon', 'Garlic', 'Honey', 'Smoky', 'Fresh', 'Rustic',
+]
+PLACEHOLDER_COLORS = [
+    (231, 111, 81), (244, 162, 97), (233, 196, 106), (42, 157, 143),
+    (38, 70, 83), (131, 56, 236), (255, 190, 11), (58, 134, 255),
+]
+
+USER_COLUMNS = [
+    'id', 'email', 'name', 'password', 'is_active', 'is_staff',
+    'is_superuser',
+]
+RECIPE_COLUMNS = [
+    'id', 'user_id', 'title', 'description', 'time_minutes', 'price',
+    'link', 'image', 'servings',
+]
+
+
+def zipf_cum_weights(count, skew):
+    """Return cumulative weights of ranks 1..count, 1 / rank ** skew."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+def zipf_counts(rng, items, mean, skew):
+    """Split items * mean between items, Zipfian by a shuffled rank."""
+    weights = [1 / rank ** skew for rank in range(1, items + 1)]
+    rng.shuffle(weights)
+    scale = items * mean / sum(weights)
+
+    return [round(weight * scale) for weight in weights]
+
+
+def reserve_ids(model, count):
+    """Take count consecutive ids from model's sequence, return the first."""
+    if not count:
+        return 1
+    table = model._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Lock drzi druge upise van bloka dok ne pomerimo sekvencu
+        cursor.execute(f'LOCK TABLE {table} IN EXCLUSIVE MODE')
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            "nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+            [table, table, count],
+        )
+        last = cursor.fetchone()[0]
+
+    return last - count + 1
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Load rows (tuples of plain values, None for NULL) with COPY."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(
+            r'\N' if value is None else str(value) for value in row
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN',
+        buffer,
+    )
+
+
+def named_rows(rng, first_id, user_id, names, count):
+    """Return (id, name, user_id) rows, distinct names in random order."""
+    return [
+        (
+            first_id + offset,
+            names[i % len(names)]
+            + ('' if i < len(names) else f' {i // len(names)}'),
+            user_id,
+        )
+        for offset, i in enumerate(
+            rng.sample(range(max(count, len(names))), count)
+        )
+    ]
+
+
+def pick(rng, first_id, cum_weights, low, high):
+    """Return distinct ids, popular (low offset) ones more often."""
+    if not cum_weights:
+        return []
+    wanted = min(len(cum_weights), rng.randint(low, high))
+    picked = rng.choices(
+        range(len(cum_weights)),
+        cum_weights=cum_weights,
+        k=wanted,
+    )
+
+    return [first_id + offset for offset in dict.fromkeys(picked)]
+
+
+def write_chunk(chunk):
+    """Generate and COPY the users in chunk, return the row counts."""
+    # Proces iz pool-a inace ne zna za test bazu
+    connection.settings_dict['NAME'] = chunk['database']
+    rng = random.Random(f'{chunk["seed"]}-{chunk["index"]}')
+    tag_weights = zipf_cum_weights(chunk['tags'], chunk['skew'])
+    ingredient_weights = zipf_cum_weights(
+        chunk['ingredients'],
+        chunk['skew'],
+    )
+
+    users = []
+    tags = []
+    ingredients = []
+    recipes = []
+    recipe_tags = []
+    recipe_ingredients = []
+    recipe_id = chunk['first_recipe']
+    for offset, count in enumerate(chunk['recipe_counts']):
+        number = chunk['first_user'] + offset
+        user_id = chunk['user_ids'] + number
+        tag_id = chunk['tag_ids'] + number * chunk['tags']
+        ingredient_id = (
+            chunk['ingredient_ids'] + number * chunk['ingredients']
+        )
+        users.append((
+            user_id,
+            f'{chunk["prefix"]}{number}@example.com',
+            f'Seed user {number}',
+            chunk['password'],
+            't',
+            'f',
+            'f',
+        ))
+        tags.extend(named_rows(
+            rng, tag_id, user_id, TAG_NAMES, chunk['tags'],
+        ))
+        ingredients.extend(named_rows(
+            rng, ingredient_id, user_id, INGREDIENT_NAMES,
+            chunk['ingredients'],
+        ))
+
+        for _ in range(count):
+            recipes.append(recipe_row(rng, recipe_id, user_id, chunk))
+            recipe_tags.extend(
+                (recipe_id, picked)
+                for picked in pick(rng, tag_id, tag_weights, 0, 3)
+            )
+            recipe_ingredients.extend(
+                (recipe_id, picked)
+                for picked in pick(
+                    rng, ingredient_id, ingredient_weights, 2, 8,
+                )
+            )
+            recipe_id += 1
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        copy_rows(
+            cursor,
+            get_user_model()._meta.db_table,
+            USER_COLUMNS,
+            users,
+        )
+        copy_rows(cursor, Tag._meta.db_table, ['id', 'name', 'user_id'], tags)
+        copy_rows(
+            cursor,
+            Ingredient._meta.db_table,
+            ['id', 'name', 'user_id'],
+            ingredients,
+        )
+        copy_rows(cursor, Recipe._meta.db_table, RECIPE_COLUMNS, recipes)
+        copy_rows(
+            cursor,
+            Recipe.tags.through._meta.db_table,
+            ['recipe_id', 'tag_id'],
+            recipe_tags,
+        )
+        copy_rows(
+            cursor,
+            Recipe.ingredients.through._meta.db_table,
+            ['recipe_id', 'ingredient_id'],
+            recipe_ingredients,
+        )
+
+    return {
+        'users': len(users),
+        'recipes': len(recipes),
+        'tags': len(tags),
+        'ingredients': len(ingredients),
+        'recipe tags': len(recipe_tags),
+        'recipe ingredients': len(recipe_ingredients),
+        'images': sum(row[-1] is not None for row in recipes),
+    }
+
+
+def recipe_row(rng, recipe_id, user_id, chunk):
+    title = ' '.join(rng.sample(TITLE_WORDS, 2))
+    image = None
+    if chunk['images'] and rng.random() < chunk['images']:
+        image = rng.choice(chunk['placeholders'])
+
+    return (
+        recipe_id,
+        user_id,
+        f'{title} {rng.choice(INGREDIENT_NAMES).lower()}',
+        'Generated recipe',
+        min(240, max(5, round(rng.lognormvariate(3.3, 0.6)))),
+        f'{rng.randint(100, 9999) / 100:.2f}',
+        '',
+        image,
+        rng.choice((1, 2, 2, 4, 4, 6)),
+    )
+
+
+class Command(BaseCommand):
+    """Django command to generate synthetic data for benchmarks."""
+
+    help = (
+        'Replace the users with --email-prefix emails (and everything they '
+        'own) with generated users, recipes, tags and ingredients. The '
+        'same options and --seed always produce the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument(
+            '--recipes-per-user',
+            type=int,
+            default=20,
+            help='Mean recipes per user; actual counts are Zipfian.',
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=10,
+            help='Tags per user.',
+        )
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=30,
+            help='Ingredients per user.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.0,
+            help=(
+                'Zipf exponent of recipes per user and of tag and '
+                'ingredient popularity, 0 is uniform.'
+            ),
+        )
+        parser.add_argument(
+            '--images',
+            type=float,
+            default=0,
+            help='Share of recipes with a placeholder image, 0 to 1.',
+        )
+        parser.add_argument('--email-prefix', default='seed')
+        parser.add_argument(
+            '--password',
+            default='seed-password',
+            help='Password of every generated user.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20000,
+            help='Recipes generated and copied per batch.',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            help='Loading processes (default: one per core).',
+        )
+
+    def handle(self, *args, **options):
+        """Command entrypoint."""
+        start = time.monotonic()
+        rng = random.Random(options['seed'])
+        prefix = options['email_prefix']
+
+        deleted = self._delete_seeded(prefix)
+        if deleted:
+            self.stdout.write(f'Deleted {deleted} previously seeded users')
+
+        recipe_counts = zipf_counts(
+            rng,
+            options['users'],
+            options['recipes_per_user'],
+            options['skew'],
+        )
+        chunks = self._chunks(rng, recipe_counts, options)
+
+        counts = {}
+        for result in self._load(chunks, options['processes']):
+            for name, count in result.items():
+                counts[name] = counts.get(name, 0) + count
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'{counts["recipes"]} recipes loaded, '
+                    f'{time.monotonic() - start:.1f}s'
+                )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Recipe._meta.db_table}')
+
+        elapsed = time.monotonic() - start
+        summary = ', '.join(
+            f'{count} {name}' for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {summary} in {elapsed:.1f}s'
+        ))
+
+    def _delete_seeded(self, prefix):
+        """Delete seeded users, with set based deletes of the bulky rows."""
+        users = get_user_model().objects.filter(
+            email__startswith=prefix,
+            email__endswith='@example.com',
+        )
+        user_ids = users.values('id')
+        with transaction.atomic():
+            for model, field in [
+                (Recipe.tags.through, 'recipe__user__in'),
+                (Recipe.tags.through, 'tag__user__in'),
+                (Recipe.ingredients.through, 'recipe__user__in'),
+                (Recipe.ingredients.through, 'ingredient__user__in'),
+                (Recipe, 'user__in'),
+                (Tag, 'user__in'),
+                (Ingredient, 'user__in'),
+            ]:
+                # Bez ucitavanja objekata i signala, jedan DELETE po tabeli
+                queryset = model.objects.filter(**{field: user_ids})
+                queryset._raw_delete(queryset.db)
+
+            # Ostatak (tokeni, poslovi, ...) brise ORM kaskadno
+            deleted = users.delete()[1].get(get_user_model()._meta.label, 0)
+
+        return deleted
+
+    def _chunks(self, rng, recipe_counts, options):
+        """Split users into chunks of about --batch-size recipes."""
+        users = len(recipe_counts)
+        total = sum(recipe_counts)
+        base = {
+            'database': connection.settings_dict['NAME'],
+            'seed': options['seed'],
+            'prefix': options['email_prefix'],
+            'password': make_password(options['password']),
+            'skew': options['skew'],
+            'tags': options['tags'],
+            'ingredients': options['ingredients'],
+            'images': options['images'],
+            'placeholders': self._placeholders() if options['images'] else [],
+            'user_ids': reserve_ids(get_user_model(), users),
+            'tag_ids': reserve_ids(Tag, users * options['tags']),
+            'ingredient_ids': reserve_ids(
+                Ingredient,
+                users * options['ingredients'],
+            ),
+        }
+        first_recipe = reserve_ids(Recipe, total)
+
+        chunks = []
+        first_user = 0
+        while first_user < users:
+            last_user = first_user
+            size = 0
+            while last_user < users and (
+                size == 0 or size + recipe_counts[last_user]
+                <= options['batch_size']
+            ):
+                size += recipe_counts[last_user]
+                last_user += 1
+            chunks.append({
+                **base,
+                'index': len(chunks),
+                'first_user': first_user,
+                'recipe_counts': recipe_counts[first_user:last_user],
+                'first_recipe': first_recipe,
+            })
+            first_recipe += size
+            first_user = last_user
+
+        return chunks
+
+    def _load(self, chunks, processes):
+        """Yield write_chunk() results, in a process pool if asked to."""
+        processes = min(hashers.pool_size(processes), len(chunks))
+        if processes <= 1:
+            for chunk in chunks:
+                yield write_chunk(chunk)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            yield from pool.map(write_chunk, chunks)
+
+    def _placeholders(self):
+        """Save the placeholder JPEGs once, return their storage names."""
+        from PIL import Image
+
+        names = []
+        for index, color in enumerate(PLACEHOLDER_COLORS):
+            name = f'uploads/recipe/seed-placeholder-{index}.jpg'
+            if not default_storage.exists(name):
+                content = io.BytesIO()
+                Image.new('RGB', (64, 64), color).save(content, 'JPEG')
+                name = default_storage.save(name, ContentFile(
+                    content.getvalue(),
+                ))
+            names.append(name)
+
+        return names
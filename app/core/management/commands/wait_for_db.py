@@ -1,23 +1,93 @@
+import random
 import time
 
 from psycopg2 import OperationalError as Psycopg2Error
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connections,
+)
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=120,
+            help='Give up after this many seconds.',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5,
+            help='Upper bound for the delay between attempts, in seconds.',
+        )
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for (default: default).',
+        )
+        parser.add_argument(
+            '--migrations',
+            action='store_true',
+            help='Also wait until no migrations are pending.',
+        )
+
     def handle(self, *args, **options):
         """Command entrypoint."""
         self.stdout.write('Waiting for database ... ')
-        db_up = False
-        while not db_up:
+        deadline = time.monotonic() + options['timeout']
+        # Replike ne smeju da obore start, router preskace one koje ne rade
+        pending = list(options['databases'] or [DEFAULT_DB_ALIAS])
+        attempt = 0
+
+        while pending:
             try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second ...')
-                time.sleep(1)
+                for alias in list(pending):
+                    self._check_database(alias, options['migrations'])
+                    pending.remove(alias)
+            except (Psycopg2Error, OperationalError) as exc:
+                if time.monotonic() >= deadline:
+                    raise CommandError(
+                        f'Database {alias} unavailable after '
+                        f'{options["timeout"]:g} seconds: {exc}'
+                    )
+                self._wait(attempt, options['max_delay'], deadline)
+                attempt += 1
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def _check_database(self, alias, migrations):
+        """Raise OperationalError unless the database is usable."""
+        self.check(databases=[alias])
+        connections[alias].ensure_connection()
+
+        if migrations:
+            executor = MigrationExecutor(connections[alias])
+            plan = executor.migration_plan(
+                executor.loader.graph.leaf_nodes(),
+            )
+            if plan:
+                raise OperationalError(
+                    f'{len(plan)} migrations pending on {alias}'
+                )
+
+    def _wait(self, attempt, max_delay, deadline):
+        # Eksponencijalni backoff sa "full jitter"-om: instance koje startuju
+        # zajedno ne udaraju bazu u istom trenutku
+        ceiling = min(max_delay, 0.1 * 2 ** attempt)
+        delay = min(random.uniform(0, ceiling), deadline - time.monotonic())
+        delay = max(delay, 0)
+        self.stdout.write(
+            f'Database unavailable, waiting {delay:.2f} seconds ...'
+        )
+        time.sleep(delay)
@@ -0,0 +1,138 @@
+"""
+Prometheus metrics.
+
+Under uwsgi or uvicorn with several workers, PROMETHEUS_MULTIPROC_DIR
+must point at an empty directory before the app starts (scripts/run.sh
+does this). Every process then writes its samples to memory mapped files
+there, and /metrics aggregates the files of all workers.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by view and action.',
+    ['view', 'method'],
+)
+RESPONSES = Counter(
+    'http_responses_total',
+    'Responses by view and status code.',
+    ['view', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries per request.',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf')),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries per request.',
+    ['view'],
+)
+CACHE_GETS = Counter(
+    'cache_gets_total',
+    'Cache lookups by result (hit or miss).',
+    ['result'],
+)
+PASSWORD_HASHING = Counter(
+    'password_hashing_total',
+    'Password hashing gate decisions (admitted or rejected).',
+    ['result'],
+)
+PASSWORD_HASHING_ACTIVE = Gauge(
+    'password_hashing_active',
+    'Password hashes running now.',
+    multiprocess_mode='livesum',
+)
+
+
+class JobQueueCollector:
+    """
+    Queued jobs per task name, read from the database at scrape time.
+    The count is reused for METRICS_QUEUE_CACHE_SECONDS, so frequent
+    scrapes do not turn into frequent queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counted_at = None
+        self._counts = {}
+
+    def counts(self):
+        from django.conf import settings
+        from django.db.models import Count
+        from core.models import Job
+
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._counted_at is None
+                or now - self._counted_at
+                >= settings.METRICS_QUEUE_CACHE_SECONDS
+            ):
+                # Parcijalni indeks core_job_queued_idx pokriva ovaj upit
+                self._counts = dict(
+                    Job.objects.filter(status=Job.STATUS_QUEUED)
+                    .values_list('name')
+                    .annotate(count=Count('id'))
+                    .order_by()
+                )
+                self._counted_at = now
+
+            return self._counts
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            'job_queue_depth',
+            'Background jobs waiting to run, by task name.',
+            labels=['name'],
+        )
+        for name, count in sorted(self.counts().items()):
+            family.add_metric([name], count)
+
+        yield family
+
+
+def multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+_registries = None
+
+
+def registries():
+    """Return the registries /metrics renders, built once per process."""
+    global _registries
+
+    if _registries is None:
+        if multiprocess_enabled():
+            base = CollectorRegistry()
+            multiprocess.MultiProcessCollector(base)
+        else:
+            base = REGISTRY
+
+        # Stanje reda je u bazi, ne u fajlovima procesa
+        jobs = CollectorRegistry()
+        jobs.register(JobQueueCollector())
+        _registries = (base, jobs)
+
+    return _registries
+
+
+def render():
+    """Return the text exposition of all metrics."""
+    return b''.join(generate_latest(registry) for registry in registries())
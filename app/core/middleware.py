@@ -0,0 +1,470 @@
+"""
+Project wide middleware.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.middleware.csrf import CsrfViewMiddleware
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core import (
+    db_router,
+    async_views,
+    metrics,
+    perf,
+    profiling,
+    slow_queries,
+)
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_pin'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allow replica reads for safe requests, unless the client wrote
+    something recently. After a successful write the client is pinned to
+    the primary for DB_REPLICA_PIN_SECONDS, through a cache marker keyed by
+    its Authorization header and a cookie, so it always reads its own
+    writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Isti trik kao django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        safe = request.method in SAFE_METHODS
+        token = db_router.allow_request_replicas(
+            safe and not self._is_pinned(request),
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.reset_replicas(token)
+
+        if not safe and response.status_code < 400:
+            self._pin(request, response)
+
+        return response
+
+    async def __acall__(self, request):
+        # Cache je sinhron, pa pin provere idu u pool
+        safe = request.method in SAFE_METHODS
+        pinned = safe and await async_views.run_sync(self._is_pinned, request)
+        token = db_router.allow_request_replicas(safe and not pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.reset_replicas(token)
+
+        if not safe and response.status_code < 400:
+            await async_views.run_sync(self._pin, request, response)
+
+        return response
+
+    def _pin_key(self, request):
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if not credentials:
+            return None
+
+        digest = hashlib.sha256(credentials.encode()).hexdigest()
+        return f'db-pin:{digest}'
+
+    def _is_pinned(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+
+        key = self._pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def _pin(self, request, response):
+        seconds = settings.DB_REPLICA_PIN_SECONDS
+        key = self._pin_key(request)
+        if key is not None:
+            cache.set(key, 1, seconds)
+
+        response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True)
+
+
+class MetricsMiddleware:
+    """
+    Observe latency, status, query count and query time of every request
+    in the Prometheus metrics (core.metrics), labelled by view and action.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        record = perf.RequestRecord()
+        token = perf.activate(record)
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.deactivate(token)
+
+        self._observe(request, response, record)
+        return response
+
+    async def __acall__(self, request):
+        record = perf.RequestRecord()
+        token = perf.activate(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.deactivate(token)
+
+        self._observe(request, response, record)
+        return response
+
+    def _observe(self, request, response, record):
+        view = perf.view_name(request) or 'unmatched'
+        metrics.REQUEST_LATENCY.labels(view, request.method).observe(
+            time.perf_counter() - record.start
+        )
+        metrics.RESPONSES.labels(view, response.status_code).inc()
+        metrics.REQUEST_QUERIES.labels(view).observe(record.queries)
+        metrics.REQUEST_DB_TIME.labels(view).observe(record.db_time)
+
+
+class SlowQueryMiddleware:
+    """
+    Write out the slow queries flagged while serving a request, with the
+    request's path, user and view action (see core.slow_queries). Must
+    come after MetricsMiddleware, which activates the perf record.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        self._flush(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        # Pool samo kad ima sta da se upise, vecina zahteva nema sporih
+        record = perf.current()
+        if record is not None and record.slow_queries:
+            await async_views.run_sync(self._flush, request)
+        return response
+
+    def _flush(self, request):
+        record = perf.current()
+        if record is None or not record.slow_queries:
+            return
+
+        # EXPLAIN i upis mogu i sami da budu spori, ne vracamo ih u listu
+        entries, record.slow_queries = record.slow_queries, []
+        slow_queries.flush(request, entries, perf.view_name(request))
+
+
+class PerformanceMiddleware:
+    """
+    Record where the time of a sampled request goes: the matched view and
+    action, query count and time, serializer and render time, and the
+    response size. The numbers are returned in a Server-Timing header and
+    logged as one JSON line to the core.perf logger. PERF_SAMPLE_RATE is
+    the share of requests sampled; the others only pay for one
+    random() call.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        if not self._sampled():
+            return self.get_response(request)
+
+        # MetricsMiddleware je mozda vec aktivirao zapis
+        record = perf.current()
+        if record is not None:
+            return self._finish(request, self.get_response(request), record)
+
+        record = perf.RequestRecord()
+        token = perf.activate(record)
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.deactivate(token)
+
+        return self._finish(request, response, record)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        record = perf.current()
+        if record is not None:
+            response = await self.get_response(request)
+            return self._finish(request, response, record)
+
+        record = perf.RequestRecord()
+        token = perf.activate(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.deactivate(token)
+
+        return self._finish(request, response, record)
+
+    def process_template_response(self, request, response):
+        record = perf.current()
+        if record is not None:
+            # Handler renderuje odgovor odmah posle ovog poziva
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: record.add(
+                    'render',
+                    time.perf_counter() - start,
+                )
+            )
+
+        return response
+
+    def _sampled(self):
+        rate = settings.PERF_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def _finish(self, request, response, record):
+        total = time.perf_counter() - record.start
+        size = None
+        if not response.streaming:
+            size = len(response.content)
+
+        timings = [
+            ('total', total, None),
+            ('db', record.db_time, f'{record.queries} queries'),
+            *((name, seconds, None) for name, seconds in record.spans.items()),
+        ]
+        header = ', '.join(
+            f'{name};dur={seconds * 1000:.2f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in timings
+        )
+        if response.has_header('Server-Timing'):
+            header = f'{response["Server-Timing"]}, {header}'
+        response['Server-Timing'] = header
+
+        perf.logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': perf.view_name(request),
+            'status': response.status_code,
+            'bytes': size,
+            'queries': record.queries,
+            **{
+                f'{name}_ms': round(seconds * 1000, 3)
+                for name, seconds, _ in timings
+            },
+        }))
+
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Run the view under a profiler (see core.profiling) when a staff user
+    sends X-Profile or ?_profile= (1, cprofile or sample), when the user
+    is in PROFILE_USERS, or for a PROFILE_SAMPLE_RATE share of requests.
+    The id of the saved RequestProfile is returned in X-Profile-Id.
+
+    Token users are looked up here, before DRF authenticates them, but
+    only for requests that ask to be profiled or while PROFILE_USERS is
+    set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        trigger, profiler = self._profiler(request)
+        if profiler is None:
+            return self.get_response(request)
+
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+
+        return self._save(request, response, trigger, profiler)
+
+    async def __acall__(self, request):
+        if self._needs_user(request):
+            trigger, profiler = await async_views.run_sync(
+                self._profiler,
+                request,
+            )
+        else:
+            # Bez korisnika odluka ne dira bazu i ostaje na event loop-u
+            trigger, profiler = self._profiler(request)
+        if profiler is None:
+            return await self.get_response(request)
+
+        # Async view pokrece profiler u niti u kojoj se view izvrsava
+        token = profiling.set_pending(profiler)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.reset_pending(token)
+
+        if not profiler.started:
+            return response
+        return await async_views.run_sync(
+            self._save,
+            request,
+            response,
+            trigger,
+            profiler,
+        )
+
+    def _flag(self, request):
+        return (
+            request.META.get('HTTP_X_PROFILE')
+            or request.GET.get('_profile')
+        )
+
+    def _needs_user(self, request):
+        """Return True if deciding needs the (token) user, a DB lookup."""
+        return bool(self._flag(request) or settings.PROFILE_USERS)
+
+    def _profiler(self, request):
+        """Return (trigger, Profiler) for a request to profile, or Nones."""
+        flag = self._flag(request)
+        mode = flag if flag in profiling.MODES else settings.PROFILE_MODE
+        trigger = None
+        if self._needs_user(request):
+            user = self._user(request)
+            if flag and user is not None and user.is_staff:
+                trigger = 'request'
+            elif (
+                user is not None
+                and user.email.lower() in settings.PROFILE_USERS
+            ):
+                trigger = 'user'
+
+        rate = settings.PROFILE_SAMPLE_RATE
+        if trigger is None and rate > 0 and random.random() < rate:
+            trigger = 'sample'
+
+        if trigger is None:
+            return None, None
+        return trigger, profiling.Profiler(
+            mode,
+            settings.PROFILE_SAMPLE_INTERVAL,
+        )
+
+    def _user(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+
+        try:
+            result = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+
+        return result[0] if result else None
+
+    def _save(self, request, response, trigger, profiler):
+        profile = profiling.save(
+            profiler,
+            request,
+            response,
+            trigger,
+            perf.view_name(request),
+        )
+        response['X-Profile-Id'] = str(profile.id)
+        return response
+
+
+class SkipForApiMixin:
+    """
+    Skip a browser oriented middleware for SLIM_MIDDLEWARE_PATHS. Those
+    routes authenticate with tokens only, so sessions, messages and CSRF
+    cookies are never used there.
+    """
+
+    def skip(self, request):
+        return request.path_info.startswith(settings.SLIM_MIDDLEWARE_PATHS)
+
+    def __call__(self, request):
+        if self.skip(request):
+            return self.get_response(request)
+
+        return super().__call__(request)
+
+
+class ApiSessionMiddleware(SkipForApiMixin, SessionMiddleware):
+    pass
+
+
+class ApiCsrfViewMiddleware(SkipForApiMixin, CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # process_view handler poziva mimo __call__
+        if self.skip(request):
+            return None
+
+        return super().process_view(
+            request,
+            callback,
+            callback_args,
+            callback_kwargs,
+        )
+
+
+class ApiAuthenticationMiddleware(SkipForApiMixin, AuthenticationMiddleware):
+    pass
+
+
+class ApiMessageMiddleware(SkipForApiMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:03
+
+import core.profiling
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_slowquery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=16)),
+                ('path', models.CharField(max_length=2048)),
+                ('view', models.CharField(blank=True, max_length=255)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('mode', models.CharField(max_length=16)),
+                ('trigger', models.CharField(choices=[('request', 'Requested by staff'), ('user', 'Profiled user'), ('sample', 'Sampled')], max_length=16)),
+                ('duration_ms', models.FloatField()),
+                ('file', models.FileField(storage=core.profiling.ProfileStorage(), upload_to='')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,168 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+SYNCED_TABLES = [
+    ('core_recipe', 'recipe'),
+    ('core_tag', 'tag'),
+    ('core_ingredient', 'ingredient'),
+]
+RECIPE_RELATIONS = ['core_recipe_tags', 'core_recipe_ingredients']
+
+TRACK_CHANGES = [
+    "CREATE SEQUENCE core_change_seq",
+    *[
+        f"UPDATE {table} SET change_seq = nextval('core_change_seq')"
+        for table, _ in SYNCED_TABLES
+    ],
+    """
+    CREATE FUNCTION core_track_change() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('core_change_seq');
+        NEW.updated_at := now();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION core_track_delete() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_tombstone
+            (model, object_id, user_id, change_seq, deleted_at)
+        SELECT TG_ARGV[0], id, user_id, nextval('core_change_seq'), now()
+        FROM old_rows;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION core_track_recipe_relation() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET updated_at = now()
+        WHERE id IN (SELECT recipe_id FROM changed_rows);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *[
+        f"""
+        CREATE TRIGGER {table}_change BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION core_track_change()
+        """
+        for table, _ in SYNCED_TABLES
+    ],
+    *[
+        f"""
+        CREATE TRIGGER {table}_delete AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION core_track_delete('{model}')
+        """
+        for table, model in SYNCED_TABLES
+    ],
+    # Promena tagova ili sastojaka recepta je promena recepta
+    *[
+        f"""
+        CREATE TRIGGER {table}_{event.lower()} AFTER {event} ON {table}
+        REFERENCING {rows} TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION core_track_recipe_relation()
+        """
+        for table in RECIPE_RELATIONS
+        for event, rows in [('INSERT', 'NEW'), ('DELETE', 'OLD')]
+    ],
+    """
+    ALTER TABLE core_tombstone ADD CONSTRAINT core_tombstone_user_id_fk
+    FOREIGN KEY (user_id) REFERENCES core_user (id) ON DELETE CASCADE
+    """,
+]
+UNTRACK_CHANGES = [
+    "ALTER TABLE core_tombstone DROP CONSTRAINT core_tombstone_user_id_fk",
+    *[
+        f"DROP TRIGGER {table}_{event} ON {table}"
+        for table in RECIPE_RELATIONS
+        for event in ['insert', 'delete']
+    ],
+    *[
+        f"DROP TRIGGER {table}_{event} ON {table}"
+        for table, _ in SYNCED_TABLES
+        for event in ['change', 'delete']
+    ],
+    "DROP FUNCTION core_track_recipe_relation()",
+    "DROP FUNCTION core_track_delete()",
+    "DROP FUNCTION core_track_change()",
+    "DROP SEQUENCE core_change_seq",
+]
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'change_seq'], name='core_ingredient_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'change_seq'], name='core_recipe_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'change_seq'], name='core_tag_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'change_seq'], name='core_tombstone_sync_idx'),
+        ),
+        migrations.RunSQL(TRACK_CHANGES, UNTRACK_CHANGES),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+# Sinhronizacija vraca samo redove transakcija starijih od najstarije
+# aktivne, pa izmena koja se commit-uje kasnije ne moze da ostane iza
+# tokena koji je klijent vec dobio (vidi recipe.sync)
+TRACK_CHANGES = [
+    """
+    CREATE OR REPLACE FUNCTION core_track_change() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('core_change_seq');
+        NEW.change_xid := pg_current_xact_id()::text::bigint;
+        NEW.updated_at := now();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_track_delete() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_tombstone
+            (model, object_id, user_id, change_seq, change_xid, deleted_at)
+        SELECT
+            TG_ARGV[0], id, user_id, nextval('core_change_seq'),
+            pg_current_xact_id()::text::bigint, now()
+        FROM old_rows;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+UNTRACK_CHANGES = [
+    """
+    CREATE OR REPLACE FUNCTION core_track_change() RETURNS trigger AS $$
+    BEGIN
+        NEW.change_seq := nextval('core_change_seq');
+        NEW.updated_at := now();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION core_track_delete() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO core_tombstone
+            (model, object_id, user_id, change_seq, deleted_at)
+        SELECT TG_ARGV[0], id, user_id, nextval('core_change_seq'), now()
+        FROM old_rows;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_servings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='change_xid',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'change_xid', 'change_seq'], name='core_ingredient_sync_xid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'change_xid', 'change_seq'], name='core_recipe_sync_xid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'change_xid', 'change_seq'], name='core_tag_sync_xid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'change_xid', 'change_seq'], name='core_tombstone_sync_xid_idx'),
+        ),
+        migrations.RunSQL(TRACK_CHANGES, UNTRACK_CHANGES),
+    ]
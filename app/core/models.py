@@ -1,14 +1,22 @@
 import os
 import uuid
+from itertools import islice
 
-from django.db import models
+from django.db import (
+    models,
+    transaction,
+)
 from django.conf import settings
+from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.profiling import ProfileStorage
+
 
 def recipe_image_file_path(instance, filename):
     """Generate file path for a new recipe image."""
@@ -30,6 +38,129 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def bulk_create_users(
+        self,
+        users,
+        batch_size=1000,
+        processes=None,
+        update_existing=True,
+        progress=None,
+    ):
+        """
+        Create users from dicts with an email, a password and other User
+        fields. Passwords are hashed in a process pool while the previous
+        batch is written. Users whose email already exists are updated,
+        or skipped when update_existing is False; within a batch the last
+        row for an email wins and the others are skipped, as are rows
+        whose email a parallel import inserted first. progress(done,
+        created, updated, skipped) is called after each batch. Return
+        (created, updated, skipped).
+        """
+        from core import hashers
+
+        totals = {'done': 0, 'created': 0, 'updated': 0, 'skipped': 0}
+        rows = iter(users)
+        processes = hashers.pool_size(processes)
+        with hashers.process_pool(processes) as pool:
+            pending = None
+            while True:
+                batch = list(islice(rows, batch_size))
+                if batch:
+                    unique = self._unique_rows(batch, update_existing)
+                    futures = hashers.submit_hashing(
+                        pool,
+                        [row.get('password') for row in unique],
+                        processes,
+                    )
+
+                # Upis prethodne serije dok se tekuca hesira
+                if pending is not None:
+                    self._write_batch(*pending, update_existing, totals)
+                    if progress is not None:
+                        progress(
+                            totals['done'],
+                            totals['created'],
+                            totals['updated'],
+                            totals['skipped'],
+                        )
+
+                if not batch:
+                    break
+                pending = (unique, futures, len(batch))
+
+        return totals['created'], totals['updated'], totals['skipped']
+
+    def _unique_rows(self, rows, update_existing):
+        """Normalize emails, keep the last row per email."""
+        unique = {}
+        for row in rows:
+            row = dict(row)
+            if not row.get('email'):
+                raise ValueError('User must have an email')
+            row['email'] = self.normalize_email(row['email'])
+            unique[row['email']] = row
+
+        if not update_existing:
+            # Ne trosimo hesiranje na korisnike koji ce biti preskoceni
+            existing = self.filter(email__in=list(unique))
+            for email in existing.values_list('email', flat=True):
+                del unique[email]
+
+        return list(unique.values())
+
+    def _write_batch(self, rows, futures, count, update_existing, totals):
+        from core import hashers
+
+        hashes = hashers.collect_hashes(futures)
+        created = []
+        updated = []
+        fields = set()
+        with transaction.atomic(using=self._db):
+            # Prethodna serija je mozda upravo upisala neki od ovih emailova
+            existing = dict(
+                self.filter(
+                    email__in=[row['email'] for row in rows],
+                ).values_list('email', 'id')
+            )
+            for row, password in zip(rows, hashes):
+                user = self.model(**dict(row, password=password))
+                user.id = existing.get(user.email)
+                if user.id is None:
+                    created.append(user)
+                elif update_existing:
+                    fields.update(row)
+                    updated.append(user)
+
+            inserted = self._insert_new(created)
+            if updated:
+                fields.discard('email')
+                self.bulk_update(updated, sorted(fields | {'password'}))
+
+        totals['done'] += count
+        totals['created'] += inserted
+        totals['updated'] += len(updated)
+        totals['skipped'] += count - inserted - len(updated)
+
+    def _insert_new(self, users):
+        """Insert users whose email is still free, return how many."""
+        if not users:
+            return 0
+
+        # Paralelni import moze da ubaci isti email u medjuvremenu, takvi
+        # redovi se preskacu; bulk_create(ignore_conflicts) ne kaze koji
+        opts = self.model._meta
+        fields = [f for f in opts.concrete_fields if not f.primary_key]
+        rows = self._insert(
+            users,
+            fields=fields,
+            returning_fields=[opts.pk],
+            ignore_conflicts=True,
+            using=self.db,
+        )
+
+        # Jedan preskocen red vraca [None]
+        return sum(1 for row in rows if row)
+
     def create_superuser(self, email, password):
         user = self.create_user(email, password)
         user.is_superuser = True
@@ -59,10 +190,39 @@ class Recipe(models.Model):
     description = models.TextField(blank=True)
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+    )
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Polja odrzava core_track_change okidac u bazi (vidi 0009 i 0012),
+    # pa vaze i za bulk_update, update() i COPY. change_xid je transakcija
+    # koja je red poslednja menjala
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='core_recipe_sync_idx',
+            ),
+            models.Index(
+                fields=['user', 'change_xid', 'change_seq'],
+                name='core_recipe_sync_xid_idx',
+            ),
+        ]
+        constraints = [
+            # Liste za kupovinu dele sa brojem porcija
+            models.CheckConstraint(
+                check=models.Q(servings__gte=1),
+                name='core_recipe_servings_positive',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -74,6 +234,21 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='core_tag_sync_idx',
+            ),
+            models.Index(
+                fields=['user', 'change_xid', 'change_seq'],
+                name='core_tag_sync_xid_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -85,6 +260,186 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, editable=False)
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='core_ingredient_sync_idx',
+            ),
+            models.Index(
+                fields=['user', 'change_xid', 'change_seq'],
+                name='core_ingredient_sync_xid_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Tombstone(models.Model):
+    """Deleted recipe, tag or ingredient, kept for incremental sync."""
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    # Red brise baza (ON DELETE CASCADE iz 0009): okidac pravi tombstone
+    # tek kad ORM vec pokupi sta brise uz korisnika
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    change_seq = models.BigIntegerField()
+    change_xid = models.BigIntegerField(default=0)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'change_seq'],
+                name='core_tombstone_sync_idx',
+            ),
+            models.Index(
+                fields=['user', 'change_xid', 'change_seq'],
+                name='core_tombstone_sync_xid_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+class IdempotencyKey(models.Model):
+    """First response to a request sent with an Idempotency-Key header."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    # Podaci odgovora kao JSON kompresovan zlib-om (vidi core.idempotency)
+    response = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='core_idempotencykey_user_key',
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class Job(models.Model):
+    """Deferred unit of work, executed by the run_worker command."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Worker ga osvezava dok posao radi; posao bez osvezavanja je napusten
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker pita samo za spremne poslove u redu, pa je parcijalni
+            # indeks dovoljan i ostaje mali bez obzira na istoriju poslova
+            models.Index(
+                fields=['run_at', 'id'],
+                condition=models.Q(status='queued'),
+                name='core_job_queued_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+
+class SlowQuery(models.Model):
+    """Query that ran longer than SLOW_QUERY_THRESHOLD_MS in a request."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=64)
+    sql = models.TextField()
+    plan = models.TextField(blank=True)
+    method = models.CharField(max_length=16, blank=True)
+    path = models.CharField(max_length=2048, blank=True)
+    view = models.CharField(max_length=255, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+
+    class Meta:
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return f'{self.view or self.path} ({self.duration_ms:.0f} ms)'
+
+
+class RequestProfile(models.Model):
+    """Profile of one request, captured by ProfilingMiddleware."""
+    TRIGGER_REQUEST = 'request'
+    TRIGGER_USER = 'user'
+    TRIGGER_SAMPLE = 'sample'
+    TRIGGER_CHOICES = [
+        (TRIGGER_REQUEST, 'Requested by staff'),
+        (TRIGGER_USER, 'Profiled user'),
+        (TRIGGER_SAMPLE, 'Sampled'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=16)
+    path = models.CharField(max_length=2048)
+    view = models.CharField(max_length=255, blank=True)
+    status = models.PositiveSmallIntegerField()
+    mode = models.CharField(max_length=16)
+    trigger = models.CharField(max_length=16, choices=TRIGGER_CHOICES)
+    duration_ms = models.FloatField()
+    file = models.FileField(storage=ProfileStorage(), upload_to='')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+
+    def __str__(self):
+        return f'{self.view or self.path} ({self.duration_ms:.0f} ms)'
@@ -0,0 +1,93 @@
+"""
+Parsers shared by the API apps.
+"""
+import codecs
+import io
+
+import cbor2
+import msgpack
+import orjson
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import (
+    ORJSONRenderer,
+    MessagePackRenderer,
+    CBORRenderer,
+)
+
+
+class ORJSONParser(parsers.JSONParser):
+    """Drop-in replacement for DRF's JSONParser backed by orjson."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+
+        try:
+            # orjson cita samo UTF-8, ostala kodiranja prvo dekodiramo
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class BinaryParser(parsers.BaseParser):
+    """
+    Base for binary formats. Top level binary values are replaced with
+    uploaded files, so file fields (e.g. recipe images) validate the same
+    way they do for multipart uploads.
+    """
+
+    def loads(self, body):
+        raise NotImplementedError('.loads() must be overridden.')
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = self.loads(stream.read())
+        except Exception as exc:
+            format_name = self.renderer_class.format
+            raise ParseError(f'{format_name} parse error - {exc}')
+
+        if isinstance(data, dict):
+            for name, value in data.items():
+                if isinstance(value, bytes):
+                    data[name] = _to_uploaded_file(name, value)
+
+        return data
+
+
+class MessagePackParser(BinaryParser):
+    """Parse MessagePack request bodies."""
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def loads(self, body):
+        return msgpack.unpackb(body, raw=False)
+
+
+class CBORParser(BinaryParser):
+    """Parse CBOR request bodies."""
+    media_type = 'application/cbor'
+    renderer_class = CBORRenderer
+
+    def loads(self, body):
+        return cbor2.loads(body)
+
+
+def _to_uploaded_file(name, content):
+    """Wrap raw bytes in an uploaded file, named after the image format."""
+    try:
+        # Ekstenzija je bitna jer je validira ImageField
+        image_format = Image.open(io.BytesIO(content)).format
+        name = f'{name}.{image_format.lower()}'
+    except Exception:
+        pass
+
+    return SimpleUploadedFile(name, content)
@@ -0,0 +1,124 @@
+"""
+Per-request performance records.
+
+MetricsMiddleware activates a RequestRecord for every request and feeds
+its query count and time to the Prometheus histograms;
+SlowQueryMiddleware writes out the slow queries it collected and, for a
+sampled request, PerformanceMiddleware reports it (activating one itself
+when MetricsMiddleware is not installed). While it is active,
+queries on every connection (see core.backends.postgresql) and span()
+blocks add their time to it, in whatever thread the view runs, as long
+as the context is propagated. Outside requests (commands, jobs) there is
+no record.
+"""
+import contextvars
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from core import slow_queries
+
+
+logger = logging.getLogger('core.perf')
+
+_current = contextvars.ContextVar('perf_record', default=None)
+
+
+class RequestRecord:
+    """Timings collected for one request, in seconds."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.spans = defaultdict(float)
+        self.slow_queries = []
+        self._open = set()
+
+    def add(self, name, seconds):
+        self.spans[name] += seconds
+
+
+def current():
+    """Return the active RequestRecord, or None outside a request."""
+    return _current.get()
+
+
+def activate(record):
+    return _current.set(record)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the time of the block to the active record under name."""
+    record = _current.get()
+    # Ugnjezdeni span istog imena se ne broji dvaput
+    if record is None or name in record._open:
+        yield
+        return
+
+    record._open.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.add(name, time.perf_counter() - start)
+        record._open.discard(name)
+
+
+def view_name(request):
+    """Return e.g. 'RecipeViewSet.list' for the view that served request."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    func = match.func
+    cls = getattr(func, 'cls', None)
+    if cls is None:
+        return f'{func.__module__}.{func.__qualname__}'
+
+    method = request.method.lower()
+    action = getattr(func, 'actions', None) or {}
+    return f'{cls.__name__}.{action.get(method, method)}'
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper that counts and times queries of the active record,
+    and flags slow queries (see core.slow_queries).
+    """
+    record = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if record is not None:
+            record.queries += 1
+            record.db_time += duration
+
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold and duration * 1000 >= threshold:
+            slow_queries.flag(
+                record,
+                sql,
+                params,
+                many,
+                duration,
+                context['connection'].alias,
+            )
+
+
+class TimedSerializerMixin:
+    """Time to_representation() of a serializer as the 'serialize' span."""
+
+    def to_representation(self, instance):
+        with span('serialize'):
+            return super().to_representation(instance)
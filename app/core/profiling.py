@@ -0,0 +1,154 @@
+"""
+On-demand request profiling.
+
+ProfilingMiddleware profiles a request when a staff user asks for it
+(X-Profile header or ?_profile=), when the user is listed in
+PROFILE_USERS, or for a PROFILE_SAMPLE_RATE share of requests. The view
+runs under cProfile or under a statistical sampler, and the result is
+saved to PROFILE_ROOT and listed as a RequestProfile in the admin:
+cProfile runs produce a pstats file, sampler runs a collapsed stack file
+that flamegraph.pl and speedscope read.
+"""
+import contextvars
+import cProfile
+import marshal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import cached_property
+
+
+MODES = ('cprofile', 'sample')
+
+_pending = contextvars.ContextVar('pending_profiler', default=None)
+
+
+class ProfileStorage(FileSystemStorage):
+    """Local storage rooted at PROFILE_ROOT, outside MEDIA_ROOT."""
+
+    @property
+    def base_location(self):
+        return settings.PROFILE_ROOT
+
+    @property
+    def location(self):
+        return self.base_location
+
+    @cached_property
+    def base_url(self):
+        return None
+
+
+class Profiler:
+    """cProfile or stack sampler around the code run between start/stop."""
+
+    def __init__(self, mode, interval):
+        self.mode = mode
+        self.interval = interval
+        self.started = False
+        self.duration = 0.0
+        self._profile = None
+        self._samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = True
+        self._start_time = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            return
+
+        self._thread = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(),),
+            name='request-profiler',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+        else:
+            self._stop.set()
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start_time
+
+    def _sample(self, thread_id):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = frame.f_globals.get('__name__', '?')
+                stack.append(f'{module}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self._samples[';'.join(reversed(stack))] += 1
+
+    def output(self):
+        """Return (file extension, content) of the captured profile."""
+        if self.mode == 'cprofile':
+            # Isti format koji pise pstats.Stats.dump_stats
+            self._profile.create_stats()
+            return 'prof', marshal.dumps(self._profile.stats)
+
+        lines = (
+            f'{stack} {count}\n'
+            for stack, count in sorted(self._samples.items())
+        )
+        return 'collapsed', ''.join(lines).encode()
+
+
+def pending():
+    """Return the profiler the current request wants its view run under."""
+    return _pending.get()
+
+
+def set_pending(profiler):
+    return _pending.set(profiler)
+
+
+def reset_pending(token):
+    _pending.reset(token)
+
+
+def save(profiler, request, response, trigger, view):
+    """Store the profile file and its RequestProfile row."""
+    from core.models import RequestProfile
+
+    extension, content = profiler.output()
+    profile = RequestProfile(
+        method=request.method,
+        path=request.path,
+        view=view or '',
+        status=response.status_code,
+        mode=profiler.mode,
+        trigger=trigger,
+        duration_ms=round(profiler.duration * 1000, 3),
+        user=_user_or_none(request),
+    )
+    profile.file.save(
+        f'{uuid.uuid4()}.{extension}',
+        ContentFile(content),
+        save=False,
+    )
+    profile.save()
+
+    return profile
+
+
+def _user_or_none(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+
+    return None
@@ -0,0 +1,124 @@
+"""
+Renderers shared by the API apps.
+"""
+from datetime import timezone
+
+import cbor2
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    Datetimes are passed through to DRF's encoder so their formatting, and
+    with it the response body, stays identical to the stdlib renderer.
+    Anything orjson can't encode natively (Decimal, lazy translation
+    strings, querysets, ...) is handed to the same encoder. Integers
+    beyond 64 bits, which orjson rejects, fall back to the stdlib renderer.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        # orjson pise samo kompaktan UTF-8 izlaz (uvlacenje samo sa 2 razmaka)
+        # pa sve ostale varijante prepustamo standardnom rendereru
+        if (
+            self.get_indent(accepted_media_type, renderer_context)
+            or not api_settings.COMPACT_JSON
+            or not api_settings.UNICODE_JSON
+        ):
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context,
+            )
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=self.options,
+            )
+        except TypeError:
+            # orjson ne zna cele brojeve vece od 64 bita, stdlib zna
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context,
+            )
+
+        # Isto kao JSONRenderer: U+2028 i U+2029 su validni u JSON-u ali ne
+        # i u JavaScript-u, pa ih escape-ujemo
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+
+        return ret
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    Content type of server-sent event streams. Views stream the events
+    themselves, data rendered here (errors) becomes one 'error' event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return b'event: error\ndata: ' + ORJSONRenderer().render(data) + (
+            b'\n\n'
+        )
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Render responses as MessagePack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(
+            data,
+            default=_encoder.default,
+            use_bin_type=True,
+        )
+
+
+class CBORRenderer(renderers.BaseRenderer):
+    """Render responses as CBOR (RFC 8949)."""
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return cbor2.dumps(
+            data,
+            default=_cbor_default,
+            timezone=timezone.utc,
+        )
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(_encoder.default(value))
@@ -0,0 +1,106 @@
+"""
+Slow query log.
+
+core.perf.record_query hands every query slower than
+SLOW_QUERY_THRESHOLD_MS to flag(). Inside a request the query is kept on
+the request's perf record and SlowQueryMiddleware writes it out once the
+response is ready, with the request path, user and view action, and for
+a SLOW_QUERY_EXPLAIN_RATE share of them the plan from EXPLAIN. Entries go
+to the core.slow_queries logger (a rotating file) and the SlowQuery
+table. Outside requests the query is only logged.
+"""
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    connections,
+    transaction,
+)
+
+
+logger = logging.getLogger('core.slow_queries')
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class SlowQueryEntry:
+    """A flagged query and the parameters needed to EXPLAIN it."""
+
+    def __init__(self, sql, params, many, duration, database):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.duration_ms = round(duration * 1000, 3)
+        self.database = database
+
+
+def flag(record, sql, params, many, duration, database):
+    entry = SlowQueryEntry(sql, params, many, duration, database)
+    if record is not None:
+        record.slow_queries.append(entry)
+    else:
+        _log(entry, {}, '')
+
+
+def explain(entry):
+    """Return the plan of entry's query, '' when it cannot be explained."""
+    if entry.many or not entry.sql.lstrip().upper().startswith(EXPLAINABLE):
+        return ''
+
+    try:
+        # Savepoint, da neuspeo EXPLAIN ne pokvari tekucu transakciju
+        with transaction.atomic(using=entry.database):
+            with connections[entry.database].cursor() as cursor:
+                cursor.execute(
+                    f'EXPLAIN (ANALYZE off) {entry.sql}',
+                    entry.params,
+                )
+                return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError:
+        return ''
+
+
+def flush(request, entries, view):
+    """Log and store entries flagged while serving request."""
+    from core.models import SlowQuery
+
+    user = getattr(request, 'user', None)
+    context = {
+        'method': request.method,
+        'path': request.path,
+        'view': view or '',
+        'user_id': user.pk if getattr(user, 'is_authenticated', False)
+        else None,
+    }
+    rows = []
+    for entry in entries:
+        plan = ''
+        if random.random() < settings.SLOW_QUERY_EXPLAIN_RATE:
+            plan = explain(entry)
+        _log(entry, context, plan)
+        rows.append(SlowQuery(
+            duration_ms=entry.duration_ms,
+            database=entry.database,
+            sql=entry.sql,
+            plan=plan,
+            **context,
+        ))
+
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.bulk_create(rows)
+    except DatabaseError:
+        logger.exception('Could not store slow queries')
+
+
+def _log(entry, context, plan):
+    logger.warning(json.dumps({
+        'duration_ms': entry.duration_ms,
+        'database': entry.database,
+        **context,
+        'sql': entry.sql,
+        'plan': plan,
+    }))
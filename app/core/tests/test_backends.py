@@ -0,0 +1,64 @@
+"""
+Tests for the PostgreSQL backend health checks.
+"""
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.backends.postgresql.base import stats
+
+
+class HealthCheckTests(TransactionTestCase):
+    """Test persistent connections are checked before reuse."""
+
+    def setUp(self):
+        self.health_check_enabled = connection.health_check_enabled
+        connection.health_check_enabled = True
+        connection.ensure_connection()
+
+    def tearDown(self):
+        connection.health_check_enabled = self.health_check_enabled
+
+    def run_query(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_usable_connection_reused(self):
+        raw_connection = connection.connection
+        connection.close_if_unusable_or_obsolete()
+        reused = stats.reused
+
+        self.run_query()
+
+        self.assertIs(connection.connection, raw_connection)
+        self.assertEqual(stats.reused, reused + 1)
+
+    def test_unusable_connection_replaced(self):
+        raw_connection = connection.connection
+        connection.close_if_unusable_or_obsolete()
+        opened = stats.opened
+
+        with patch.object(connection, 'is_usable', return_value=False):
+            self.run_query()
+
+        self.assertIsNot(connection.connection, raw_connection)
+        self.assertEqual(stats.opened, opened + 1)
+
+    def test_checked_only_once_per_request(self):
+        connection.close_if_unusable_or_obsolete()
+
+        with patch.object(connection, 'is_usable') as patched_usable:
+            self.run_query()
+            self.run_query()
+
+        patched_usable.assert_called_once()
+
+    def test_health_checks_disabled(self):
+        connection.health_check_enabled = False
+        connection.close_if_unusable_or_obsolete()
+
+        with patch.object(connection, 'is_usable') as patched_usable:
+            self.run_query()
+
+        patched_usable.assert_not_called()
@@ -1,24 +1,32 @@
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
 
+@patch('core.management.commands.wait_for_db.connections')
 @patch('core.management.commands.wait_for_db.Command.check')
 class CommandTests(SimpleTestCase):
     """Test commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_check, patched_connections):
         """Test waiting for database if database is ready."""
         patched_check.return_value = True
 
         call_command('wait_for_db')
 
         patched_check.assert_called_once_with(databases=['default'])
+        patched_connections['default'].ensure_connection.assert_called()
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(
+        self,
+        patched_sleep,
+        patched_check,
+        patched_connections,
+    ):
         """Test waiting for database when operational errors occur."""
         patched_check.side_effect = (
             [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
@@ -28,3 +36,80 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+        # Kasnjenja rastu eksponencijalno, uz nasumican jitter
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, 0.1 * 2 ** attempt)
+
+    @patch('time.sleep')
+    def test_wait_for_db_each_database(
+        self,
+        patched_sleep,
+        patched_check,
+        patched_connections,
+    ):
+        """Test every requested database is checked."""
+        call_command(
+            'wait_for_db',
+            '--database=default',
+            '--database=replica_1',
+        )
+
+        self.assertEqual(patched_check.call_count, 2)
+        patched_check.assert_any_call(databases=['default'])
+        patched_check.assert_any_call(databases=['replica_1'])
+
+    def test_wait_for_db_only_default_without_database(
+        self,
+        patched_check,
+        patched_connections,
+    ):
+        """Test only the default database is checked without --database."""
+        call_command('wait_for_db')
+
+        patched_check.assert_called_once_with(databases=['default'])
+        aliases = {
+            call.args[0]
+            for call in patched_connections.__getitem__.call_args_list
+        }
+        self.assertEqual(aliases, {'default'})
+
+    @patch('time.monotonic')
+    @patch('time.sleep')
+    def test_wait_for_db_deadline(
+        self,
+        patched_sleep,
+        patched_monotonic,
+        patched_check,
+        patched_connections,
+    ):
+        """Test giving up once the timeout has passed."""
+        patched_check.side_effect = OperationalError
+        patched_monotonic.side_effect = [0, 5, 6, 11]
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout=10')
+
+        self.assertEqual(patched_check.call_count, 2)
+
+    @patch('core.management.commands.wait_for_db.MigrationExecutor')
+    @patch('time.sleep')
+    def test_wait_for_db_pending_migrations(
+        self,
+        patched_sleep,
+        patched_executor,
+        patched_check,
+        patched_connections,
+    ):
+        """Test waiting until pending migrations are applied."""
+        patched_executor.return_value.migration_plan.side_effect = [
+            ['0006_job'],
+            [],
+        ]
+
+        call_command('wait_for_db', '--migrations')
+
+        self.assertEqual(patched_check.call_count, 2)
+        patched_sleep.assert_called_once()
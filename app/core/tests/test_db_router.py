@@ -0,0 +1,209 @@
+"""
+Tests for read replica routing.
+"""
+from unittest.mock import (
+    patch,
+    MagicMock,
+)
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    RequestFactory,
+    override_settings,
+)
+
+from core import db_router
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+
+
+@patch('core.db_router.healthy_replicas', return_value=['replica_1'])
+class ReplicaRouterTests(TestCase):
+    """Test which database reads and writes are sent to."""
+
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+
+    def test_reads_outside_requests_use_primary(self, patched_healthy):
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_allowed_reads_use_replica(self, patched_healthy):
+        token = db_router.allow_replicas(True)
+        try:
+            # TestCase drzi otvorenu transakciju, pa je simuliramo zatvorenu
+            with patch.object(
+                db_router.connections['default'],
+                'in_atomic_block',
+                False,
+            ):
+                self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+        finally:
+            db_router.reset_replicas(token)
+
+    def test_reads_in_transaction_use_primary(self, patched_healthy):
+        token = db_router.allow_replicas(True)
+        try:
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        finally:
+            db_router.reset_replicas(token)
+
+    def test_request_reads_from_one_replica(self, patched_healthy):
+        patched_healthy.return_value = ['replica_1', 'replica_2']
+        token = db_router.allow_request_replicas(True)
+        try:
+            with patch.object(
+                db_router.connections['default'],
+                'in_atomic_block',
+                False,
+            ):
+                aliases = {
+                    self.router.db_for_read(Recipe) for _ in range(20)
+                }
+                # Izabrana replika ispadne, ostatak ide na drugu
+                patched_healthy.return_value = sorted(
+                    {'replica_1', 'replica_2'} - aliases,
+                )
+                later = {self.router.db_for_read(Recipe) for _ in range(20)}
+        finally:
+            db_router.reset_replicas(token)
+
+        self.assertEqual(len(aliases), 1)
+        self.assertEqual(later, set(patched_healthy.return_value))
+
+    def test_reads_outside_requests_pick_any_replica(self, patched_healthy):
+        patched_healthy.return_value = ['replica_1', 'replica_2']
+        token = db_router.allow_replicas(True)
+        try:
+            with patch.object(
+                db_router.connections['default'],
+                'in_atomic_block',
+                False,
+            ), patch(
+                'core.db_router.random.choice',
+                side_effect=lambda replicas: replicas[-1],
+            ) as patched_choice:
+                self.router.db_for_read(Recipe)
+                self.router.db_for_read(Recipe)
+        finally:
+            db_router.reset_replicas(token)
+
+        self.assertEqual(patched_choice.call_count, 2)
+
+    def test_no_healthy_replica_falls_back_to_primary(self, patched_healthy):
+        patched_healthy.return_value = []
+        token = db_router.allow_replicas(True)
+        try:
+            with patch.object(
+                db_router.connections['default'],
+                'in_atomic_block',
+                False,
+            ):
+                self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        finally:
+            db_router.reset_replicas(token)
+
+    def test_writes_use_primary(self, patched_healthy):
+        token = db_router.allow_replicas(True)
+        try:
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        finally:
+            db_router.reset_replicas(token)
+
+    def test_migrations_only_on_primary(self, patched_healthy):
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+
+
+@override_settings(DB_REPLICA_MAX_LAG=5)
+class ReplicaHealthTests(SimpleTestCase):
+    """Test replica lag checks."""
+
+    def patch_connections(self, replica):
+        return patch.object(
+            db_router,
+            'connections',
+            {'replica_1': replica},
+        )
+
+    def make_replica(self, lag=0, error=None):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (lag,)
+        if error:
+            cursor.execute.side_effect = error
+        replica = MagicMock()
+        replica.cursor.return_value.__enter__.return_value = cursor
+
+        return replica
+
+    def test_replica_within_lag_is_healthy(self):
+        with self.patch_connections(self.make_replica(lag=1)):
+            self.assertTrue(db_router.check_replica('replica_1'))
+
+    def test_lagging_replica_is_unhealthy(self):
+        with self.patch_connections(self.make_replica(lag=30)):
+            self.assertFalse(db_router.check_replica('replica_1'))
+
+    def test_unreachable_replica_is_unhealthy(self):
+        replica = self.make_replica(error=db_router.DatabaseError)
+
+        with self.patch_connections(replica):
+            self.assertFalse(db_router.check_replica('replica_1'))
+
+        replica.close.assert_called_once()
+
+
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test read-your-writes pinning."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.allowed = []
+        self.states = []
+
+        def get_response(request):
+            self.states.append(db_router._replicas_allowed.get())
+            self.allowed.append(bool(self.states[-1]))
+            return HttpResponse(status=201)
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def test_safe_request_allows_replicas(self):
+        self.middleware(self.factory.get('/api/recipe/recipes/'))
+        self.middleware(self.factory.get('/api/recipe/recipes/'))
+
+        self.assertEqual(self.allowed, [True, True])
+        # Svaki zahtev bira svoju repliku
+        self.assertIsInstance(self.states[0], db_router.RequestReplica)
+        self.assertIsNot(self.states[0], self.states[1])
+        self.assertFalse(db_router._replicas_allowed.get())
+
+    def test_write_pins_client_to_primary(self):
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+
+        res = self.middleware(
+            self.factory.post('/api/recipe/recipes/', **auth),
+        )
+        self.middleware(self.factory.get('/api/recipe/recipes/', **auth))
+        self.middleware(
+            self.factory.get(
+                '/api/recipe/recipes/',
+                HTTP_AUTHORIZATION='Token other',
+            ),
+        )
+
+        self.assertIn('db_pin', res.cookies)
+        self.assertEqual(self.allowed, [False, False, True])
+
+    def test_pin_cookie_forces_primary(self):
+        request = self.factory.get('/api/recipe/recipes/')
+        request.COOKIES['db_pin'] = '1'
+
+        self.middleware(request)
+
+        self.assertEqual(self.allowed, [False])
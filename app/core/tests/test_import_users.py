@@ -0,0 +1,141 @@
+"""
+Tests for bulk user provisioning.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import UserManager
+
+
+class BulkCreateUsersTests(TestCase):
+    """Test UserManager.bulk_create_users and import_users."""
+
+    def test_creates_users_with_hashed_passwords(self):
+        users = [
+            {'email': f'user{i}@EXAMPLE.com', 'password': f'pass{i}'}
+            for i in range(5)
+        ]
+        calls = []
+
+        totals = get_user_model().objects.bulk_create_users(
+            users,
+            batch_size=2,
+            processes=2,
+            progress=lambda *args: calls.append(args),
+        )
+
+        self.assertEqual(totals, (5, 0, 0))
+        self.assertEqual(calls[-1], (5, 5, 0, 0))
+        self.assertEqual(len(calls), 3)
+        user = get_user_model().objects.get(email='user3@example.com')
+        self.assertTrue(user.check_password('pass3'))
+
+    def test_upserts_existing_email(self):
+        existing = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='old',
+            name='Old',
+        )
+        users = [
+            {'email': 'user@example.com', 'password': 'new', 'name': 'New'},
+            {'email': 'other@example.com', 'password': 'other'},
+            {'email': 'other@example.com', 'password': 'last'},
+        ]
+
+        totals = get_user_model().objects.bulk_create_users(
+            users,
+            processes=1,
+        )
+
+        self.assertEqual(totals, (1, 1, 1))
+        existing.refresh_from_db()
+        self.assertEqual(existing.name, 'New')
+        self.assertTrue(existing.check_password('new'))
+        other = get_user_model().objects.get(email='other@example.com')
+        self.assertTrue(other.check_password('last'))
+
+    def test_conflicting_emails_counted_as_skipped(self):
+        users = [
+            {'email': 'dup@example.com', 'password': 'first'},
+            {'email': 'dup@example.com', 'password': 'second'},
+            {'email': 'other@example.com', 'password': 'other'},
+        ]
+
+        # Bez spajanja po emailu, kao da je paralelni import ubacio isti
+        # email posle provere postojecih
+        with patch.object(
+            UserManager,
+            '_unique_rows',
+            lambda manager, rows, update_existing: list(rows),
+        ):
+            totals = get_user_model().objects.bulk_create_users(
+                users,
+                processes=1,
+            )
+
+        self.assertEqual(totals, (2, 0, 1))
+        self.assertEqual(get_user_model().objects.count(), 2)
+
+    def test_single_conflicting_row_counted_as_skipped(self):
+        manager = get_user_model().objects
+        manager.create_user(email='dup@example.com', password='old')
+        user = get_user_model()(email='dup@example.com')
+
+        self.assertEqual(manager._insert_new([user]), 0)
+        self.assertEqual(
+            manager._insert_new([get_user_model()(email='new@example.com')]),
+            1,
+        )
+
+    def test_skip_existing(self):
+        get_user_model().objects.create_user(
+            email='user@example.com',
+            password='old',
+        )
+        users = [
+            {'email': 'user@example.com', 'password': 'new'},
+            {'email': 'new@example.com', 'password': 'new'},
+        ]
+
+        totals = get_user_model().objects.bulk_create_users(
+            users,
+            batch_size=1,
+            processes=1,
+            update_existing=False,
+        )
+
+        self.assertEqual(totals, (1, 0, 1))
+        user = get_user_model().objects.get(email='user@example.com')
+        self.assertTrue(user.check_password('old'))
+
+    def test_import_users_command(self):
+        with tempfile.NamedTemporaryFile(
+            'w',
+            suffix='.jsonl',
+            delete=False,
+        ) as source:
+            for i in range(3):
+                source.write(json.dumps({
+                    'email': f'user{i}@example.com',
+                    'password': 'test123',
+                    'name': f'User {i}',
+                }) + '\n')
+        self.addCleanup(os.remove, source.name)
+        out = StringIO()
+
+        call_command(
+            'import_users',
+            source.name,
+            '--processes', '1',
+            stdout=out,
+        )
+
+        self.assertIn('3 created, 0 updated, 0 skipped', out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 3)
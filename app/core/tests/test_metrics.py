@@ -0,0 +1,95 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from jobs import queue
+
+
+METRICS_URL = reverse('metrics')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(METRICS_QUEUE_CACHE_SECONDS=0, METRICS_TOKEN='')
+class MetricsApiTests(TestCase):
+    """Test request, cache and queue metrics."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_metrics(self):
+        labels = {'view': 'RecipeViewSet.list', 'method': 'GET'}
+        before = sample('http_request_duration_seconds_count', **labels)
+
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', **labels),
+            before + 1,
+        )
+        self.assertGreater(
+            sample(
+                'http_responses_total',
+                view='RecipeViewSet.list',
+                status='200',
+            ),
+            0,
+        )
+        self.assertGreater(
+            sample(
+                'http_request_db_queries_sum',
+                view='RecipeViewSet.list',
+            ),
+            0,
+        )
+
+    def test_cache_hits_and_misses(self):
+        hits = sample('cache_gets_total', result='hit')
+        misses = sample('cache_gets_total', result='miss')
+
+        cache.set('metrics-test', 1)
+        cache.get('metrics-test')
+        cache.get('metrics-missing')
+
+        self.assertEqual(sample('cache_gets_total', result='hit'), hits + 1)
+        self.assertEqual(
+            sample('cache_gets_total', result='miss'),
+            misses + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        queue.enqueue('jobs.purge_finished')
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn('job_queue_depth{name="jobs.purge_finished"} 1.0', body)
+        self.assertIn('view="RecipeViewSet.list"', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
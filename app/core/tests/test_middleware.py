@@ -0,0 +1,93 @@
+"""
+Tests for the path aware browser middleware.
+"""
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TestCase,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.middleware import (
+    ApiSessionMiddleware,
+    ApiCsrfViewMiddleware,
+    ApiAuthenticationMiddleware,
+    ApiMessageMiddleware,
+)
+
+
+class SkipForApiMiddlewareTests(TestCase):
+    """Test session, CSRF, auth and messages are skipped for the API."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.requests = []
+
+        def get_response(request):
+            self.requests.append(request)
+            return HttpResponse()
+
+        self.get_response = get_response
+
+    def run_middleware(self, path):
+        middleware = ApiSessionMiddleware(
+            ApiAuthenticationMiddleware(
+                ApiMessageMiddleware(self.get_response),
+            ),
+        )
+        middleware(self.factory.get(path))
+
+        return self.requests[-1]
+
+    def test_skipped_for_api(self):
+        request = self.run_middleware('/api/recipe/recipes/')
+
+        self.assertFalse(hasattr(request, 'session'))
+        self.assertFalse(hasattr(request, 'user'))
+        self.assertFalse(hasattr(request, '_messages'))
+
+    def test_kept_for_admin(self):
+        request = self.run_middleware('/admin/')
+
+        self.assertTrue(hasattr(request, 'session'))
+        self.assertTrue(hasattr(request, 'user'))
+        self.assertTrue(hasattr(request, '_messages'))
+
+    def test_csrf_skipped_for_api(self):
+        middleware = ApiCsrfViewMiddleware(self.get_response)
+
+        def view(request):
+            return HttpResponse()
+
+        api_request = self.factory.post('/api/user/create/')
+        admin_request = self.factory.post('/admin/login/')
+
+        self.assertIsNone(middleware.process_view(api_request, view, (), {}))
+        res = middleware.process_view(admin_request, view, (), {})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_api_sets_no_cookies(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(
+            reverse('recipe:recipe-list'),
+            HTTP_ACCEPT='text/html',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('csrftoken', res.cookies)
+        self.assertNotIn('sessionid', res.cookies)
+
+    def test_admin_login_uses_csrf(self):
+        res = self.client.get(reverse('admin:login'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('csrftoken', res.cookies)
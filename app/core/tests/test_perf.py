@@ -0,0 +1,86 @@
+"""
+Tests for per-request performance instrumentation.
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import perf
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def timing_names(header):
+    return [item.split(';')[0].strip() for item in header.split(',')]
+
+
+@override_settings(PERF_SAMPLE_RATE=1)
+class PerformanceMiddlewareTests(TestCase):
+    """Test Server-Timing headers and perf log lines."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_timings(self):
+        with self.assertLogs('core.perf', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            timing_names(res['Server-Timing']),
+            ['total', 'db', 'serialize', 'render'],
+        )
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'RecipeViewSet.list')
+        self.assertEqual(line['bytes'], len(res.content))
+        self.assertGreater(line['queries'], 0)
+        self.assertIn(f'{line["queries"]} queries', res['Server-Timing'])
+
+    def test_detail_view_name(self):
+        url = reverse('recipe:recipe-detail', args=(self.recipe.id,))
+
+        with self.assertLogs('core.perf', 'INFO') as logs:
+            res = self.client.get(url)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'RecipeViewSet.retrieve')
+        self.assertIn('serialize', timing_names(res['Server-Timing']))
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_nested_span_counted_once(self):
+        record = perf.RequestRecord()
+        token = perf.activate(record)
+        try:
+            with perf.span('serialize'):
+                with perf.span('serialize'):
+                    pass
+        finally:
+            perf.deactivate(token)
+
+        self.assertEqual(list(record.spans), ['serialize'])
@@ -0,0 +1,160 @@
+"""
+Tests for on-demand request profiling.
+"""
+import asyncio
+import pstats
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest.mock import (
+    AsyncMock,
+    patch,
+)
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.middleware import ProfilingMiddleware
+from core.models import (
+    Recipe,
+    RequestProfile,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test which requests get profiled and what is saved."""
+
+    def setUp(self):
+        self.profile_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_root)
+        settings_override = override_settings(
+            PROFILE_ROOT=self.profile_root,
+            PROFILE_SAMPLE_RATE=0,
+            PROFILE_USERS=[],
+            PROFILE_SAMPLE_INTERVAL=0.0005,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = get_user_model().objects.create_superuser(
+            'admin@example.com',
+            'test123',
+        )
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        for i in range(20):
+            Recipe.objects.create(
+                user=self.staff,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=Decimal('5.00'),
+            )
+
+    def get(self, user, **extra):
+        client = APIClient()
+        token = Token.objects.create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client.get(RECIPES_URL, **extra)
+
+    def test_staff_cprofile_header(self):
+        res = self.get(self.staff, HTTP_X_PROFILE='cprofile')
+
+        profile = RequestProfile.objects.get(id=res['X-Profile-Id'])
+        self.assertEqual(profile.trigger, RequestProfile.TRIGGER_REQUEST)
+        self.assertEqual(profile.mode, 'cprofile')
+        self.assertEqual(profile.view, 'RecipeViewSet.list')
+        self.assertEqual(profile.user, self.staff)
+        stats = pstats.Stats(profile.file.path)
+        self.assertTrue(stats.total_calls > 0)
+
+    def test_staff_sampler_query_flag(self):
+        res = self.get(self.staff, data={'_profile': 'sample'})
+
+        profile = RequestProfile.objects.get(id=res['X-Profile-Id'])
+        self.assertEqual(profile.mode, 'sample')
+        with profile.file.open('r') as collapsed:
+            lines = collapsed.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+
+    def test_flag_ignored_for_non_staff(self):
+        res = self.get(self.user, HTTP_X_PROFILE='1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_profiled_user(self):
+        with override_settings(PROFILE_USERS=['user@example.com']):
+            res = self.get(self.user)
+
+        profile = RequestProfile.objects.get(id=res['X-Profile-Id'])
+        self.assertEqual(profile.trigger, RequestProfile.TRIGGER_USER)
+
+    def test_sample_rate(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            res = self.get(self.user)
+
+        profile = RequestProfile.objects.get(id=res['X-Profile-Id'])
+        self.assertEqual(profile.trigger, RequestProfile.TRIGGER_SAMPLE)
+
+    def test_admin_lists_and_downloads(self):
+        res = self.get(self.staff, HTTP_X_PROFILE='cprofile')
+        profile = RequestProfile.objects.get(id=res['X-Profile-Id'])
+        self.client.force_login(self.staff)
+
+        res = self.client.get(reverse('admin:core_requestprofile_changelist'))
+        self.assertContains(res, 'RecipeViewSet.list')
+
+        res = self.client.get(
+            reverse('admin:core_requestprofile_download', args=(profile.id,))
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with profile.file.open('rb') as saved:
+            self.assertEqual(b''.join(res.streaming_content), saved.read())
+
+
+@override_settings(PROFILE_SAMPLE_RATE=0, PROFILE_USERS=[])
+class ProfilingMiddlewareAsyncTests(SimpleTestCase):
+    """Test the ASGI path only leaves the event loop to look up users."""
+
+    def setUp(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.middleware = ProfilingMiddleware(get_response)
+
+    def call(self, **extra):
+        request = RequestFactory().get(RECIPES_URL, **extra)
+        with patch(
+            'core.middleware.async_views.run_sync',
+            new_callable=AsyncMock,
+            return_value=(None, None),
+        ) as patched_run_sync:
+            response = asyncio.run(self.middleware(request))
+
+        self.assertEqual(response.status_code, 200)
+        return patched_run_sync
+
+    def test_unprofiled_request_stays_on_loop(self):
+        self.call().assert_not_awaited()
+
+    def test_profile_flag_looks_up_user_in_pool(self):
+        self.call(HTTP_X_PROFILE='cprofile').assert_awaited_once()
@@ -0,0 +1,146 @@
+"""
+Tests for the renderers and parsers.
+"""
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy as _
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import (
+    ORJSONParser,
+    MessagePackParser,
+    CBORParser,
+)
+from core.renderers import (
+    ORJSONRenderer,
+    MessagePackRenderer,
+    CBORRenderer,
+)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test rendering matches the stdlib JSONRenderer."""
+
+    def assertSameOutput(self, data):
+        self.assertEqual(
+            ORJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+    def test_render_matches_json_renderer(self):
+        self.assertSameOutput({
+            'id': 1,
+            'title': 'Čevapi  ',
+            'tags': [{'id': 2, 'name': 'Grill'}],
+            'ratio': 0.5,
+            'link': None,
+        })
+
+    def test_render_decimal(self):
+        self.assertSameOutput({'price': Decimal('5.25')})
+
+    def test_render_datetime(self):
+        self.assertSameOutput({
+            'created': datetime(2022, 10, 8, 15, 53, 1, 123456, timezone.utc),
+        })
+
+    def test_render_big_int_falls_back_to_json_renderer(self):
+        self.assertSameOutput({'servings': 99999999999999999999})
+
+    def test_render_lazy_string(self):
+        res = ORJSONRenderer().render({'detail': _('Not found.')})
+
+        self.assertEqual(res, b'{"detail":"Not found."}')
+
+    def test_render_none_returns_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_render_indent_falls_back_to_json_renderer(self):
+        data = {'id': 1, 'tags': []}
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test parsing request bodies."""
+
+    def test_parse(self):
+        stream = io.BytesIO('{"title": "Čorba", "price": "2.50"}'.encode())
+
+        data = ORJSONParser().parse(stream)
+
+        self.assertEqual(data, {'title': 'Čorba', 'price': '2.50'})
+
+    def test_parse_other_encoding(self):
+        stream = io.BytesIO('{"title": "Čorba"}'.encode('utf-16'))
+
+        data = ORJSONParser().parse(stream, parser_context={
+            'encoding': 'utf-16',
+        })
+
+        self.assertEqual(data, {'title': 'Čorba'})
+
+    def test_parse_invalid_json_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"title": '))
+
+
+class BinaryFormatTests(SimpleTestCase):
+    """Test MessagePack and CBOR round trips."""
+
+    data = {
+        'id': 1,
+        'price': '5.25',
+        'tags': [{'id': 2, 'name': 'Čorba'}],
+        'created': datetime(2022, 10, 8, 15, 53, tzinfo=timezone.utc),
+        'detail': _('Not found.'),
+    }
+    expected = {
+        'id': 1,
+        'price': '5.25',
+        'tags': [{'id': 2, 'name': 'Čorba'}],
+        'created': '2022-10-08T15:53:00Z',
+        'detail': 'Not found.',
+    }
+
+    def test_msgpack_round_trip(self):
+        body = MessagePackRenderer().render(self.data)
+
+        data = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(data, self.expected)
+
+    def test_cbor_round_trip(self):
+        body = CBORRenderer().render(self.data)
+
+        data = CBORParser().parse(io.BytesIO(body))
+
+        self.assertEqual(data['tags'], self.expected['tags'])
+        self.assertEqual(data['created'], self.data['created'])
+
+    def test_binary_values_parsed_as_files(self):
+        image = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(image, format='PNG')
+        body = MessagePackRenderer().render({
+            'title': 'Sample',
+            'image': image.getvalue(),
+        })
+
+        parsed = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(parsed['title'], 'Sample')
+        self.assertEqual(parsed['image'].name, 'image.png')
+        self.assertEqual(parsed['image'].read(), image.getvalue())
+
+    def test_invalid_body_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
@@ -0,0 +1,76 @@
+"""
+Tests for the seed_data management command.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+
+
+def seed(**options):
+    call_command(
+        'seed_data',
+        users=3,
+        recipes_per_user=5,
+        tags=4,
+        ingredients=6,
+        processes=1,
+        stdout=StringIO(),
+        **options,
+    )
+
+
+class SeedDataTests(TestCase):
+    """Test generating synthetic data."""
+
+    def test_seeds_users_and_related_objects(self):
+        seed()
+
+        users = get_user_model().objects.filter(email__startswith='seed')
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Tag.objects.count(), 12)
+        self.assertTrue(users[0].check_password('seed-password'))
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                set(recipe.tags.values_list('user', flat=True))
+                | set(recipe.ingredients.values_list('user', flat=True)),
+                {recipe.user_id},
+            )
+
+    def test_same_seed_replaces_with_same_data(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        seed(seed=7)
+        recipes = Recipe.objects.order_by('id').values_list(
+            'title',
+            'time_minutes',
+            'tags__name',
+        )
+        first = list(recipes)
+
+        seed(seed=7)
+
+        self.assertEqual(
+            list(recipes),
+            first,
+        )
+        self.assertEqual(get_user_model().objects.count(), 4)
+        self.assertTrue(get_user_model().objects.filter(id=other.id).exists())
+
+    def test_placeholder_images(self):
+        seed(images=1)
+
+        images = set(Recipe.objects.values_list('image', flat=True))
+        self.assertNotIn(None, images)
+        for name in images:
+            self.assertTrue(default_storage.exists(name))
+            self.addCleanup(default_storage.delete, name)
@@ -0,0 +1,131 @@
+"""
+Tests for the slow query log.
+"""
+import asyncio
+import json
+from decimal import Decimal
+from unittest.mock import (
+    AsyncMock,
+    patch,
+)
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import (
+    perf,
+    slow_queries,
+)
+from core.middleware import SlowQueryMiddleware
+from core.models import (
+    Recipe,
+    SlowQuery,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001, SLOW_QUERY_EXPLAIN_RATE=1)
+class SlowQueryLogTests(TestCase):
+    """Test slow queries are logged with request context and plans."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_queries_stored_with_context(self):
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        entry = SlowQuery.objects.filter(sql__contains='core_recipe').first()
+        self.assertEqual(entry.view, 'RecipeViewSet.list')
+        self.assertEqual(entry.path, RECIPES_URL)
+        self.assertEqual(entry.method, 'GET')
+        self.assertEqual(entry.user, self.user)
+        self.assertIn('Scan', entry.plan)
+        self.assertEqual(entry.database, 'default')
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'RecipeViewSet.list')
+        self.assertEqual(line['user_id'], self.user.id)
+
+    @override_settings(SLOW_QUERY_EXPLAIN_RATE=0)
+    def test_explain_sampled(self):
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            self.client.get(RECIPES_URL)
+
+        self.assertFalse(SlowQuery.objects.exclude(plan='').exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_disabled(self):
+        self.client.get(RECIPES_URL)
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_outside_request_only_logged(self):
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            Recipe.objects.count()
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_explain_skips_other_statements(self):
+        entry = slow_queries.SlowQueryEntry(
+            'SAVEPOINT "s1"',
+            None,
+            False,
+            1,
+            connection.alias,
+        )
+
+        self.assertEqual(slow_queries.explain(entry), '')
+
+
+class SlowQueryMiddlewareAsyncTests(SimpleTestCase):
+    """Test the ASGI path only leaves the event loop to write entries."""
+
+    def setUp(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.middleware = SlowQueryMiddleware(get_response)
+        self.record = perf.RequestRecord()
+        token = perf.activate(self.record)
+        self.addCleanup(perf.deactivate, token)
+
+    def call(self):
+        request = RequestFactory().get('/api/recipe/recipes/')
+        with patch(
+            'core.middleware.async_views.run_sync',
+            new_callable=AsyncMock,
+        ) as patched_run_sync:
+            asyncio.run(self.middleware(request))
+
+        return patched_run_sync
+
+    def test_no_slow_queries_stays_on_loop(self):
+        self.call().assert_not_awaited()
+
+    def test_slow_queries_flushed_in_pool(self):
+        self.record.slow_queries.append(object())
+
+        self.call().assert_awaited_once()
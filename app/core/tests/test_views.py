@@ -0,0 +1,71 @@
+"""
+Tests for the health check endpoints.
+"""
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+
+from core import views
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+@override_settings(READINESS_CACHE_SECONDS=0)
+class HealthCheckApiTests(TestCase):
+    """Test /healthz and /readyz."""
+
+    def test_healthz(self):
+        res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz(self):
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['checks'], {
+            'database:default': 'ok',
+            'cache': 'ok',
+            'storage': 'ok',
+        })
+
+    @patch('core.views.cache.get', return_value=None)
+    def test_readyz_cache_unavailable(self, patched_get):
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertNotEqual(res.json()['checks']['cache'], 'ok')
+
+    def test_readyz_database_unavailable(self):
+        with patch.object(
+            views.connections['default'],
+            'cursor',
+            side_effect=OperationalError,
+        ):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(
+            res.json()['checks']['database:default'],
+            'error: OperationalError',
+        )
+
+    @override_settings(READINESS_CACHE_SECONDS=60)
+    @patch('core.views._check_readiness', return_value=(True, {}))
+    def test_readyz_result_reused(self, patched_check):
+        views._last_readiness = (None, None)
+
+        self.client.get(READYZ_URL)
+        self.client.get(READYZ_URL)
+
+        patched_check.assert_called_once()
+        views._last_readiness = (None, None)
@@ -0,0 +1,121 @@
+"""
+Liveness and readiness probes, and the Prometheus metrics endpoint.
+
+These are plain Django views (no DRF, no authentication) so the proxy
+and the scraper can hit them often. Readiness results are reused for
+READINESS_CACHE_SECONDS within a process.
+"""
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import (
+    connections,
+    DEFAULT_DB_ALIAS,
+)
+from django.http import (
+    HttpResponse,
+    JsonResponse,
+)
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core import metrics as core_metrics
+
+
+_last_readiness = (None, None)
+
+
+def healthz(request):
+    """Liveness: the process is up and able to answer requests."""
+    return JsonResponse({'status': 'ok'})
+
+
+def metrics(request):
+    """Prometheus metrics aggregated over all worker processes."""
+    token = settings.METRICS_TOKEN
+    if token and request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponse(status=403)
+
+    return HttpResponse(
+        core_metrics.render(),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+def readyz(request):
+    """Readiness: database, cache and storage are all usable."""
+    global _last_readiness
+
+    checked_at, result = _last_readiness
+    now = time.monotonic()
+    if (
+        checked_at is None
+        or now - checked_at >= settings.READINESS_CACHE_SECONDS
+    ):
+        result = _check_readiness()
+        _last_readiness = (now, result)
+
+    ready, checks = result
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'checks': checks},
+        status=200 if ready else 503,
+    )
+
+
+def _check_readiness():
+    checks = {
+        f'database:{alias}': _check_database(alias)
+        for alias in connections
+    }
+    checks['cache'] = _check_cache()
+    checks['storage'] = _check_storage()
+
+    # Replike nisu obavezne: ruter se vraca na primarnu bazu ako padnu
+    required = [
+        name for name in checks
+        if not name.startswith('database:')
+        or name == f'database:{DEFAULT_DB_ALIAS}'
+    ]
+    ready = all(checks[name] == 'ok' for name in required)
+
+    return ready, checks
+
+
+def _check_database(alias):
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception as exc:
+        return f'error: {exc.__class__.__name__}'
+
+    return 'ok'
+
+
+def _check_cache():
+    key = 'readyz:probe'
+    value = uuid.uuid4().hex
+    try:
+        cache.set(key, value, 10)
+        if cache.get(key) != value:
+            return 'error: value not stored'
+    except Exception as exc:
+        return f'error: {exc.__class__.__name__}'
+
+    return 'ok'
+
+
+def _check_storage():
+    location = getattr(default_storage, 'location', None)
+    try:
+        if location is not None:
+            if not os.access(location, os.W_OK):
+                return 'error: not writable'
+        elif not default_storage.exists(''):
+            return 'error: not available'
+    except Exception as exc:
+        return f'error: {exc.__class__.__name__}'
+
+    return 'ok'
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    """Django command to process queued background jobs."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Number of jobs executed at the same time.',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Run jobs in a thread pool or a process pool.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls of an empty queue.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once there are no more ready jobs.',
+        )
+
+    def handle(self, *args, **options):
+        """Command entrypoint."""
+        worker = Worker(
+            concurrency=options['concurrency'],
+            pool=options['pool'],
+            poll_interval=options['poll_interval'],
+        )
+        if not options['burst']:
+            worker.install_signal_handlers()
+
+        self.stdout.write(
+            f'Starting worker ({options["pool"]} pool, '
+            f'concurrency {options["concurrency"]}) ...'
+        )
+        executed = worker.run(burst=options['burst'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Worker executed {executed} jobs')
+        )
@@ -0,0 +1,147 @@
+"""
+Database-backed job queue.
+
+Jobs are rows in the core Job table. Workers claim ready rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker processes can
+poll the same table without handing the same job out twice. While a job
+runs its worker refreshes heartbeat_at; a running job whose heartbeat
+is older than the stale timeout lost its worker and is requeued, or
+failed once it used up its attempts.
+"""
+import random
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    F,
+    Q,
+)
+from django.utils import timezone
+
+from core.models import Job
+
+
+_registry = {}
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+
+def task(name):
+    """Register a function as a job handler under the given name."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    """Return the handler registered under the given name."""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'No task registered as {name!r}')
+
+
+def enqueue(name, payload=None, user=None, run_at=None, max_attempts=3):
+    """Create and return a queued job for a registered task."""
+    get_task(name)
+
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        user=user,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def backoff_delay(attempts):
+    """Return exponential backoff with full jitter for a failed attempt."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts)
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` ready jobs as running and return their ids."""
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.STATUS_QUEUED,
+                run_at__lte=now,
+            ).order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+        )
+        Job.objects.filter(id__in=job_ids).update(
+            status=Job.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    return job_ids
+
+
+def heartbeat(job_ids):
+    """Mark jobs as still being run by this worker."""
+    return Job.objects.filter(
+        id__in=job_ids,
+        status=Job.STATUS_RUNNING,
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(timeout):
+    """
+    Requeue jobs whose worker stopped sending heartbeats for `timeout`,
+    or fail them when no attempts are left. Return how many were found.
+    """
+    now = timezone.now()
+    cutoff = now - timeout
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff)
+        # Poslovi preuzeti pre uvodjenja heartbeat-a
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=Job.STATUS_RUNNING,
+    )
+    with transaction.atomic():
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.STATUS_FAILED,
+            last_error='Worker stopped while running the job.',
+            finished_at=now,
+        )
+        requeued = stale.update(status=Job.STATUS_QUEUED, run_at=now)
+
+    return failed + requeued
+
+
+def execute_job(job_id):
+    """Run a claimed job and record its outcome."""
+    job = Job.objects.get(id=job_id)
+    try:
+        result = get_task(job.name)(**job.payload)
+    except Exception:
+        _record_failure(job, traceback.format_exc())
+    else:
+        job.status = Job.STATUS_SUCCEEDED
+        job.result = result
+        job.last_error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=[
+            'status', 'result', 'last_error', 'finished_at',
+        ])
+
+    return job.status
+
+
+def _record_failure(job, error):
+    job.last_error = error
+    if job.attempts < job.max_attempts:
+        job.status = Job.STATUS_QUEUED
+        job.run_at = timezone.now() + backoff_delay(job.attempts)
+    else:
+        job.status = Job.STATUS_FAILED
+        job.finished_at = timezone.now()
+
+    job.save(update_fields=['last_error', 'status', 'run_at', 'finished_at'])
@@ -0,0 +1,26 @@
+"""
+Entry points executed inside worker pool threads and processes.
+
+This module must not import models at import time: spawned processes
+unpickle these functions before Django has been set up.
+"""
+import django
+from django.db import connections
+
+
+def init_process():
+    """Prepare a spawned pool process for running jobs."""
+    django.setup()
+
+
+def execute(job_id):
+    """Run a single claimed job."""
+    from jobs.queue import execute_job
+
+    # Posao moze da traje dugo, a nit pool-a nema kraj zahteva koji bi
+    # zatvorio konekciju, pa je zatvaramo odmah (i ne ostaje visiti kad se
+    # pool ugasi)
+    try:
+        return execute_job(job_id)
+    finally:
+        connections.close_all()
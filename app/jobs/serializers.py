@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from core.models import Job
+from core.perf import TimedSerializerMixin
+
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'run_at',
+            'result', 'last_error', 'created_at', 'started_at', 'heartbeat_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
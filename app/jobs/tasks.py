@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import Job
+from jobs.queue import task
+
+
+@task('jobs.purge_finished')
+def purge_finished(days=7, batch_size=1000):
+    """Delete finished jobs older than `days`, in small batches."""
+    cutoff = timezone.now() - timedelta(days=days)
+    finished = Job.objects.filter(
+        status__in=[Job.STATUS_SUCCEEDED, Job.STATUS_FAILED],
+        finished_at__lt=cutoff,
+    )
+    deleted = 0
+    while True:
+        # Brisemo u serijama da ne bismo drzali dugu transakciju i zakljucali
+        # veliki broj redova odjednom
+        batch = list(finished.values_list('id', flat=True)[:batch_size])
+        if not batch:
+            break
+        deleted += Job.objects.filter(id__in=batch).delete()[0]
+
+    return {'deleted': deleted}
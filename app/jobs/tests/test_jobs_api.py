@@ -0,0 +1,71 @@
+"""
+Tests for the job status API.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Job
+
+
+JOBS_URL = reverse('jobs:job-list')
+
+
+def detail_url(job_id):
+    return reverse('jobs:job-detail', args=(job_id,))
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class PublicJobsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateJobsApiTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_limited_to_user(self):
+        other_user = create_user(email='other@example.com')
+        Job.objects.create(name='jobs.purge_finished', user=other_user)
+        job = Job.objects.create(name='jobs.purge_finished', user=self.user)
+
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['id'], job.id)
+        self.assertEqual(res.data[0]['status'], Job.STATUS_QUEUED)
+
+    def test_get_job_detail(self):
+        job = Job.objects.create(
+            name='jobs.purge_finished',
+            user=self.user,
+            status=Job.STATUS_SUCCEEDED,
+            result={'deleted': 3},
+        )
+
+        res = self.client.get(detail_url(job.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['result'], {'deleted': 3})
+
+    def test_other_users_job_not_found(self):
+        other_user = create_user(email='other@example.com')
+        job = Job.objects.create(name='jobs.purge_finished', user=other_user)
+
+        res = self.client.get(detail_url(job.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
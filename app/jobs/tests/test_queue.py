@@ -0,0 +1,158 @@
+"""
+Tests for the background job queue.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+)
+from django.utils import timezone
+
+from core.models import Job
+from jobs import queue
+
+
+@queue.task('tests.add')
+def add_task(x, y):
+    return x + y
+
+
+@queue.task('tests.fail')
+def fail_task():
+    raise RuntimeError('Boom')
+
+
+class QueueTests(TestCase):
+    """Test enqueueing, claiming and executing jobs."""
+
+    def test_enqueue_unknown_task_raises_error(self):
+        with self.assertRaises(LookupError):
+            queue.enqueue('tests.missing')
+
+    def test_claim_marks_ready_jobs_running(self):
+        ready = queue.enqueue('tests.add', {'x': 1, 'y': 2})
+        later = queue.enqueue(
+            'tests.add',
+            {'x': 1, 'y': 2},
+            run_at=timezone.now() + timedelta(hours=1),
+        )
+
+        claimed = queue.claim_jobs(10)
+
+        self.assertEqual(claimed, [ready.id])
+        ready.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(ready.status, Job.STATUS_RUNNING)
+        self.assertEqual(ready.attempts, 1)
+        self.assertEqual(later.status, Job.STATUS_QUEUED)
+
+    def test_claim_respects_limit(self):
+        for _ in range(3):
+            queue.enqueue('tests.add', {'x': 1, 'y': 1})
+
+        self.assertEqual(len(queue.claim_jobs(2)), 2)
+        self.assertEqual(len(queue.claim_jobs(2)), 1)
+
+    def test_execute_job_success(self):
+        job = queue.enqueue('tests.add', {'x': 2, 'y': 3})
+        queue.claim_jobs(1)
+
+        queue.execute_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, 5)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failed_job_retried_with_backoff(self):
+        job = queue.enqueue('tests.fail', max_attempts=2)
+        queue.claim_jobs(1)
+
+        queue.execute_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Boom', job.last_error)
+
+    def test_failed_job_gives_up_after_max_attempts(self):
+        job = queue.enqueue('tests.fail', max_attempts=1)
+        queue.claim_jobs(1)
+
+        queue.execute_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+
+    def test_requeue_stale_jobs(self):
+        job = queue.enqueue('tests.add', {'x': 1, 'y': 1})
+        queue.claim_jobs(1)
+        Job.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(hours=2),
+            heartbeat_at=timezone.now() - timedelta(hours=2),
+        )
+
+        queue.requeue_stale_jobs(timedelta(hours=1))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+
+    def test_requeue_skips_long_job_with_recent_heartbeat(self):
+        job = queue.enqueue('tests.add', {'x': 1, 'y': 1})
+        queue.claim_jobs(1)
+        Job.objects.filter(id=job.id).update(
+            started_at=timezone.now() - timedelta(hours=2),
+        )
+        queue.heartbeat([job.id])
+
+        self.assertEqual(queue.requeue_stale_jobs(timedelta(hours=1)), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+
+    def test_requeue_fails_stale_job_out_of_attempts(self):
+        job = queue.enqueue('tests.add', {'x': 1, 'y': 1}, max_attempts=1)
+        queue.claim_jobs(1)
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=2),
+        )
+
+        self.assertEqual(queue.requeue_stale_jobs(timedelta(hours=1)), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_purge_finished_task(self):
+        old = queue.enqueue('tests.add', {'x': 1, 'y': 1})
+        Job.objects.filter(id=old.id).update(
+            status=Job.STATUS_SUCCEEDED,
+            finished_at=timezone.now() - timedelta(days=30),
+        )
+        fresh = queue.enqueue('tests.add', {'x': 1, 'y': 1})
+
+        result = queue.get_task('jobs.purge_finished')(days=7)
+
+        self.assertEqual(result, {'deleted': 1})
+        self.assertFalse(Job.objects.filter(id=old.id).exists())
+        self.assertTrue(Job.objects.filter(id=fresh.id).exists())
+
+
+class WorkerCommandTests(TransactionTestCase):
+    """Test the run_worker command."""
+
+    def test_run_worker_burst(self):
+        jobs = [queue.enqueue('tests.add', {'x': i, 'y': i}) for i in range(5)]
+
+        out = StringIO()
+        call_command('run_worker', '--burst', '--concurrency=2', stdout=out)
+
+        self.assertIn('Worker executed 5 jobs', out.getvalue())
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+            self.assertEqual(job.result, job.payload['x'] * 2)
@@ -0,0 +1,18 @@
+from django.urls import (
+    path,
+    include,
+)
+from rest_framework.routers import DefaultRouter
+
+from jobs import views
+
+
+router = DefaultRouter()
+router.register('jobs', views.JobViewSet)
+
+app_name = 'jobs'
+
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
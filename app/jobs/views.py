@@ -0,0 +1,18 @@
+from rest_framework import viewsets
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+
+from core.models import Job
+from jobs import serializers
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of background jobs started by the authenticated user."""
+    serializer_class = serializers.JobSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    queryset = Job.objects.all()
+
+    def get_queryset(self):
+        """Return jobs only for authenticated user."""
+        return self.queryset.filter(user=self.request.user).order_by('-id')
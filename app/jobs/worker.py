@@ -0,0 +1,104 @@
+"""
+Polling worker that runs queued jobs in a thread or process pool.
+"""
+import multiprocessing
+import signal
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    wait,
+)
+from datetime import timedelta
+
+from jobs import (
+    queue,
+    runner,
+)
+
+
+class Worker:
+    """Claim ready jobs and execute them with bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency=4,
+        pool='thread',
+        poll_interval=1.0,
+        stale_timeout=timedelta(minutes=30),
+        heartbeat_interval=timedelta(seconds=30),
+    ):
+        if pool not in ('thread', 'process'):
+            raise ValueError(f'Unknown pool type: {pool}')
+
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self._running = False
+
+    def _make_executor(self):
+        if self.pool == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=runner.init_process,
+            )
+
+        return ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix='job-worker',
+        )
+
+    def stop(self, *args):
+        """Finish running jobs and exit the loop."""
+        self._running = False
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run(self, burst=False):
+        """
+        Process jobs until stopped. With burst=True, return as soon as the
+        queue has no ready jobs. Returns the number of jobs executed.
+        """
+        self._running = True
+        executed = 0
+        # future -> id posla, za heartbeat poslova koji jos rade
+        in_flight = {}
+        queue.requeue_stale_jobs(self.stale_timeout)
+        interval = self.heartbeat_interval.total_seconds()
+        next_heartbeat = time.monotonic() + interval
+
+        with self._make_executor() as executor:
+            while self._running or in_flight:
+                claimed = []
+                free_slots = self.concurrency - len(in_flight)
+                if self._running and free_slots > 0:
+                    claimed = queue.claim_jobs(free_slots)
+                    for job_id in claimed:
+                        future = executor.submit(runner.execute, job_id)
+                        in_flight[future] = job_id
+
+                if in_flight:
+                    done, _ = wait(
+                        list(in_flight),
+                        timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    executed += len(done)
+                    for future in done:
+                        del in_flight[future]
+                        future.result()
+                    if in_flight and time.monotonic() >= next_heartbeat:
+                        queue.heartbeat(list(in_flight.values()))
+                        next_heartbeat = time.monotonic() + interval
+                elif burst:
+                    break
+                elif not claimed:
+                    time.sleep(self.poll_interval)
+
+        return executed
@@ -0,0 +1,271 @@
+"""
+Server-sent events stream of a user's changes.
+
+Every event is one recipe.sync page: its `id` is the page's `next` token
+and its data the page as JSON, so a client that reconnects with
+Last-Event-ID (or ?since=) continues exactly where it stopped. The
+stream waits on core.events for the user's change notifications, sends
+a comment every SSE_HEARTBEAT_SECONDS in between and ends after
+SSE_MAX_SECONDS; the client then reconnects after `retry` milliseconds.
+Changes that sync held back behind an older open transaction (which may
+not notify this user at all) are read again on every heartbeat.
+
+Under WSGI ChangeFeedView streams with stream() and holds a worker for
+as long as the client stays connected, so a process serves at most
+SSE_WSGI_STREAMS of them (none by default) and answers the rest with
+503. Django 3.2 iterates streaming responses on the event loop under
+ASGI, so there app.asgi routes FEED_PATH to asgi_app, which waits on the
+loop and only reads changes in the async view pool: live clients need
+SERVER_MODE=asgi.
+"""
+import asyncio
+import io
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from rest_framework.authentication import TokenAuthentication
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+)
+from rest_framework.request import Request
+
+from core import (
+    db_router,
+    events,
+)
+from core.async_views import run_sync
+from core.renderers import ORJSONRenderer
+from recipe import sync
+
+
+FEED_PATH = '/api/recipe/changes/'
+HEARTBEAT = b': heartbeat\n\n'
+
+
+class StreamsExhausted(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'No event stream available, retry later.'
+    default_code = 'streams_exhausted'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF postavlja Retry-After iz wait, kao za Throttled
+        self.wait = wait
+
+
+class StreamSlots:
+    """Event streams a WSGI process holds, each taking a worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def hold(self, stream):
+        """Return stream holding a slot until it is closed."""
+        with self._lock:
+            if self.active >= settings.SSE_WSGI_STREAMS:
+                raise StreamsExhausted(
+                    wait=math.ceil(settings.SSE_RETRY_MS / 1000),
+                )
+            self.active += 1
+
+        return HeldStream(stream, self.release)
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class HeldStream:
+    """Iterator that calls release once when the response closes it."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._stream)
+
+    def close(self):
+        # Neotpocet generator ne izvrsava finally, slot se oslobadja ovde
+        release, self._release = self._release, None
+        try:
+            self._stream.close()
+        finally:
+            if release is not None:
+                release()
+
+
+wsgi_slots = StreamSlots()
+
+
+def parse_since(last_event_id, since):
+    """Return the token to resume from, Last-Event-ID first."""
+    return sync.parse_token(last_event_id or since)
+
+
+class ChangeFeed:
+    """Changes of one user, read as SSE events from the last one sent."""
+
+    def __init__(self, user, since, context=None):
+        self.user = user
+        self.since = since
+        self.context = context
+        # Promene iza starije otvorene transakcije ne stizu uz notifikaciju
+        self.held_back = False
+
+    def preamble(self):
+        return f'retry: {settings.SSE_RETRY_MS}\n\n'.encode()
+
+    def read(self):
+        """Return the events of all changes since the last read."""
+        # Posle notifikacije replika mozda jos nema promenu
+        token = db_router.allow_replicas(False)
+        try:
+            chunks = []
+            while True:
+                page = sync.changes(
+                    self.user,
+                    self.since,
+                    settings.SYNC_PAGE_SIZE,
+                    context=self.context,
+                )
+                self.held_back = page['held_back']
+                position = sync.parse_token(page['next'])
+                if position == self.since:
+                    break
+                self.since = position
+                chunks.append(
+                    f'id: {page["next"]}\nevent: changes\ndata: '.encode()
+                    + ORJSONRenderer().render(page)
+                    + b'\n\n'
+                )
+                if not page['has_more']:
+                    break
+        finally:
+            db_router.reset_replicas(token)
+
+        return b''.join(chunks)
+
+    def stream(self):
+        """Yield the stream until SSE_MAX_SECONDS pass or the client goes."""
+        deadline = time.monotonic() + settings.SSE_MAX_SECONDS
+        subscription = events.listener.subscribe(self.user.id)
+        try:
+            yield self.preamble() + self.read()
+            while time.monotonic() < deadline:
+                timeout = min(
+                    settings.SSE_HEARTBEAT_SECONDS,
+                    deadline - time.monotonic(),
+                )
+                woken = subscription.wait(max(timeout, 0))
+                if woken or self.held_back:
+                    yield self.read() or HEARTBEAT
+                else:
+                    yield HEARTBEAT
+        finally:
+            events.listener.unsubscribe(self.user.id, subscription)
+
+
+def _in_pool(func, *args):
+    # Kao async_views._call_view, pool niti nemaju request signale
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def _authenticate(request):
+    result = TokenAuthentication().authenticate(Request(request))
+    if result is None:
+        raise NotAuthenticated()
+
+    return result[0]
+
+
+async def _respond(send, status, body, content_type=b'application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type)],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def asgi_app(scope, receive, send):
+    """ASGI application serving FEED_PATH without holding a thread."""
+    request = ASGIRequest(scope, io.BytesIO())
+    try:
+        user = await run_sync(_in_pool, _authenticate, request)
+    except (AuthenticationFailed, NotAuthenticated) as exc:
+        body = ORJSONRenderer().render({'detail': exc.detail})
+        return await _respond(send, 401, body)
+    try:
+        since = parse_since(
+            request.headers.get('Last-Event-ID'),
+            request.GET.get('since'),
+        )
+    except ValueError:
+        body = ORJSONRenderer().render({'since': 'Invalid sync token.'})
+        return await _respond(send, 400, body)
+
+    feed = ChangeFeed(user, since, context={'request': request})
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SSE_MAX_SECONDS
+    subscription = events.listener.subscribe(user.id, loop=loop)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        body = feed.preamble() + await run_sync(_in_pool, feed.read)
+        while True:
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+            timeout = min(
+                settings.SSE_HEARTBEAT_SECONDS,
+                deadline - loop.time(),
+            )
+            if timeout <= 0 or disconnected.done():
+                break
+            woken = asyncio.ensure_future(subscription.wait_async(timeout))
+            await asyncio.wait(
+                [woken, disconnected],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected.done():
+                woken.cancel()
+                break
+            body = HEARTBEAT
+            if woken.result() or feed.held_back:
+                body = await run_sync(_in_pool, feed.read) or HEARTBEAT
+        if not disconnected.done():
+            await send({'type': 'http.response.body'})
+    finally:
+        disconnected.cancel()
+        events.listener.unsubscribe(user.id, subscription)
+
+
+async def _disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
@@ -0,0 +1,140 @@
+"""
+Read-only fast path for list endpoints.
+
+A ValuesReader is compiled once from a serializer class and then builds the
+same dicts the serializer would, straight from .values() rows. Nested many
+serializers over M2M fields are filled from a single query on the through
+table, grouped by the parent id, instead of one serializer per row. Nested
+rows come out in primary key order, the order the related tables are
+scanned in when the serializer reads the relation itself.
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+
+
+# Polja cija je reprezentacija ista kao vrednost iz baze
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+# Polja kojima treba objekat (ili request), a ne sirova vrednost kolone
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.FileField,
+    serializers.RelatedField,
+    serializers.ManyRelatedField,
+)
+
+
+class ValuesReader:
+    """Serializer-compatible reader for read-only list responses."""
+
+    def __init__(self, serializer_class, **kwargs):
+        self.model = serializer_class.Meta.model
+        self.columns = []
+        self.converters = []
+        self.relations = []
+        self.hidden_id = False
+
+        for name, field in serializer_class(**kwargs).fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                child = ValuesReader(type(field.child))
+                self._add_relation(name, field, child)
+            elif isinstance(field, serializers.ManyRelatedField):
+                # Nerasirena relacija: samo lista id-jeva
+                self._add_relation(name, field, None)
+            elif field.source != name or isinstance(field, UNSUPPORTED_FIELDS):
+                raise ValueError(
+                    f'{serializer_class.__name__}.{name} can not be read '
+                    'from .values() rows'
+                )
+            else:
+                self.columns.append(name)
+                self.converters.append(
+                    None if isinstance(field, IDENTITY_FIELDS)
+                    else field.to_representation
+                )
+
+        if self.relations and 'id' not in self.columns:
+            # Relacije se spajaju po id-ju, klijent ga nije trazio
+            self.columns.append('id')
+            self.converters.append(None)
+            self.hidden_id = True
+
+    def _add_relation(self, name, field, child):
+        m2m = self.model._meta.get_field(field.source)
+        if not m2m.many_to_many:
+            raise ValueError(f'{name} is not a many-to-many field')
+
+        if child is not None and child.relations:
+            raise ValueError(f'{name} has nested relations of its own')
+
+        self.relations.append((name, child, m2m))
+
+    def _to_dict(self, values):
+        return {
+            column: (
+                value if convert is None or value is None
+                else convert(value)
+            )
+            for column, convert, value in zip(
+                self.columns,
+                self.converters,
+                values,
+            )
+        }
+
+    def _read_related(self, m2m, child, ids):
+        """Return {parent id: [child, ...]} for the given parents."""
+        source = m2m.m2m_field_name()
+        target = m2m.m2m_reverse_field_name()
+        through = m2m.remote_field.through.objects.filter(
+            **{f'{source}__in': ids},
+        ).order_by(f'{target}_id')
+
+        grouped = {}
+        if child is None:
+            rows = through.values_list(f'{source}_id', f'{target}_id')
+            for parent_id, target_id in rows:
+                grouped.setdefault(parent_id, []).append(target_id)
+        else:
+            rows = through.values_list(
+                f'{source}_id',
+                *[f'{target}__{column}' for column in child.columns],
+            )
+            for parent_id, *values in rows:
+                grouped.setdefault(parent_id, []).append(
+                    child._to_dict(values),
+                )
+
+        return grouped
+
+    def read(self, queryset):
+        """Return serialized rows for the queryset."""
+        rows = [
+            self._to_dict(values)
+            for values in queryset.values_list(*self.columns)
+        ]
+        if rows and self.relations:
+            ids = [row['id'] for row in rows]
+            for name, child, m2m in self.relations:
+                related = self._read_related(m2m, child, ids)
+                for row in rows:
+                    row[name] = related.get(row['id'], [])
+            if self.hidden_id:
+                for row in rows:
+                    del row['id']
+
+        return rows
+
+
+@lru_cache(maxsize=256)
+def reader_for(serializer_class, **kwargs):
+    """
+    Return the compiled reader for a serializer class. Keyword arguments
+    (e.g. sparse `fields`) are passed to the serializer and must be hashable.
+    """
+    return ValuesReader(serializer_class, **kwargs)
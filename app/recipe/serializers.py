@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from core.perf import TimedSerializerMixin
+
 from core.models import (
     Recipe,
     Tag,
@@ -7,29 +9,75 @@ from core.models import (
 )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name']
         read_only_fields = ['id']
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedSerializerMixin,
+    serializers.ModelSerializer,
+):
     class Meta:
         model = Ingredient
         fields = ['id', 'name']
         read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Limit output to the requested `fields`. Relations named in
+    `expandable_fields` are rendered as nested objects only when they are
+    also listed in `expand`, and as a list of ids otherwise.
+    """
+    expandable_fields = []
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None) or ()
+        super().__init__(*args, **kwargs)
+
+        if fields is None:
+            return
+
+        requested = set(fields) | set(expand)
+        if not requested:
+            raise serializers.ValidationError({
+                'fields': ['At least one field is required.'],
+            })
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': [f'Unknown field(s): {", ".join(sorted(unknown))}'],
+            })
+
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+        for name in self.expandable_fields:
+            if name in self.fields and name not in expand:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=True,
+                    read_only=True,
+                )
+
+
+class RecipeSerializer(
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    serializers.ModelSerializer,
+):
+    expandable_fields = ['tags', 'ingredients']
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
 
     class Meta:
         model = Recipe
         fields = [
-            'id', 'title', 'time_minutes', 'price', 'link', 'tags',
-            'ingredients',
+            'id', 'title', 'time_minutes', 'price', 'servings', 'link',
+            'tags', 'ingredients',
         ]
         read_only_fields = ['id']
 
@@ -92,7 +140,10 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['description', 'image']
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(
+    TimedSerializerMixin,
+    serializers.ModelSerializer,
+):
     class Meta:
         model = Recipe
         fields = ['id', 'image']
@@ -0,0 +1,105 @@
+"""
+Combined shopping list of a set of a user's recipes, for
+/api/recipe/shopping-list/.
+
+Ingredients are aggregated in one GROUP BY over the Recipe.ingredients
+through table. Recipes have no ingredient quantities, so with a target
+number of servings every recipe is scaled by servings / recipe.servings
+and each ingredient gets `portions`, the sum of those factors over the
+recipes that use it: how many times a recipe's amount of it to buy.
+Without servings every factor is 1.
+
+Lists are cached by the sorted recipe ids, servings and the user
+version (sync.user_version), so any change to the user's data gives a
+new key.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    FloatField,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe
+from recipe import sync
+
+
+def shopping_list(user, recipe_ids, servings=None):
+    """Return the shopping list of user's recipes with recipe_ids."""
+    recipes = list(
+        Recipe.objects.filter(user=user, id__in=recipe_ids).order_by(
+            'id',
+        ).values('id', 'title', 'servings')
+    )
+    missing = sorted(set(recipe_ids) - {recipe['id'] for recipe in recipes})
+    if missing:
+        raise ValidationError({
+            'recipes': f'Unknown recipes: {", ".join(map(str, missing))}.',
+        })
+
+    through = Recipe.ingredients.through
+    rows = through.objects.filter(
+        recipe__user=user,
+        recipe_id__in=recipe_ids,
+    )
+    if servings is None:
+        portions = Cast(Count('recipe_id'), FloatField())
+    else:
+        portions = Sum(
+            Value(servings, output_field=FloatField())
+            / Cast('recipe__servings', FloatField())
+        )
+    ingredients = rows.values(
+        'ingredient_id',
+        'ingredient__name',
+    ).annotate(
+        recipes=Count('recipe_id'),
+        portions=portions,
+    ).order_by('ingredient__name', 'ingredient_id')
+
+    return {
+        'servings': servings,
+        'recipes': [
+            {
+                **recipe,
+                'scale': round(
+                    servings / recipe['servings'] if servings else 1.0,
+                    3,
+                ),
+            }
+            for recipe in recipes
+        ],
+        'ingredients': [
+            {
+                'id': row['ingredient_id'],
+                'name': row['ingredient__name'],
+                'recipes': row['recipes'],
+                'portions': round(row['portions'], 3),
+            }
+            for row in ingredients
+        ],
+    }
+
+
+def get_shopping_list(user, recipe_ids, servings=None):
+    """Return the cached shopping list, building it when needed."""
+    recipe_ids = sorted(set(recipe_ids))
+    # Kljuc memcached-a je ogranicen na 250 znakova
+    digest = hashlib.blake2b(
+        ','.join(map(str, recipe_ids)).encode(),
+        digest_size=16,
+    ).hexdigest()
+    version = sync.user_version(user)
+    key = f'shopping-list:{user.pk}:{version}:{servings}:{digest}'
+    result = cache.get(key)
+    if result is None:
+        result = shopping_list(user, recipe_ids, servings)
+        cache.set(key, result, settings.SHOPPING_LIST_CACHE_SECONDS)
+
+    return result
@@ -0,0 +1,34 @@
+"""
+Change notifications for recipe.feed streams.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+)
+from django.dispatch import receiver
+
+from core import events
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def notify_change(sender, instance, using, **kwargs):
+    events.notify(instance.user_id, using=using)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def notify_relation_change(sender, instance, action, reverse, using, **kwargs):
+    # Za obrnuti smer (tag.recipe_set) instance je tag, istog korisnika
+    if action.startswith('post_'):
+        events.notify(instance.user_id, using=using)
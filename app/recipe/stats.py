@@ -0,0 +1,150 @@
+"""
+Distributions over a user's recipes, for /api/recipe/stats/.
+
+Counts, sums and the GROUP BY work (tag pairs, most used ingredients)
+run in SQL. Percentiles, histograms and cost per minute are computed
+with NumPy over price and time_minutes columns fetched once, through
+app.calc so the arithmetic stays in one place.
+
+Results are cached per user version: the highest change sequence of the
+user's recipes, tags, ingredients and tombstones (sync.user_version),
+so any change gives a new cache key and stale entries simply expire.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    F,
+    FloatField,
+    Max,
+    Min,
+    Sum,
+    Avg,
+)
+from django.db.models.functions import Cast
+
+from app import calc
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import sync
+
+
+PERCENTILES = [10, 25, 50, 75, 90]
+HISTOGRAM_BINS = 10
+TOP = 10
+
+
+def distribution(values, decimals=2):
+    """Return summary, percentiles and a histogram of a 1-d array."""
+    if not values.size:
+        return {'percentiles': None, 'histogram': None}
+
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'percentiles': dict(zip(
+            [f'p{point}' for point in PERCENTILES],
+            np.round(np.percentile(values, PERCENTILES), decimals).tolist(),
+        )),
+        'histogram': {
+            'edges': np.round(edges, decimals).tolist(),
+            'counts': counts.tolist(),
+        },
+    }
+
+
+def column_stats(recipes, field):
+    """Return the SQL aggregates of one recipe column."""
+    column = Cast(field, FloatField())
+    result = recipes.aggregate(
+        min=Min(column),
+        max=Max(column),
+        mean=Avg(column),
+        sum=Sum(column),
+    )
+
+    return {
+        name: None if value is None else round(value, 2)
+        for name, value in result.items()
+    }
+
+
+def tag_pairs(user):
+    """Return the tag pairs used together on most recipes."""
+    through = Recipe.tags.through
+    pairs = through.objects.filter(
+        recipe__user=user,
+        recipe__tags__id__gt=F('tag_id'),
+    ).values_list('tag_id', 'recipe__tags__id').annotate(
+        recipes=Count('recipe_id'),
+    ).order_by('-recipes', 'tag_id', 'recipe__tags__id')[:TOP]
+    pairs = list(pairs)
+
+    names = dict(Tag.objects.filter(
+        id__in={tag_id for pair in pairs for tag_id in pair[:2]},
+    ).values_list('id', 'name'))
+    return [
+        {'tags': [names[first], names[second]], 'recipes': recipes}
+        for first, second, recipes in pairs
+    ]
+
+
+def top_ingredients(user):
+    """Return the ingredients used in most recipes."""
+    return list(
+        Ingredient.objects.filter(user=user).annotate(
+            recipes=Count('recipe'),
+        ).filter(recipes__gt=0).order_by('-recipes', 'name').values(
+            'id',
+            'name',
+            'recipes',
+        )[:TOP]
+    )
+
+
+def compute(user):
+    """Return the stats of user's recipes."""
+    recipes = Recipe.objects.filter(user=user)
+    rows = recipes.values_list(Cast('price', FloatField()), 'time_minutes')
+    columns = np.array(list(rows), dtype=float).reshape(-1, 2)
+    prices, minutes = columns[:, 0], columns[:, 1]
+
+    # Recepti bez vremena pripreme nemaju cenu po minutu
+    timed = minutes > 0
+    cost_per_minute = calc.batch_truediv(prices[timed], minutes[timed])
+
+    return {
+        'recipes': len(columns),
+        'price': {
+            **column_stats(recipes, 'price'),
+            **distribution(prices),
+        },
+        'time_minutes': {
+            **column_stats(recipes, 'time_minutes'),
+            **distribution(minutes),
+        },
+        'cost_per_minute': {
+            'mean': (
+                round(float(cost_per_minute.mean()), 4)
+                if cost_per_minute.size else None
+            ),
+            **distribution(cost_per_minute, decimals=4),
+        },
+        'tag_pairs': tag_pairs(user),
+        'top_ingredients': top_ingredients(user),
+    }
+
+
+def get_stats(user):
+    """Return the cached stats of user, computing them when needed."""
+    version = sync.user_version(user)
+    key = f'recipe-stats:{user.pk}:{version}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = {'version': str(version), **compute(user)}
+        cache.set(key, stats, settings.STATS_CACHE_SECONDS)
+
+    return stats
@@ -0,0 +1,207 @@
+"""
+Incremental sync of a user's recipes, tags and ingredients.
+
+Every insert or update of those rows takes the next value of the
+core_change_seq sequence and records its transaction id, and every
+delete leaves a Tombstone with both (see the 0009 and 0012 migrations).
+Changes are read in (change_xid, change_seq) order, an index range scan
+per table, and tokens are the last such position a client has seen.
+
+Sequence values are taken when a row is written, not when its
+transaction commits, so a page must never pass a change that is still
+uncommitted: it would show up later behind the client's token. Pages
+therefore only contain rows of transactions older than the oldest one
+still running (the snapshot's xmin). Every later change belongs to a
+transaction at or after xmin and sorts after every token handed out. A
+long transaction delays the changes behind it, but none are lost, and
+`held_back` tells the client that committed changes are waiting. The
+horizon and every read of one call come from the same database: another
+replica may be behind the one that gave the horizon.
+"""
+from django.contrib.auth import get_user_model
+from django.db import (
+    connections,
+    router,
+)
+from django.db.models import (
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import (
+    Coalesce,
+    Greatest,
+)
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    Tombstone,
+)
+from recipe import serializers
+
+
+SOURCES = [
+    ('recipes', 'recipe', serializers.RecipeDetailSerializer),
+    ('tags', 'tag', serializers.TagSerializer),
+    ('ingredients', 'ingredient', serializers.IngredientSerializer),
+]
+MODELS = {
+    'recipe': Recipe.objects.prefetch_related('tags', 'ingredients'),
+    'tag': Tag.objects.all(),
+    'ingredient': Ingredient.objects.all(),
+}
+START = (0, 0)
+
+HORIZON_SQL = """
+    SELECT
+        pg_snapshot_xmin(pg_current_snapshot())::text::bigint,
+        pg_current_xact_id_if_assigned()::text::bigint
+"""
+
+
+def parse_token(value):
+    """Return the (change_xid, change_seq) position of a sync token."""
+    if not value:
+        return START
+    xid, separator, seq = str(value).partition(':')
+    position = (int(xid), int(seq) if separator else 0)
+    if min(position) < 0:
+        raise ValueError(value)
+    # Stari tokeni (samo change_seq) krecu ispocetka
+    if not separator:
+        return START
+
+    return position
+
+
+def format_token(position):
+    return '{}:{}'.format(*position)
+
+
+def horizon(using):
+    """
+    Return the oldest transaction id that may still be running, and the
+    current transaction's id (None outside of one that wrote anything).
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(HORIZON_SQL)
+        return cursor.fetchone()
+
+
+def held_back(user, using, oldest, current):
+    """Return True if committed changes wait behind an older transaction."""
+    for model in (Recipe, Tag, Ingredient, Tombstone):
+        rows = model.objects.using(using).filter(
+            user=user,
+            change_xid__gte=oldest,
+        )
+        if current is not None:
+            rows = rows.exclude(change_xid=current)
+        if rows.exists():
+            return True
+
+    return False
+
+
+def changes(user, since, limit, context=None):
+    """
+    Return the first `limit` changes of user after the `since` position,
+    oldest first, with the token to continue from.
+    """
+    using = router.db_for_read(Recipe)
+    oldest, current = horizon(using)
+    # Sopstvena transakcija (npr. u testovima) vidi svoje izmene
+    committed = Q(change_xid__lt=oldest)
+    if current is not None:
+        committed |= Q(change_xid=current)
+    after = Q(change_xid__gt=since[0]) | Q(
+        change_xid=since[0],
+        change_seq__gt=since[1],
+    )
+
+    keys = []
+    for _, model, _ in SOURCES:
+        keys.extend(
+            ((change_xid, change_seq), model, pk)
+            for pk, change_xid, change_seq in MODELS[
+                model
+            ].model.objects.using(using).filter(
+                committed,
+                after,
+                user=user,
+            ).order_by('change_xid', 'change_seq').values_list(
+                'id',
+                'change_xid',
+                'change_seq',
+            )[:limit + 1]
+        )
+    keys.extend(
+        ((change_xid, change_seq), None, (model, pk))
+        for model, pk, change_xid, change_seq in Tombstone.objects.using(
+            using,
+        ).filter(
+            committed,
+            after,
+            user=user,
+        ).order_by('change_xid', 'change_seq').values_list(
+            'model',
+            'object_id',
+            'change_xid',
+            'change_seq',
+        )[:limit + 1]
+    )
+    # Svaki izvor je vec sortiran, ovde samo spajamo i secemo stranu
+    keys.sort()
+    page = keys[:limit]
+
+    result = {
+        'since': format_token(since),
+        'next': format_token(page[-1][0] if page else since),
+        'has_more': len(keys) > limit,
+        'held_back': False,
+        'deleted': {name: [] for name, _, _ in SOURCES},
+    }
+    if not result['has_more']:
+        result['held_back'] = held_back(user, using, oldest, current)
+    plural = {model: name for name, model, _ in SOURCES}
+    for _, model, key in page:
+        if model is None:
+            result['deleted'][plural[key[0]]].append(key[1])
+
+    for name, model, serializer_class in SOURCES:
+        ids = [key for _, changed, key in page if changed == model]
+        objs = MODELS[model].none()
+        if ids:
+            objs = MODELS[model].using(using).filter(id__in=ids).order_by(
+                'change_xid',
+                'change_seq',
+            )
+        result[name] = serializer_class(
+            objs,
+            many=True,
+            context=context,
+        ).data
+
+    return result
+
+
+def user_version(user):
+    """Return the latest change sequence of anything user owns."""
+    latest = [
+        Coalesce(
+            Subquery(
+                model.objects.filter(user=user)
+                .order_by('-change_seq')
+                .values('change_seq')[:1]
+            ),
+            Value(0),
+        )
+        for model in (Recipe, Tag, Ingredient, Tombstone)
+    ]
+
+    return get_user_model().objects.filter(pk=user.pk).values_list(
+        Greatest(*latest),
+        flat=True,
+    ).get()
@@ -0,0 +1,105 @@
+"""
+Tests for the recipe endpoints served through async views.
+"""
+import asyncio
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import (
+    path,
+    include,
+    reverse,
+)
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe
+from recipe import urls as recipe_urls
+
+
+# Ovaj modul je ROOT_URLCONF za testove ispod
+urlpatterns = [
+    path('api/recipe/', include((
+        recipe_urls.async_patterns(recipe_urls.router.urls),
+        'recipe',
+    ))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncRecipeViewTests(TransactionTestCase):
+    """Test recipe endpoints over the ASGI request path."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+        # Pool niti inace drze konekcije otvorene CONN_MAX_AGE sekundi
+        patcher = patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def auth(self):
+        return {'authorization': f'Token {self.token.key}'}
+
+    def test_async_routes(self):
+        patterns = recipe_urls.async_patterns(recipe_urls.router.urls)
+
+        names = {
+            pattern.name
+            for pattern in patterns
+            if asyncio.iscoroutinefunction(pattern.callback)
+        }
+        self.assertEqual(names, set(recipe_urls.ASYNC_ROUTES))
+
+    async def test_list(self):
+        res = await self.async_client.get(
+            reverse('recipe:recipe-list'),
+            **self.auth(),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['title'] for recipe in res.json()],
+            ['Sample recipe'],
+        )
+
+    async def test_detail(self):
+        res = await self.async_client.get(
+            reverse('recipe:recipe-detail', args=(self.recipe.id,)),
+            **self.auth(),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['id'], self.recipe.id)
+
+    async def test_requires_auth(self):
+        res = await self.async_client.get(reverse('recipe:recipe-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_create(self):
+        res = await self.async_client.post(
+            reverse('recipe:recipe-list'),
+            {'title': 'Async recipe', 'time_minutes': 5, 'price': '1.50'},
+            content_type='application/json',
+            **self.auth(),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()['title'], 'Async recipe')
@@ -0,0 +1,298 @@
+"""
+Tests for the server-sent events change feed.
+"""
+import asyncio
+import functools
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.db import (
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.events import ChangeListener
+from core.models import (
+    Recipe,
+    Tag,
+)
+from recipe import (
+    feed,
+    sync,
+)
+
+
+CHANGES_URL = reverse('recipe:changes')
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ListenerMixin:
+    """Run the feeds against a listener that is stopped after the test."""
+
+    def setUp(self):
+        super().setUp()
+        self.listener = ChangeListener(poll_interval=0.05)
+        patcher = patch.object(feed.events, 'listener', self.listener)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.listener.stop)
+
+
+@override_settings(SSE_MAX_SECONDS=0, SSE_WSGI_STREAMS=1)
+class ChangeFeedViewTests(ListenerMixin, TestCase):
+    """Test the feed served by the WSGI view."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        patcher = patch.object(feed, 'wsgi_slots', feed.StreamSlots())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_auth_required(self):
+        res = APIClient().get(CHANGES_URL, HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(res.content.startswith(b'event: error\n'))
+
+    def test_streams_changes(self):
+        recipe = create_recipe(self.user)
+
+        res = self.client.get(CHANGES_URL)
+        body = b''.join(res.streaming_content).decode()
+
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        self.assertTrue(body.startswith('retry: 3000\n\n'))
+        self.assertIn('event: changes\n', body)
+        self.assertIn(f'"id":{recipe.id}', body)
+
+    def test_resumes_from_last_event_id(self):
+        create_recipe(self.user, title='Old')
+        token = sync.changes(self.user, sync.START, 100)['next']
+        tag = Tag.objects.create(user=self.user, name='New')
+
+        res = self.client.get(CHANGES_URL, HTTP_LAST_EVENT_ID=token)
+        body = b''.join(res.streaming_content).decode()
+
+        self.assertNotIn('Old', body)
+        self.assertIn(f'"tags":[{{"id":{tag.id},"name":"New"}}]', body)
+
+    def test_invalid_since(self):
+        res = self.client.get(CHANGES_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_refused_without_free_stream(self):
+        held = self.client.get(CHANGES_URL)
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '3')
+        b''.join(held.streaming_content)
+        res = self.client.get(CHANGES_URL)
+        b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(feed.wsgi_slots.active, 0)
+
+    @override_settings(SSE_WSGI_STREAMS=0)
+    def test_refused_by_default_under_wsgi(self):
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(feed.wsgi_slots.active, 0)
+
+
+class ChangeListenerTests(TransactionTestCase):
+    """Test waking subscriptions through LISTEN/NOTIFY."""
+
+    def setUp(self):
+        self.listener = ChangeListener(poll_interval=0.05)
+        self.addCleanup(self.listener.stop)
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+
+    def test_wakes_only_subscribers_of_changed_user(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        subscription = self.listener.subscribe(self.user.id)
+        # Prvo budjenje je posle uspostavljanja veze
+        self.assertTrue(subscription.wait(5))
+
+        create_recipe(other)
+        self.assertFalse(subscription.wait(0.3))
+
+        recipe = create_recipe(self.user)
+        self.assertTrue(subscription.wait(5))
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        self.assertTrue(subscription.wait(5))
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=0.1)
+class ChangeFeedAsgiTests(ListenerMixin, TransactionTestCase):
+    """Test the feed served by the ASGI application."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        # Pool niti inace drze konekcije otvorene CONN_MAX_AGE sekundi
+        patcher = patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scope(self, headers):
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': feed.FEED_PATH,
+            'query_string': b'',
+            'headers': headers,
+        }
+
+    async def receive_events(self, headers, change=None, messages=1):
+        communicator = ApplicationCommunicator(
+            feed.asgi_app,
+            self.scope(headers),
+        )
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(5)
+        body = b''
+        if start['status'] == 200:
+            for _ in range(messages):
+                body += (await communicator.receive_output(5))['body']
+            if change is not None:
+                await change()
+                while b'event: changes' not in body[-1000:]:
+                    body += (await communicator.receive_output(5))['body']
+            await communicator.send_input({'type': 'http.disconnect'})
+        else:
+            body = (await communicator.receive_output(5))['body']
+        await communicator.wait(5)
+
+        return start, body
+
+    def test_auth_required(self):
+        start, body = asyncio.run(self.receive_events([]))
+
+        self.assertEqual(start['status'], 401)
+        self.assertIn(b'not provided', body)
+
+    def test_pushes_new_changes(self):
+        headers = [(b'authorization', f'Token {self.token.key}'.encode())]
+
+        async def change():
+            await feed.run_sync(
+                feed._in_pool,
+                functools.partial(create_recipe, title='Pushed'),
+                self.user,
+            )
+
+        start, body = asyncio.run(self.receive_events(headers, change))
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'),
+            start['headers'],
+        )
+        self.assertIn(b'"title":"Pushed"', body)
+
+    def test_sends_heartbeats(self):
+        headers = [(b'authorization', f'Token {self.token.key}'.encode())]
+
+        _, body = asyncio.run(self.receive_events(headers, messages=3))
+
+        self.assertEqual(body, b'retry: 3000\n\n' + feed.HEARTBEAT * 2)
+
+    def test_rereads_changes_held_back_by_open_transaction(self):
+        headers = [(b'authorization', f'Token {self.token.key}'.encode())]
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        written, release = threading.Event(), threading.Event()
+
+        def write_slowly():
+            # Tudja transakcija, njen commit ne budi ovaj strim
+            try:
+                with transaction.atomic():
+                    create_recipe(other)
+                    written.set()
+                    release.wait(10)
+            finally:
+                close_old_connections()
+
+        thread = threading.Thread(target=write_slowly)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        self.assertTrue(written.wait(10))
+
+        async def receive():
+            communicator = ApplicationCommunicator(
+                feed.asgi_app,
+                self.scope(headers),
+            )
+            await communicator.send_input({'type': 'http.request'})
+            await communicator.receive_output(5)
+            await communicator.receive_output(5)
+            await feed.run_sync(
+                feed._in_pool,
+                functools.partial(create_recipe, title='Fast'),
+                self.user,
+            )
+            loop = asyncio.get_running_loop()
+            held, deadline = b'', loop.time() + 0.5
+            while loop.time() < deadline:
+                held += (await communicator.receive_output(5))['body']
+
+            release.set()
+            await loop.run_in_executor(None, thread.join)
+            body, deadline = b'', loop.time() + 5
+            while b'event: changes' not in body and loop.time() < deadline:
+                body += (await communicator.receive_output(5))['body']
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(5)
+            return held, body
+
+        held, body = asyncio.run(receive())
+
+        self.assertNotIn(b'event: changes', held)
+        self.assertIn(b'"title":"Fast"', body)
@@ -0,0 +1,197 @@
+"""
+Tests for Idempotency-Key support on recipe creation and image upload.
+"""
+import io
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    IdempotencyKey,
+    Recipe,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+PAYLOAD = {
+    'title': 'Retried recipe',
+    'time_minutes': 30,
+    'price': '5.99',
+    'tags': [{'name': 'Quick'}],
+}
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=(recipe_id,))
+
+
+def create_user(email='test@example.com'):
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+    )
+
+
+class IdempotencyKeyTests(TestCase):
+    """Test replaying responses to retried requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, payload, key, **kwargs):
+        return self.client.post(
+            url,
+            payload,
+            HTTP_IDEMPOTENCY_KEY=key,
+            **kwargs,
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+        retry = self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(self.user.tag_set.count(), 1)
+
+    def test_without_key_creates_every_time(self):
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+        self.client.post(RECIPES_URL, PAYLOAD, format='json')
+
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_other_request(self):
+        self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+        res = self.post(
+            RECIPES_URL,
+            {**PAYLOAD, 'title': 'Other'},
+            'key-1',
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+        other = APIClient()
+        other.force_authenticate(create_user('other@example.com'))
+
+        res = other.post(
+            RECIPES_URL,
+            PAYLOAD,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='key-1',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        res = self.post(RECIPES_URL, PAYLOAD, 'key-1', format='json')
+
+        self.assertNotIn('Idempotent-Replayed', res)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        res = self.post(RECIPES_URL, {'title': 'No price'}, 'key-1')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_too_long(self):
+        res = self.post(RECIPES_URL, PAYLOAD, 'k' * 256, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_upload_retry_keeps_first_image(self):
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample',
+            time_minutes=10,
+            price=Decimal('1.00'),
+        )
+        content = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(content, format='JPEG')
+
+        responses = []
+        for _ in range(2):
+            image = io.BytesIO(content.getvalue())
+            image.name = 'image.jpg'
+            responses.append(self.post(
+                image_upload_url(recipe.id),
+                {'image': image},
+                'upload-1',
+                format='multipart',
+            ))
+        recipe.refresh_from_db()
+        self.addCleanup(recipe.image.delete)
+
+        self.assertEqual(responses[1].json(), responses[0].json())
+        self.assertEqual(responses[1]['Idempotent-Replayed'], 'true')
+        self.assertIn(recipe.image.name, responses[0].json()['image'])
+
+
+class ConcurrentIdempotencyKeyTests(TransactionTestCase):
+    """Test concurrent duplicates executing only once."""
+
+    def test_concurrent_duplicates(self):
+        user = create_user()
+        results = []
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                results.append(client.post(
+                    RECIPES_URL,
+                    PAYLOAD,
+                    format='json',
+                    HTTP_IDEMPOTENCY_KEY='key-1',
+                ))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(
+            {res.status_code for res in results},
+            {status.HTTP_201_CREATED},
+        )
+        self.assertEqual(
+            sum('Idempotent-Replayed' in res for res in results),
+            3,
+        )
@@ -0,0 +1,97 @@
+"""
+Differential tests for the read-only list fast path.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.renderers import ORJSONRenderer
+from recipe import serializers
+from recipe.readers import ValuesReader
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class ValuesReaderTests(TestCase):
+    """Test the reader output is identical to the serializer output."""
+
+    def setUp(self):
+        self.user = create_user()
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(4)
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(5)
+        ]
+        prices = [Decimal('5.25'), Decimal('0.5'), Decimal('999.99'), 7]
+        for i, price in enumerate(prices):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i} – Ćevapi',
+                time_minutes=i * 10,
+                price=price,
+                link='' if i % 2 else f'https://example.com/{i}.pdf',
+            )
+            recipe.tags.add(*tags[:i])
+            recipe.ingredients.add(*ingredients[i:])
+
+    def assertSameBytes(self, serializer_class, queryset):
+        expected = JSONRenderer().render(
+            serializer_class(queryset, many=True).data,
+        )
+        rows = ValuesReader(serializer_class).read(queryset)
+
+        self.assertEqual(JSONRenderer().render(rows), expected)
+        self.assertEqual(ORJSONRenderer().render(rows), expected)
+
+    def test_recipes_match_serializer(self):
+        queryset = Recipe.objects.filter(user=self.user).order_by('-id')
+
+        self.assertSameBytes(serializers.RecipeSerializer, queryset)
+
+    def test_tags_match_serializer(self):
+        queryset = Tag.objects.filter(user=self.user).order_by('-name')
+
+        self.assertSameBytes(serializers.TagSerializer, queryset)
+
+    def test_ingredients_match_serializer(self):
+        queryset = Ingredient.objects.order_by('-name')
+
+        self.assertSameBytes(serializers.IngredientSerializer, queryset)
+
+    def test_empty_queryset(self):
+        rows = ValuesReader(serializers.RecipeSerializer).read(
+            Recipe.objects.none(),
+        )
+
+        self.assertEqual(rows, [])
+
+    def test_unsupported_serializer_raises_error(self):
+        with self.assertRaises(ValueError):
+            ValuesReader(serializers.RecipeDetailSerializer)
+
+    def test_list_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        # Recepti + tagovi + sastojci, nezavisno od broja recepata
+        with self.assertNumQueries(3):
+            res = client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 4)
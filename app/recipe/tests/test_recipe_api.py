@@ -1,6 +1,9 @@
 from decimal import Decimal
+import io
 import tempfile
 import os
+import msgpack
+import cbor2
 from PIL import Image
 
 from django.contrib.auth import get_user_model
@@ -128,6 +131,19 @@ class PrivateRecipeApiTests(TestCase):
             self.assertEqual(getattr(recipe, k), v)
 
         self.assertEqual(recipe.user, self.user)
+        self.assertEqual(recipe.servings, 1)
+
+    def test_create_recipe_servings_must_be_positive(self):
+        payload = {
+            'title': 'Sample recipe title',
+            'time_minutes': 30,
+            'price': Decimal('5.99'),
+            'servings': 0,
+        }
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('servings', res.data)
 
     def test_partial_update(self):
         original_link = 'https://www.example.com/recipe.pdf'
@@ -472,6 +488,103 @@ class PrivateRecipeApiTests(TestCase):
         self.assertNotIn(s3.data, res.data)
 
 
+class SparseFieldsTests(TestCase):
+    """Test ?fields= and ?expand= on recipe endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(self.tag)
+
+    def test_list_only_requested_fields(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': self.recipe.id, 'title': self.recipe.title},
+        ])
+
+    def test_list_unexpanded_relation_returns_ids(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'id,tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['tags'], [self.tag.id])
+
+    def test_list_expanded_relation_returns_objects(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'id', 'expand': 'tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['tags'], [
+            {'id': self.tag.id, 'name': self.tag.name},
+        ])
+        self.assertNotIn('ingredients', res.data[0])
+
+    def test_list_relation_without_id(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'title,tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'title': self.recipe.title, 'tags': [self.tag.id]},
+        ])
+
+    def test_list_expanded_relation_without_id(self):
+        res = self.client.get(
+            RECIPES_URL,
+            {'fields': 'title', 'expand': 'tags'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{
+            'title': self.recipe.title,
+            'tags': [{'id': self.tag.id, 'name': self.tag.name}],
+        }])
+
+    def test_empty_fields_returns_error(self):
+        res = self.client.get(RECIPES_URL, {'fields': ','})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_detail_only_requested_fields(self):
+        url = detail_url(self.recipe.id)
+        res = self.client.get(url, {'fields': 'title,description'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'title': self.recipe.title,
+            'description': self.recipe.description,
+        })
+
+    def test_detail_expanded_relation(self):
+        url = detail_url(self.recipe.id)
+        res = self.client.get(url, {'fields': 'id,tags', 'expand': 'tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], self.tag.name)
+
+    def test_unknown_field_returns_error(self):
+        res = self.client.get(RECIPES_URL, {'fields': 'id,description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fields_ignored_on_update(self):
+        url = detail_url(self.recipe.id)
+        res = self.client.patch(
+            f'{url}?fields=id',
+            {'title': 'New title'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+
 class ImageUploadTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -512,3 +625,69 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BinaryFormatApiTests(TestCase):
+    """Test MessagePack and CBOR content negotiation."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_recipes_msgpack(self):
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data[0]['id'], recipe.id)
+        self.assertEqual(data[0]['price'], '5.25')
+
+    def test_list_tags_cbor(self):
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(
+            reverse('recipe:tag-list'),
+            HTTP_ACCEPT='application/cbor',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cbor2.loads(res.content), [
+            {'id': tag.id, 'name': 'Vegan'},
+        ])
+
+    def test_create_recipe_msgpack(self):
+        payload = {
+            'title': 'Thai Prawn Curry',
+            'time_minutes': 30,
+            'price': '2.50',
+            'tags': [{'name': 'Thai'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.price, Decimal('2.50'))
+        self.assertEqual(recipe.tags.get().name, 'Thai')
+
+    def test_upload_image_msgpack(self):
+        recipe = create_recipe(user=self.user)
+        image = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(image, format='JPEG')
+
+        res = self.client.post(
+            image_upload_url(recipe.id),
+            {'image': image.getvalue()},
+            format='msgpack',
+        )
+
+        recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(os.path.exists(recipe.image.path))
+        recipe.image.delete()
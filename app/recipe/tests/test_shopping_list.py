@@ -0,0 +1,143 @@
+"""
+Tests for the shopping list API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Ingredient,
+)
+
+
+SHOPPING_LIST_URL = reverse('recipe:shopping-list')
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_ids(*recipes):
+    return ','.join(str(recipe.id) for recipe in recipes)
+
+
+class PublicShoppingListApiTests(TestCase):
+    def test_auth_required(self):
+        res = APIClient().get(SHOPPING_LIST_URL, {'recipes': '1'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateShoppingListApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.kale = Ingredient.objects.create(user=self.user, name='Kale')
+        self.soup = create_recipe(self.user, title='Soup', servings=2)
+        self.soup.ingredients.add(self.salt, self.kale)
+        self.stew = create_recipe(self.user, title='Stew', servings=4)
+        self.stew.ingredients.add(self.salt)
+
+    def shopping_list(self, **params):
+        res = self.client.get(SHOPPING_LIST_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    def test_merges_ingredients(self):
+        unused = create_recipe(self.user)
+        unused.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Rice'),
+        )
+
+        data = self.shopping_list(recipes=recipe_ids(self.stew, self.soup))
+
+        self.assertEqual(
+            [recipe['id'] for recipe in data['recipes']],
+            sorted([self.soup.id, self.stew.id]),
+        )
+        self.assertEqual(data['ingredients'], [
+            {'id': self.kale.id, 'name': 'Kale', 'recipes': 1, 'portions': 1},
+            {'id': self.salt.id, 'name': 'Salt', 'recipes': 2, 'portions': 2},
+        ])
+
+    def test_scales_to_servings(self):
+        data = self.shopping_list(
+            recipes=recipe_ids(self.soup, self.stew),
+            servings=4,
+        )
+
+        self.assertEqual(
+            {recipe['title']: recipe['scale'] for recipe in data['recipes']},
+            {'Soup': 2, 'Stew': 1},
+        )
+        portions = {
+            ingredient['name']: ingredient['portions']
+            for ingredient in data['ingredients']
+        }
+        self.assertEqual(portions, {'Kale': 2, 'Salt': 3})
+
+    def test_other_users_recipe_rejected(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        foreign = create_recipe(other)
+
+        res = self.client.get(
+            SHOPPING_LIST_URL,
+            {'recipes': recipe_ids(self.soup, foreign)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(foreign.id), res.data['recipes'])
+
+    def test_invalid_params(self):
+        for params in [
+            {},
+            {'recipes': 'a,b'},
+            {'recipes': '99999999999999999999'},
+            {'recipes': str(self.soup.id), 'servings': '0'},
+            {'recipes': str(self.soup.id), 'servings': 'x'},
+            {'recipes': str(self.soup.id), 'servings': '32768'},
+            {
+                'recipes': str(self.soup.id),
+                'servings': '99999999999999999999',
+            },
+        ]:
+            res = self.client.get(SHOPPING_LIST_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_by_recipe_set_until_data_changes(self):
+        first = self.shopping_list(recipes=recipe_ids(self.soup, self.stew))
+
+        # Isti skup recepata drugim redom, samo upit za verziju
+        with self.assertNumQueries(1):
+            again = self.shopping_list(
+                recipes=recipe_ids(self.stew, self.soup, self.stew),
+            )
+        self.assertEqual(again, first)
+
+        self.stew.ingredients.add(self.kale)
+        data = self.shopping_list(recipes=recipe_ids(self.soup, self.stew))
+
+        kale = data['ingredients'][0]
+        self.assertEqual((kale['name'], kale['recipes']), ('Kale', 2))
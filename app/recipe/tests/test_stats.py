@@ -0,0 +1,148 @@
+"""
+Tests for the recipe stats API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+STATS_URL = reverse('recipe:stats')
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicStatsApiTests(TestCase):
+    def test_auth_required(self):
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def stats(self):
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    def test_no_recipes(self):
+        data = self.stats()
+
+        self.assertEqual(data['recipes'], 0)
+        self.assertIsNone(data['price']['mean'])
+        self.assertIsNone(data['price']['percentiles'])
+        self.assertIsNone(data['cost_per_minute']['histogram'])
+        self.assertEqual(data['tag_pairs'], [])
+        self.assertEqual(data['top_ingredients'], [])
+
+    def test_distributions(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(other, price=Decimal('100.00'))
+        for minutes, price in [(10, '1.00'), (20, '4.00'), (0, '7.00')]:
+            create_recipe(self.user, time_minutes=minutes, price=price)
+
+        data = self.stats()
+
+        self.assertEqual(data['recipes'], 3)
+        self.assertEqual(data['price']['min'], 1.0)
+        self.assertEqual(data['price']['max'], 7.0)
+        self.assertEqual(data['price']['mean'], 4.0)
+        self.assertEqual(data['price']['sum'], 12.0)
+        self.assertEqual(data['price']['percentiles']['p50'], 4.0)
+        self.assertEqual(data['price']['percentiles']['p25'], 2.5)
+        self.assertEqual(sum(data['price']['histogram']['counts']), 3)
+        self.assertEqual(data['price']['histogram']['edges'][0], 1.0)
+        self.assertEqual(data['price']['histogram']['edges'][-1], 7.0)
+        self.assertEqual(data['time_minutes']['max'], 20)
+        # Recept bez vremena se ne racuna
+        self.assertEqual(data['cost_per_minute']['mean'], 0.15)
+        self.assertEqual(
+            data['cost_per_minute']['percentiles']['p50'],
+            0.15,
+        )
+
+    def test_tag_pairs_and_top_ingredients(self):
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        cheap = Tag.objects.create(user=self.user, name='Cheap')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        kale = Ingredient.objects.create(user=self.user, name='Kale')
+        Ingredient.objects.create(user=self.user, name='Unused')
+        first = create_recipe(self.user)
+        first.tags.add(vegan, quick, cheap)
+        first.ingredients.add(salt, kale)
+        second = create_recipe(self.user)
+        second.tags.add(vegan, quick)
+        second.ingredients.add(salt)
+
+        data = self.stats()
+
+        self.assertEqual(
+            [(set(pair['tags']), pair['recipes'])
+             for pair in data['tag_pairs']],
+            [
+                ({'Vegan', 'Quick'}, 2),
+                ({'Vegan', 'Cheap'}, 1),
+                ({'Quick', 'Cheap'}, 1),
+            ],
+        )
+        self.assertEqual(
+            [(i['name'], i['recipes']) for i in data['top_ingredients']],
+            [('Salt', 2), ('Kale', 1)],
+        )
+
+    def test_cached_until_data_changes(self):
+        recipe = create_recipe(self.user)
+        first = self.stats()
+
+        # Samo upit za verziju korisnika
+        with self.assertNumQueries(1):
+            self.assertEqual(self.stats(), first)
+
+        recipe.price = Decimal('9.00')
+        recipe.save()
+        changed = self.stats()
+
+        self.assertNotEqual(changed['version'], first['version'])
+        self.assertEqual(changed['price']['max'], 9.0)
+
+    def test_deleting_recipe_changes_version(self):
+        create_recipe(self.user)
+        recipe = create_recipe(self.user)
+        first = self.stats()
+
+        recipe.delete()
+        data = self.stats()
+
+        self.assertNotEqual(data['version'], first['version'])
+        self.assertEqual(data['recipes'], 1)
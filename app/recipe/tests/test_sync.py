@@ -0,0 +1,277 @@
+"""
+Tests for the incremental sync API.
+"""
+import itertools
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import db_router
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+    Tombstone,
+)
+from recipe import sync
+
+
+SYNC_URL = reverse('recipe:sync')
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicSyncApiTests(TestCase):
+    def test_auth_required(self):
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateSyncApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, **params):
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync_returns_own_objects(self):
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(other)
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+
+        data = self.sync()
+
+        self.assertEqual([r['id'] for r in data['recipes']], [recipe.id])
+        self.assertEqual(data['recipes'][0]['tags'][0]['name'], 'Vegan')
+        self.assertEqual(data['tags'], [{'id': tag.id, 'name': 'Vegan'}])
+        self.assertEqual(data['ingredients'], [])
+        self.assertFalse(data['has_more'])
+
+    def test_since_returns_only_later_changes(self):
+        changed = create_recipe(self.user)
+        unchanged = create_recipe(self.user)
+        token = self.sync()['next']
+
+        changed.title = 'New title'
+        changed.save()
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        data = self.sync(since=token)
+
+        self.assertEqual([r['id'] for r in data['recipes']], [changed.id])
+        self.assertEqual(data['recipes'][0]['title'], 'New title')
+        self.assertEqual(
+            [i['id'] for i in data['ingredients']],
+            [ingredient.id],
+        )
+        self.assertNotIn(unchanged.id, [r['id'] for r in data['recipes']])
+        self.assertEqual(self.sync(since=data['next'])['recipes'], [])
+
+    def test_bulk_update_and_relations_count_as_changes(self):
+        recipe = create_recipe(self.user)
+        other = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        token = self.sync()['next']
+
+        Recipe.objects.filter(id=other.id).update(time_minutes=5)
+        recipe.tags.add(tag)
+        data = self.sync(since=token)
+
+        self.assertEqual(
+            {r['id'] for r in data['recipes']},
+            {recipe.id, other.id},
+        )
+
+    def test_deletes_leave_tombstones(self):
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ids = recipe.id, tag.id
+        token = self.sync()['next']
+
+        recipe.delete()
+        tag.delete()
+        data = self.sync(since=token)
+
+        self.assertEqual(data['deleted']['recipes'], [ids[0]])
+        self.assertEqual(data['deleted']['tags'], [ids[1]])
+        self.assertEqual(data['recipes'], [])
+
+    def test_pages_by_change_sequence(self):
+        recipes = [create_recipe(self.user) for _ in range(3)]
+        deleted_id = recipes[0].id
+        recipes[0].delete()
+
+        first = self.sync(limit=2)
+        second = self.sync(since=first['next'], limit=2)
+
+        self.assertTrue(first['has_more'])
+        self.assertEqual(
+            [r['id'] for r in first['recipes']],
+            [recipe.id for recipe in recipes[1:]],
+        )
+        self.assertFalse(second['has_more'])
+        self.assertEqual(second['deleted']['recipes'], [deleted_id])
+
+    def test_invalid_token(self):
+        res = self.client.get(SYNC_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_delete_removes_tombstones(self):
+        create_recipe(self.user).delete()
+        create_recipe(self.user)
+
+        self.user.delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class ConcurrentSyncTests(TransactionTestCase):
+    """Test tokens while other transactions are still open."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+        patcher = patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, **params):
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_late_commit_is_not_skipped(self):
+        written, release = threading.Event(), threading.Event()
+
+        def write_slowly():
+            try:
+                with transaction.atomic():
+                    create_recipe(self.user, title='Slow')
+                    written.set()
+                    release.wait(10)
+            finally:
+                close_old_connections()
+
+        thread = threading.Thread(target=write_slowly)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(release.set)
+        self.assertTrue(written.wait(10))
+        # Kasnija sekvenca, ali commit pre spore transakcije
+        create_recipe(self.user, title='Fast')
+
+        first = self.sync()
+        release.set()
+        thread.join()
+        second = self.sync(since=first['next'])
+
+        seqs = dict(Recipe.objects.values_list('title', 'change_seq'))
+        self.assertGreater(seqs['Fast'], seqs['Slow'])
+
+        self.assertEqual(first['recipes'], [])
+        self.assertTrue(first['held_back'])
+        self.assertFalse(second['held_back'])
+        self.assertEqual(
+            {r['title'] for r in second['recipes']},
+            {'Slow', 'Fast'},
+        )
+        self.assertEqual(self.sync(since=second['next'])['recipes'], [])
+
+
+class ReplicaSyncTests(TransactionTestCase):
+    """Test one sync call reads from one replica only."""
+
+    replicas = ['replica_1', 'replica_2']
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        # Obe "replike" su nove konekcije na test bazu
+        for alias in self.replicas:
+            connections.databases[alias] = dict(
+                connections.databases[DEFAULT_DB_ALIAS],
+            )
+            self.addCleanup(self.remove_replica, alias)
+
+        token = db_router.allow_replicas(True)
+        self.addCleanup(db_router.reset_replicas, token)
+        patcher = patch(
+            'core.db_router.healthy_replicas',
+            return_value=self.replicas,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def remove_replica(self, alias):
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+    def test_reads_come_from_one_replica(self):
+        recipe = create_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        create_recipe(self.user).delete()
+        # Svaki upit bi inace mogao na drugu repliku
+        choices = itertools.cycle(self.replicas)
+
+        with patch(
+            'core.db_router.random.choice',
+            side_effect=lambda replicas: next(choices),
+        ), CaptureQueriesContext(
+            connections['replica_1'],
+        ) as first, CaptureQueriesContext(
+            connections['replica_2'],
+        ) as second:
+            data = sync.changes(self.user, sync.START, 100)
+
+        self.assertTrue(first.captured_queries)
+        self.assertEqual(len(second), 0)
+        self.assertEqual([r['id'] for r in data['recipes']], [recipe.id])
+        self.assertEqual(data['recipes'][0]['tags'][0]['name'], 'Vegan')
+        self.assertEqual(len(data['deleted']['recipes']), 1)
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import (
     path,
     include,
+    URLPattern,
 )
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import async_view
 from recipe import views
 
 
@@ -14,7 +17,38 @@ router.register('ingredients', views.IngredientViewSet)
 
 app_name = 'recipe'  # for reverse lookup
 
+# Routes served through async views when ASYNC_VIEWS is on
+ASYNC_ROUTES = ('recipe-list', 'recipe-detail', 'recipe-upload-image')
+
+
+def async_patterns(patterns):
+    """Wrap the views of ASYNC_ROUTES in patterns with async_view."""
+    result = []
+    for pattern in patterns:
+        if getattr(pattern, 'name', None) in ASYNC_ROUTES:
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        result.append(pattern)
+
+    return result
+
+
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    router_urls = async_patterns(router_urls)
 
 urlpatterns = [
-    path('', include(router.urls)),
+    path('sync/', views.SyncView.as_view(), name='sync'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
+    path(
+        'shopping-list/',
+        views.ShoppingListView.as_view(),
+        name='shopping-list',
+    ),
+    path('changes/', views.ChangeFeedView.as_view(), name='changes'),
+    path('', include(router_urls)),
 ]
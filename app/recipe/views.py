@@ -9,17 +9,89 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core import (
+    idempotency,
+    perf,
+)
+from core.renderers import (
+    ORJSONRenderer,
+    EventStreamRenderer,
+)
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 )
-from recipe import serializers
+from recipe import (
+    serializers,
+    readers,
+    sync,
+    feed,
+    stats,
+    shopping,
+)
+
+
+class ValuesListMixin:
+    """List action that builds rows without the serializer field tree."""
+
+    def get_fields_kwargs(self):
+        """Return extra serializer kwargs that shape the output fields."""
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        # Paginirani odgovori i dalje idu standardnim putem
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        reader = readers.reader_for(
+            self.get_serializer_class(),
+            **self.get_fields_kwargs(),
+        )
+        with perf.span('serialize'):
+            rows = reader.read(queryset)
+
+        return Response(rows)
+
+
+IDEMPOTENCY_PARAMETERS = [
+    OpenApiParameter(
+        idempotency.HEADER,
+        OpenApiTypes.STR,
+        location=OpenApiParameter.HEADER,
+        description=(
+            'Retries with the same key get the first response again '
+            'instead of repeating the request'
+        ),
+    ),
+]
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description=(
+            'Comma separated list of relations (tags, ingredients) to '
+            'return as nested objects when fields is given'
+        ),
+    ),
+]
 
 
 @extend_schema_view(
@@ -35,10 +107,14 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient ids to filter',
             ),
+            *SPARSE_FIELDS_PARAMETERS,
         ],
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    create=extend_schema(parameters=IDEMPOTENCY_PARAMETERS),
+    upload_image=extend_schema(parameters=IDEMPOTENCY_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = serializers.RecipeDetailSerializer
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
@@ -59,6 +135,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             ingredient_ids = self._params_to_ints(ingredients)  # npr. [5, 8]
             queryset = queryset.filter(ingredients__id__in=ingredient_ids)
 
+        fields_kwargs = self.get_fields_kwargs()
+        if fields_kwargs:
+            queryset = self._shape_queryset(queryset, **fields_kwargs)
+
         # Recepti moraju da pripadaju autentifikovanom korisniku, da budu
         # uredjeni opadajuce, i osiguravamo da se ne vracaju duplikati (zbog
         # dvostrukog nezavisnog filtririanja, po tagovima i sastojcima)
@@ -66,6 +146,45 @@ class RecipeViewSet(viewsets.ModelViewSet):
             user=self.request.user,
         ).order_by('-id').distinct()
 
+    def get_fields_kwargs(self):
+        """Return sparse fieldset kwargs for read actions."""
+        fields = self.request.query_params.get('fields')
+        if self.action not in ('list', 'retrieve') or not fields:
+            return {}
+
+        expand = self.request.query_params.get('expand', '')
+
+        return {
+            'fields': self._params_to_names(fields),
+            'expand': self._params_to_names(expand),
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fields_kwargs())
+        return super().get_serializer(*args, **kwargs)
+
+    def _shape_queryset(self, queryset, fields, expand):
+        """Load only the columns and relations the response needs."""
+        model = queryset.model
+        columns = {field.name for field in model._meta.concrete_fields}
+        relations = self.get_serializer_class().expandable_fields
+
+        queryset = queryset.only(
+            'id',
+            *[name for name in fields if name in columns],
+        )
+        for name in relations:
+            if name in expand:
+                queryset = queryset.prefetch_related(name)
+            elif name in fields:
+                # Za listu id-jeva nije potrebno nista osim kljuca
+                related_model = model._meta.get_field(name).related_model
+                queryset = queryset.prefetch_related(
+                    Prefetch(name, related_model.objects.only('id')),
+                )
+
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return serializers.RecipeSerializer
@@ -74,10 +193,15 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    @idempotency.idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(methods=['POST'], detail=True, url_path='upload_image')
+    @idempotency.idempotent
     def upload_image(self, request, pk=None):
         # Dohvatamo konkretan recept koji je na ovom URL-u (URL je oblika:
         # .../recipes/<recipe_id>
@@ -102,6 +226,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def _params_to_ints(self, qs: str):
         return [int(str_id) for str_id in qs.strip().split(',')]
 
+    def _params_to_names(self, qs: str):
+        return tuple(sorted({
+            name.strip() for name in qs.split(',') if name.strip()
+        }))
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -116,6 +245,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
 )
 class BaseRecipeAttrViewSet(
+    ValuesListMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -154,3 +284,188 @@ class TagViewSet(BaseRecipeAttrViewSet):
 class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            'since',
+            OpenApiTypes.STR,
+            description=(
+                'Token (next) from the previous sync, omit for a full sync'
+            ),
+        ),
+        OpenApiParameter(
+            'limit',
+            OpenApiTypes.INT,
+            description='Most changes to return, up to SYNC_PAGE_SIZE',
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+class SyncView(APIView):
+    """
+    Recipes, tags and ingredients created, changed or deleted since a
+    sync token, oldest change first. Repeat with `next` while `has_more`.
+    With `held_back` more changes are committed but wait behind an older
+    transaction, so sync again shortly.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = sync.parse_token(self.request.query_params.get('since'))
+        except ValueError:
+            raise ValidationError({'since': 'Invalid sync token.'})
+        limit = min(
+            self._param('limit', settings.SYNC_PAGE_SIZE),
+            settings.SYNC_PAGE_SIZE,
+        )
+        if limit < 1:
+            raise ValidationError('limit must be positive.')
+
+        return Response(sync.changes(
+            request.user,
+            since,
+            limit,
+            context={'request': request},
+        ))
+
+    def _param(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: 'Expected an integer.'})
+
+
+@extend_schema(responses={200: OpenApiTypes.OBJECT})
+class StatsView(APIView):
+    """
+    Distributions over the user's recipes: price and time percentiles
+    and histograms, cost per minute, tags used together and the most
+    used ingredients.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(stats.get_stats(request.user))
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            'recipes',
+            OpenApiTypes.STR,
+            required=True,
+            description='Comma separated list of recipe IDs to shop for',
+        ),
+        OpenApiParameter(
+            'servings',
+            OpenApiTypes.INT,
+            description='Scale every recipe to this many servings',
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+class ShoppingListView(APIView):
+    """
+    Ingredients of several recipes merged into one list, with how many
+    recipe portions of each to buy.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(shopping.get_shopping_list(
+            request.user,
+            self._recipe_ids(),
+            self._servings(),
+        ))
+
+    def _recipe_ids(self):
+        value = self.request.query_params.get('recipes', '')
+        try:
+            recipe_ids = {
+                int(str_id) for str_id in value.split(',') if str_id.strip()
+            }
+        except ValueError:
+            raise ValidationError({'recipes': 'Expected integers.'})
+        if not recipe_ids:
+            raise ValidationError({'recipes': 'This parameter is required.'})
+        if len(recipe_ids) > settings.SHOPPING_LIST_MAX_RECIPES:
+            raise ValidationError({
+                'recipes': (
+                    f'At most {settings.SHOPPING_LIST_MAX_RECIPES} recipes.'
+                ),
+            })
+
+        return recipe_ids
+
+    def _servings(self):
+        value = self.request.query_params.get('servings')
+        if not value:
+            return None
+        try:
+            servings = int(value)
+        except ValueError:
+            servings = 0
+        if servings < 1:
+            raise ValidationError({'servings': 'Expected a positive integer.'})
+        # Veci brojevi ne staju u 64 bita pri renderovanju odgovora
+        if servings > settings.SHOPPING_LIST_MAX_SERVINGS:
+            raise ValidationError({
+                'servings': (
+                    f'At most {settings.SHOPPING_LIST_MAX_SERVINGS} servings.'
+                ),
+            })
+
+        return servings
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            'since',
+            OpenApiTypes.STR,
+            description='Sync token to start from, Last-Event-ID wins',
+        ),
+    ],
+    responses={(200, 'text/event-stream'): OpenApiTypes.STR},
+)
+class ChangeFeedView(APIView):
+    """
+    Server-sent events with the user's changes, one `changes` event per
+    sync page, pushed as they happen.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer, EventStreamRenderer]
+
+    def get(self, request):
+        try:
+            since = feed.parse_since(
+                request.headers.get('Last-Event-ID'),
+                request.query_params.get('since'),
+            )
+        except ValueError:
+            raise ValidationError({'since': 'Invalid sync token.'})
+
+        changes = feed.ChangeFeed(
+            request.user,
+            since,
+            context={'request': request},
+        )
+        response = StreamingHttpResponse(
+            feed.wsgi_slots.hold(changes.stream()),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # nginx inace baferuje odgovor i dogadjaji kasne
+        response['X-Accel-Buffering'] = 'no'
+
+        return response
@@ -0,0 +1,106 @@
+"""
+Concurrency gate for password hashing.
+
+PBKDF2 costs hundreds of milliseconds of CPU per call. At most
+PASSWORD_HASHING_CONCURRENCY hashes run at once in all workers sharing
+the cache; a request that cannot get a slot within PASSWORD_HASHING_WAIT
+seconds is answered with 429 instead of queueing behind the others.
+
+A per-process semaphore would never reject anything under uwsgi, where
+a worker runs one request at a time. Slots are cache keys taken with
+cache.add(), which is atomic in memcached, and expire after
+PASSWORD_HASHING_SLOT_SECONDS so a killed worker cannot leak one.
+"""
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import Throttled
+
+from core import metrics
+
+
+SLOT_KEY = 'password-hashing:slot:{}'
+# Koliko cesto se ponovo trazi slobodan slot dok zahtev ceka
+POLL_SECONDS = 0.02
+
+
+class HashingGate:
+    """Slots shared through the cache that shed load once all are taken."""
+
+    def __init__(self, limit, wait):
+        self.limit = limit
+        self.wait = wait
+        self._lock = threading.Lock()
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self):
+        slot, owner = self._acquire()
+        if slot is None:
+            with self._lock:
+                self.rejected += 1
+            metrics.PASSWORD_HASHING.labels('rejected').inc()
+            raise Throttled(
+                wait=settings.PASSWORD_HASHING_RETRY_AFTER,
+                detail=_('Too many concurrent login attempts, retry later.'),
+            )
+
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+        metrics.PASSWORD_HASHING.labels('admitted').inc()
+        metrics.PASSWORD_HASHING_ACTIVE.inc()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            metrics.PASSWORD_HASHING_ACTIVE.dec()
+            self._release(slot, owner)
+
+    def _acquire(self):
+        """Return the key and owner of a free slot, or None after wait."""
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait
+        while True:
+            # Nasumican pocetak da se procesi ne bore za iste kljuceve
+            start = random.randrange(self.limit)
+            for i in range(self.limit):
+                slot = SLOT_KEY.format((start + i) % self.limit)
+                if cache.add(
+                    slot,
+                    owner,
+                    settings.PASSWORD_HASHING_SLOT_SECONDS,
+                ):
+                    return slot, owner
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, None
+            time.sleep(min(POLL_SECONDS, remaining))
+
+    def _release(self, slot, owner):
+        # Istekao slot je mozda vec uzeo neko drugi
+        if cache.get(slot) == owner:
+            cache.delete(slot)
+
+    def as_dict(self):
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+        }
+
+
+gate = HashingGate(
+    settings.PASSWORD_HASHING_CONCURRENCY,
+    settings.PASSWORD_HASHING_WAIT,
+)
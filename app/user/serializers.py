@@ -5,8 +5,11 @@ from django.contrib.auth import (
 from django.utils.translation import gettext as _
 from rest_framework import serializers
 
+from core.perf import TimedSerializerMixin
+from user import hashing
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ['email', 'password', 'name']
@@ -19,14 +22,16 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         # Pre kreiranja korisnika, serijalizer mora da validira podatke
-        return get_user_model().objects.create_user(**validated_data)
+        with hashing.gate.admit():
+            return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
         user = super().update(instance, validated_data)
 
         if password:
-            user.set_password(password)
+            with hashing.gate.admit():
+                user.set_password(password)
             user.save()
 
         return user
@@ -42,11 +47,12 @@ class AuthTokenSerializer(serializers.Serializer):
     def validate(self, attrs):
         email = attrs.get('email')
         password = attrs.get('password')
-        user = authenticate(
-            request=self.context.get('request'),
-            email=email,
-            password=password,
-        )
+        with hashing.gate.admit():
+            user = authenticate(
+                request=self.context.get('request'),
+                email=email,
+                password=password,
+            )
 
         if not user:
             msg = _('Unable to authenticate user: invalid credentials')
@@ -0,0 +1,219 @@
+"""
+Tests for login throttling and the password hashing gate.
+"""
+import asyncio
+import threading
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from user import hashing
+from user.hashing import HashingGate
+from user.throttles import IPRateThrottle
+
+
+TOKEN_URL = reverse('user:token')
+CREATE_USER_URL = reverse('user:create')
+
+RATES = {
+    'login_ip': '3/min',
+    'login_email': '2/min',
+    'signup_ip': '2/min',
+    'signup_email': '1/min',
+}
+
+
+@patch.dict(api_settings.DEFAULT_THROTTLE_RATES, RATES)
+class LoginThrottleTests(TestCase):
+    """Test per address and per email throttling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        get_user_model().objects.create_user(
+            email='user@example.com',
+            password='test123',
+        )
+
+    def login(self, email, address='10.0.0.1'):
+        return self.client.post(
+            TOKEN_URL,
+            {'email': email, 'password': 'wrong'},
+            REMOTE_ADDR=address,
+        )
+
+    def test_throttled_per_email(self):
+        self.login('user@example.com', '10.0.0.1')
+        self.login('USER@example.com', '10.0.0.2')
+        res = self.login('user@example.com', '10.0.0.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    def test_throttled_per_address(self):
+        for i in range(3):
+            res = self.login(f'user{i}@example.com')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.login('other@example.com')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_ignored(self):
+        for i in range(3):
+            self.client.post(
+                TOKEN_URL,
+                {'email': f'user{i}@example.com', 'password': 'wrong'},
+                REMOTE_ADDR='10.0.0.1',
+                HTTP_X_FORWARDED_FOR=f'192.168.0.{i}',
+            )
+
+        res = self.login('other@example.com')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_signup_throttled_per_email(self):
+        payload = {'email': 'new@example.com', 'password': 'test12345'}
+        self.client.post(CREATE_USER_URL, payload, REMOTE_ADDR='10.0.0.1')
+        res = self.client.post(
+            CREATE_USER_URL,
+            payload,
+            REMOTE_ADDR='10.0.0.2',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ForwardedForTests(SimpleTestCase):
+    """Test the client address uvicorn passes on behind the proxy."""
+
+    # Kao FORWARDED_ALLOW_IPS u docker-compose-deploy.yml
+    proxy = '172.28.0.10'
+
+    def client_host(self, peer, forwarded_for):
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen['client'] = scope['client']
+
+        # Isti middleware koji pali --proxy-headers u scripts/run.sh
+        middleware = ProxyHeadersMiddleware(app, trusted_hosts=self.proxy)
+        asyncio.run(middleware(
+            {
+                'type': 'http',
+                'client': (peer, 5000),
+                'headers': [(b'x-forwarded-for', forwarded_for.encode())],
+            },
+            None,
+            None,
+        ))
+
+        return seen['client'][0]
+
+    def throttle_ident(self, host):
+        request = APIRequestFactory().post(TOKEN_URL, REMOTE_ADDR=host)
+        return IPRateThrottle().get_ident(Request(request))
+
+    def test_spoofed_forwarded_for_keeps_throttle_key(self):
+        idents = {
+            self.throttle_ident(self.client_host(self.proxy, forwarded_for))
+            for forwarded_for in [
+                '10.0.0.1',
+                # Klijent sam posalje zaglavlje, nginx ga prepise
+                # (X-Forwarded-For $remote_addr), a i da ga samo dopuni
+                # uzima se poslednja adresa koju je dodao proxy
+                '192.168.0.1, 10.0.0.1',
+                '192.168.0.2, 10.0.0.1',
+            ]
+        }
+
+        self.assertEqual(idents, {'10.0.0.1'})
+
+    def test_forwarded_for_ignored_from_other_peers(self):
+        host = self.client_host('10.0.0.1', '192.168.0.1')
+
+        self.assertEqual(self.throttle_ident(host), '10.0.0.1')
+
+
+class HashingGateTests(TestCase):
+    """Test the bounded password hashing gate."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_admits_up_to_limit(self):
+        gate = HashingGate(limit=2, wait=0)
+
+        with gate.admit(), gate.admit():
+            self.assertEqual(gate.active, 2)
+
+        self.assertEqual(gate.as_dict()['admitted'], 2)
+        self.assertEqual(gate.active, 0)
+
+    def test_sheds_load_when_full(self):
+        gate = HashingGate(limit=1, wait=0.01)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with gate.admit():
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(5)
+        try:
+            with self.assertRaises(Throttled):
+                with gate.admit():
+                    pass
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(gate.rejected, 1)
+
+    def test_slots_shared_between_processes(self):
+        # Dve instance sa istim kesom su kao dva uwsgi workera
+        worker = HashingGate(limit=1, wait=0)
+        other_worker = HashingGate(limit=1, wait=0)
+
+        with worker.admit():
+            with self.assertRaises(Throttled):
+                with other_worker.admit():
+                    pass
+
+        with other_worker.admit():
+            self.assertEqual(other_worker.active, 1)
+
+    @override_settings(PASSWORD_HASHING_RETRY_AFTER=3)
+    def test_token_view_returns_429(self):
+        other_workers = HashingGate(hashing.gate.limit, wait=0)
+        rejected = hashing.gate.rejected
+
+        with patch.object(hashing.gate, 'wait', 0.05), ExitStack() as stack:
+            for _ in range(hashing.gate.limit):
+                stack.enter_context(other_workers.admit())
+            res = APIClient().post(
+                TOKEN_URL,
+                {'email': 'user@example.com', 'password': 'test123'},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '3')
+        self.assertEqual(hashing.gate.rejected, rejected + 1)
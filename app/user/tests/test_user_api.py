@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -19,6 +20,8 @@ def create_user(**payload):
 class PublicUserApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        # Throttle istorija je u cache-u, ne sme da curi izmedju testova
+        cache.clear()
 
     def test_create_user_success(self):
         payload = {
@@ -0,0 +1,58 @@
+"""
+Throttles for the login and signup endpoints.
+
+Rates come from DEFAULT_THROTTLE_RATES under '<view.throttle_scope>_ip'
+and '<view.throttle_scope>_email'. History lives in the default cache, so
+all workers share it when CACHE_BACKEND points at memcached.
+"""
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ViewScopedThrottle(SimpleRateThrottle):
+    """Rate limit keyed by `scope_suffix`, scoped by view.throttle_scope."""
+    scope_suffix = None
+
+    def __init__(self):
+        # Rate zavisi od view-a, odredjuje se u allow_request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = f'{view.throttle_scope}_{self.scope_suffix}'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_scope_ident(request)
+        if ident is None:
+            return None
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def get_scope_ident(self, request):
+        raise NotImplementedError
+
+
+class IPRateThrottle(ViewScopedThrottle):
+    """Limit attempts per client address."""
+    scope_suffix = 'ip'
+
+    def get_scope_ident(self, request):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(ViewScopedThrottle):
+    """Limit attempts per submitted email, whatever address they come from."""
+    scope_suffix = 'email'
+
+    def get_scope_ident(self, request):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        # Hash drzi kljuc kratkim i bez znakova koje memcached ne prihvata
+        normalized = email.strip().lower().encode()
+        return hashlib.sha256(normalized).hexdigest()
@@ -10,15 +10,23 @@ from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
 )
+from user.throttles import (
+    IPRateThrottle,
+    EmailRateThrottle,
+)
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    throttle_classes = (IPRateThrottle, EmailRateThrottle)
+    throttle_scope = 'signup'
 
 
 class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (IPRateThrottle, EmailRateThrottle)
+    throttle_scope = 'login'
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -0,0 +1,7 @@
+#!/bin/sh
+# Runs once on first start of the primary (docker-entrypoint-initdb.d):
+# allow streaming replication connections from the replica.
+
+set -e
+
+echo "host replication all all md5" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,18 @@
+#!/bin/sh
+# Clone the primary with pg_basebackup on first start, then run Postgres
+# as a hot standby that streams WAL from it.
+
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_basebackup -h "$PRIMARY_HOST" -U "$POSTGRES_USER" \
+            -D "$PGDATA" -R -X stream; do
+        echo "Primary unavailable, waiting 1 second ..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 1
+    done
+    chown -R postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+fi
+
+exec su-exec postgres postgres -c hot_standby=on
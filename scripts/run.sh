@@ -6,4 +6,18 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+# Prometheus samples of all workers are aggregated from files in here
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# X-Forwarded-For is only read from the proxy (FORWARDED_ALLOW_IPS),
+# any other client could pick its own address and dodge the throttles
+if [ "$SERVER_MODE" = "asgi" ]; then
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 \
+        --workers ${WEB_WORKERS:-4} --proxy-headers --no-access-log \
+        --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}"
+else
+    uwsgi --socket :9000 --workers ${WEB_WORKERS:-4} --master \
+        --enable-threads --module app.wsgi
+fi